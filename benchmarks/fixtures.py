@@ -0,0 +1,293 @@
+import re
+import json
+import math
+import random
+import asyncio
+import hashlib
+import threading
+from types import SimpleNamespace
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 근사 중복 필터에 의해 뭉개지지 않도록 리뷰 본문을 다양하게 생성하기 위한 어휘
+_WORDS = [
+    "배송", "빨라요", "포장", "꼼꼼", "제품", "품질", "좋아요", "별로", "가격", "저렴", "만족", "불만",
+    "색상", "예뻐요", "사이즈", "작아요", "커요", "향", "은은", "자극", "없어요", "촉촉", "건조", "재구매",
+    "의사", "있어요", "교환", "환불", "문의", "친절", "답변", "늦어요", "케이스", "튼튼", "깨짐", "스크래치",
+    "마스크팩", "진정", "효과", "선물", "부모님", "추천", "한달", "사용", "후기", "남겨요", "생각보다", "괜찮",
+]
+
+# 템플릿형(복붙) 리뷰 — 근사 중복 제거 효과를 측정하기 위해 일정 비율로 섞음
+_TEMPLATES = ["배송 빨라요 좋아요 만족합니다", "잘 받았습니다 감사합니다 번창하세요", "재구매 의사 있어요 추천합니다"]
+
+_PAGE_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>{name}</title></head>
+<body>
+<h1>{name}</h1>
+<div id="reviews"></div>
+<review-number-pagination>
+  <div class="pagination-layout--desktop">
+    <button class="prev"><svg width="8" height="8"></svg></button>
+    <span id="page-no"></span>
+    <button id="next" class="next"><svg width="8" height="8"></svg></button>
+  </div>
+</review-number-pagination>
+<script>
+const PRODUCT_ID = {product_id_json};
+const RENDER_DELAY = {render_delay_ms};
+let currentPage = 1;
+function render(page) {{
+  fetch(`/api/reviews?product=${{encodeURIComponent(PRODUCT_ID)}}&page=${{page}}`)
+    .then(r => r.json())
+    .then(payload => setTimeout(() => {{
+      const box = document.getElementById('reviews');
+      box.innerHTML = '';
+      for (const review of payload.data.reviews) {{
+        const item = document.createElement('div');
+        item.className = 'review-item';
+        item.dataset.reviewId = review.id;
+        item.innerHTML = '<div class="meta"><span class="author"></span> <span class="date"></span> ' +
+                         '<span class="rating"></span></div><div class="body"><p class="alp-body15"></p></div>';
+        item.querySelector('.author').innerText = review.author;
+        item.querySelector('.date').innerText = review.created_at;
+        item.querySelector('.rating').setAttribute('aria-label', review.rating + '점');
+        item.querySelector('.rating').innerText = '★'.repeat(review.rating);
+        item.querySelector('p.alp-body15').innerText = review.content;
+        box.appendChild(item);
+      }}
+      currentPage = page;
+      document.getElementById('page-no').innerText = String(page);
+      document.getElementById('next').disabled = page >= payload.data.total_pages;
+    }}, RENDER_DELAY));
+}}
+document.getElementById('next').addEventListener('click', () => render(currentPage + 1));
+render(1);
+</script>
+</body></html>"""
+
+class FixtureSite:
+    """
+    리뷰 위젯을 흉내 내는 로컬 HTTP 서버입니다.
+    실제 쇼핑몰과 동일한 셀렉터(p.alp-body15, review-number-pagination)와 리뷰 API(/api/reviews?page=N)를 제공하며,
+    렌더링 지연과 페이지 수를 조절하여 실제 사이트에 접속하지 않고 크롤러 처리량을 측정할 수 있습니다.
+    """
+    def __init__(self, products=4, pages=5, page_size=10, render_delay_ms=200, duplicate_ratio=0.1, seed=42):
+        self.page_size = page_size
+        self.render_delay_ms = render_delay_ms
+        self.duplicate_ratio = duplicate_ratio
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reviews = {}   # product_id -> 최신순 리뷰 리스트
+        self.requests = 0
+        self._next_id = 1
+        for i in range(products):
+            product_id = f"bench_{i + 1:03d}"
+            self.reviews[product_id] = []
+            self.add_reviews(product_id, pages * page_size)
+        self.server = None
+        self._thread = None
+
+    def _make_text(self):
+        if self.random.random() < self.duplicate_ratio:
+            return self.random.choice(_TEMPLATES) + "!" * self.random.randint(0, 2)
+        return " ".join(self.random.choice(_WORDS) for _ in range(self.random.randint(6, 16)))
+
+    def add_reviews(self, product_id, count):
+        """신규 리뷰를 목록 앞쪽(최신)에 추가함 — 증분 수집 시나리오에서 사이클 사이의 신규 유입을 흉내 냄."""
+        with self.lock:
+            fresh = []
+            for _ in range(count):
+                review_id = self._next_id
+                self._next_id += 1
+                fresh.append({
+                    'id': review_id,
+                    'content': self._make_text(),
+                    'created_at': f"2026-01-{(review_id % 28) + 1:02d}",
+                    'rating': self.random.randint(1, 5),
+                    'author': f"user{review_id % 997}",
+                })
+            self.reviews[product_id] = list(reversed(fresh)) + self.reviews[product_id]
+
+    @property
+    def products(self):
+        """settings.yaml의 products 섹션과 같은 형식의 상품 목록."""
+        return [{'id': product_id, 'name': f"벤치마크 상품 {product_id}", 'url': self.url(product_id)} for product_id in self.reviews]
+
+    def url(self, product_id):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/product/{product_id}"
+
+    def _page_payload(self, product_id, page):
+        with self.lock:
+            reviews = self.reviews.get(product_id, [])
+            total_pages = max(1, math.ceil(len(reviews) / self.page_size))
+            chunk = reviews[(page - 1) * self.page_size : page * self.page_size]
+        return {'data': {'reviews': chunk, 'page': page, 'total_pages': total_pages}}
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type, etag=None):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                site.requests += 1
+                parts = urlsplit(self.path)
+                if parts.path.startswith("/product/"):
+                    product_id = parts.path.rsplit("/", 1)[-1]
+                    html = _PAGE_HTML.format(
+                        name=f"벤치마크 상품 {product_id}", product_id_json=json.dumps(product_id),
+                        render_delay_ms=site.render_delay_ms
+                    )
+                    self._send(200, html, 'text/html; charset=utf-8')
+                elif parts.path == "/api/reviews":
+                    query = parse_qs(parts.query)
+                    product_id = query.get('product', [''])[0]
+                    page = int(query.get('page', ['1'])[0] or 1)
+                    body = json.dumps(site._page_payload(product_id, page), ensure_ascii=False)
+                    # 변경 감지 프로브의 조건부 요청(If-None-Match)을 흉내 내기 위해 본문 해시를 ETag로 제공함
+                    etag = '"' + hashlib.md5(body.encode('utf-8')).hexdigest() + '"'
+                    if self.headers.get('If-None-Match') == etag:
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.end_headers()
+                        return
+                    self._send(200, body, 'application/json', etag=etag)
+                else:
+                    self._send(404, "not found", 'text/plain')
+
+        return Handler
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fixture-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+class StubAPIError(Exception):
+    """google-genai의 APIError처럼 code 속성을 가진 스텁 예외 (processor의 429 판별 로직을 그대로 통과시킴)."""
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+class StubGeminiClient:
+    """
+    genai.Client의 client.aio.models.generate_content 인터페이스를 흉내 내는 스텁입니다.
+    프롬프트의 [입력 데이터] JSON을 읽어 리뷰 ID별 결정적(Deterministic) 분석 결과를 반환하며,
+    응답 지연과 오류율(일시 장애/429)을 설정하여 재시도·Rate Limit 경로의 비용도 측정할 수 있습니다.
+    """
+    CATEGORIES = ["배송", "제품품질", "가격", "서비스", "기타"]
+    SENTIMENTS = ["긍정", "부정", "중립"]
+
+    def __init__(self, latency=0.3, error_rate=0.0, rate_limit_ratio=0.5, seed=7):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_ratio = rate_limit_ratio
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self.reviews_analyzed = 0
+        self.aio = SimpleNamespace(models=self)
+
+    def _parse_prompt(self, prompt):
+        match = re.search(r"\[입력 데이터\]\s*(\[.*?\])\s*\[출력 형식 예시\]", prompt, re.S)
+        return json.loads(match.group(1)) if match else []
+
+    def _analyze(self, review):
+        digest = int(hashlib.md5(review['text'].encode('utf-8')).hexdigest(), 16)
+        return {
+            'id': review['id'],
+            'category': self.CATEGORIES[digest % len(self.CATEGORIES)],
+            'sentiment': self.SENTIMENTS[(digest >> 8) % len(self.SENTIMENTS)],
+            'urgency': (digest >> 16) % 5 + 1,
+            'summary': review['text'][:10],
+        }
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            if self.random.random() < self.rate_limit_ratio:
+                raise StubAPIError(429, "RESOURCE_EXHAUSTED {'retryDelay': '0.5s'}")
+            raise StubAPIError(503, "UNAVAILABLE")
+        results = [self._analyze(review) for review in self._parse_prompt(contents)]
+        self.reviews_analyzed += len(results)
+        text = json.dumps(results, ensure_ascii=False)
+        return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(candidates_token_count=len(text) // 2))
+
+class SlackSink:
+    """
+    Slack Incoming Webhook을 흉내 내는 로컬 수신 서버입니다.
+    수신한 메시지 수를 집계하며, throttle_every를 지정하면 N건마다 429(Retry-After)를 반환하여 재시도 경로를 재현합니다.
+    """
+    def __init__(self, throttle_every=0, retry_after=0.2):
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.received = 0
+        self.throttled = 0
+        self.blocks = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/services/bench"
+
+    def _handler(self):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with sink.lock:
+                    attempt = sink.received + sink.throttled + 1
+                    throttle = sink.throttle_every and attempt % sink.throttle_every == 0
+                    if throttle:
+                        sink.throttled += 1
+                    else:
+                        sink.received += 1
+                        sink.blocks += len(json.loads(body or b"{}").get('blocks', []))
+                if throttle:
+                    self.send_response(429)
+                    self.send_header('Retry-After', str(sink.retry_after))
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+        return Handler
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self.server.serve_forever, name="slack-sink", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,303 @@
+"""
+실제 쇼핑몰/Gemini/Slack 없이 수집 → 저장 → 분석 → 알림 파이프라인의 처리량을 측정하는 오프라인 벤치마크.
+
+사용법:
+    python -m benchmarks.run --scenario all --output data/benchmark.json
+    python -m benchmarks.run --scenario large_db --rows 100000 1000000
+
+시나리오:
+    cold_backfill  빈 DB에서 전체 상품의 모든 페이지를 최초 수집 (신규 상품이므로 알림 OFF)
+    no_change      신규 리뷰가 없는 상태에서 반복 사이클 (증분 중단이 얼마나 빨리 일어나는지 측정)
+    incremental    사이클마다 상품별 신규 리뷰를 추가하여 수집/분석/알림 전체 경로를 측정
+    large_db       대용량 CSV(10만~100만 행)에서 저장소 연산 비용 측정 (CSV / SQLite 백엔드)
+
+peak RSS는 프로세스 전체의 최댓값이므로, 시나리오 간 비교가 필요하면 --scenario로 하나씩 실행함.
+"""
+import os
+import csv
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import platform
+import resource
+import tempfile
+from datetime import datetime, timedelta
+
+from src.metrics import metrics, configure_metrics
+from src.log import configure_logging
+from benchmarks.fixtures import FixtureSite, StubGeminiClient, SlackSink
+
+SCENARIOS = ("cold_backfill", "no_change", "incremental", "large_db")
+
+def peak_rss_mb():
+    """프로세스의 최대 상주 메모리(MB). Linux는 KB, macOS는 바이트 단위로 반환되므로 보정함."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def stage_breakdown(summary):
+    """사이클 요약의 타이밍을 라벨 구분 없이 단계(지표 이름)별 누적 소요 시간으로 합산함."""
+    stages = {}
+    for key, timing in summary['timings'].items():
+        name = key.split("{", 1)[0]
+        stages[name] = round(stages.get(name, 0.0) + timing['total_seconds'], 4)
+    return dict(sorted(stages.items(), key=lambda item: -item[1]))
+
+class PipelineHarness:
+    """fixture 사이트/Gemini 스텁/Slack 수신 서버를 묶어 scheduler.job과 같은 구성으로 파이프라인 사이클을 실행함."""
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.site = FixtureSite(
+            products=args.products, pages=args.pages, page_size=args.page_size,
+            render_delay_ms=args.render_delay_ms, duplicate_ratio=args.duplicate_ratio
+        ).start()
+        self.sink = SlackSink(throttle_every=args.slack_throttle_every).start()
+        self.gemini = StubGeminiClient(latency=args.llm_latency, error_rate=args.llm_error_rate)
+        self.config = {
+            'gemini': {
+                'api_key': "benchmark",
+                'model_name': "stub-model",
+                'requests_per_minute': args.llm_rpm,
+                'tokens_per_minute': None,
+                'max_concurrency': 4,
+                'cache': {'enabled': True, 'path': os.path.join(workdir, "llm_cache.db")},
+            },
+            'slack': {
+                'webhook_url': self.sink.url,
+                'messages_per_minute': 6000,
+                'dead_letter_path': os.path.join(workdir, "slack_dead_letter.jsonl"),
+                'digest_interval_seconds': 0,
+            },
+            'storage': {
+                'backend': args.backend,
+                'csv_path': os.path.join(workdir, "reviews_db.csv"),
+                'sqlite_path': os.path.join(workdir, "reviews.db"),
+            },
+        }
+
+    def close(self):
+        self.site.stop()
+        self.sink.stop()
+
+    def run_cycle(self):
+        # 무거운 의존성(playwright, google-genai)은 e2e 시나리오에서만 필요하므로 지연 로딩함
+        from src.crawler import GlowmCrawler
+        from src.processor import ReviewProcessor
+        from src.notifier import SlackNotifier
+        from src.storage import create_storage
+        from src.pipeline import ReviewPipeline
+        from src.review_filter import ReviewFilter
+        from src.change_probe import ChangeProbe
+
+        crawler = GlowmCrawler(max_concurrency=self.args.max_concurrency, mode=self.args.mode,
+                               review_filter=ReviewFilter.from_config(self.config),
+                               change_probe=ChangeProbe() if self.args.change_probe else None)
+        processor = ReviewProcessor(self.config, client=self.gemini)
+        notifier = SlackNotifier(self.config)
+        storage = create_storage(self.config)
+        notifier.start()
+        pipeline = ReviewPipeline(crawler, processor, notifier, storage, max_pages=self.args.pages + 10,
+                                  review_filter=crawler.review_filter)
+
+        sent_before, calls_before, requests_before = self.sink.received, self.gemini.calls, self.site.requests
+        metrics.start_cycle()
+        started = time.perf_counter()
+        try:
+            product_stats = asyncio.run(pipeline.run(self.site.products))
+        finally:
+            storage.flush_index()
+            notifier.close()
+        wall = time.perf_counter() - started
+        summary = metrics.cycle_summary()
+
+        collected = sum(stats['collected'] for stats in product_stats.values())
+        return {
+            'wall_seconds': round(wall, 3),
+            'reviews_collected': collected,
+            'reviews_analyzed': sum(stats['analyzed'] for stats in product_stats.values()),
+            'reviews_notified': sum(stats['notified'] for stats in product_stats.values()),
+            'reviews_per_second': round(collected / wall, 2) if wall else None,
+            'pages_per_second': metrics.throughput(summary, "crawl_pages_total", "crawl_product_seconds"),
+            'site_requests': self.site.requests - requests_before,
+            'llm_calls': self.gemini.calls - calls_before,
+            'slack_messages': self.sink.received - sent_before,
+            'errors': {pid: stats['error'] for pid, stats in product_stats.items() if stats['error']},
+            'stages': stage_breakdown(summary),
+            'counters': summary['counters'],
+        }
+
+def run_cold_backfill(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        harness = PipelineHarness(args, workdir)
+        try:
+            result = harness.run_cycle()
+        finally:
+            harness.close()
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+def _run_repeated_cycles(args, new_per_cycle):
+    with tempfile.TemporaryDirectory() as workdir:
+        harness = PipelineHarness(args, workdir)
+        try:
+            backfill = harness.run_cycle()
+            cycles = []
+            for _ in range(args.cycles):
+                for product_id in harness.site.reviews:
+                    if new_per_cycle:
+                        harness.site.add_reviews(product_id, new_per_cycle)
+                cycles.append(harness.run_cycle())
+        finally:
+            harness.close()
+    walls = [cycle['wall_seconds'] for cycle in cycles]
+    return {
+        'backfill_wall_seconds': backfill['wall_seconds'],
+        'cycles': cycles,
+        'avg_cycle_wall_seconds': round(sum(walls) / len(walls), 3) if walls else None,
+        'max_cycle_wall_seconds': max(walls) if walls else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def run_no_change(args):
+    return _run_repeated_cycles(args, new_per_cycle=0)
+
+def run_incremental(args):
+    return _run_repeated_cycles(args, new_per_cycle=args.new_per_cycle)
+
+def generate_csv(path, rows, products=20, unanalyzed_ratio=0.1, seed=1):
+    """대용량 CSV DB를 스트리밍으로 생성함 (메모리에 전체 행을 올리지 않음). 생성된 리뷰 ID 샘플을 반환함."""
+    rng = random.Random(seed)
+    base = datetime.now() - timedelta(days=30)
+    sample_ids = []
+    with open(path, mode='w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['product_id', 'id', 'date_collected', 'category', 'sentiment', 'urgency', 'summary', 'full_text', 'is_analyzed'])
+        for i in range(rows):
+            review_id = hashlib.md5(f"row_{i}".encode('utf-8')).hexdigest()
+            collected = (base + timedelta(seconds=i * 30 * 86400 // max(rows, 1))).strftime("%Y-%m-%d %H:%M:%S")
+            if rng.random() < unanalyzed_ratio:
+                writer.writerow([f"bench_{i % products:03d}", review_id, collected, '', '', '', '', f"리뷰 본문 {i}", 'N'])
+            else:
+                writer.writerow([f"bench_{i % products:03d}", review_id, collected, '배송', '긍정', 1, '요약', f"리뷰 본문 {i}", 'Y'])
+            if i % max(rows // 1000, 1) == 0:
+                sample_ids.append(review_id)
+    return sample_ids
+
+def _timed(func):
+    started = time.perf_counter()
+    value = func()
+    return round(time.perf_counter() - started, 4), value
+
+def _storage_ops(storage, sample_ids, lookups=10000):
+    """두 백엔드에 공통인 저장소 연산의 소요 시간(초)을 측정함."""
+    result = {}
+    missing = [hashlib.md5(f"missing_{i}".encode('utf-8')).hexdigest() for i in range(lookups // 2)]
+    probe = (sample_ids * (lookups // (2 * len(sample_ids)) + 1))[: lookups // 2] + missing
+    seconds, _ = _timed(lambda: [storage.is_review_exist(review_id) for review_id in probe])
+    result['is_review_exist_us_per_op'] = round(seconds / len(probe) * 1e6, 2)
+
+    new_reviews = [{'id': hashlib.md5(f"new_{i}".encode('utf-8')).hexdigest(), 'content': f"신규 리뷰 {i}"} for i in range(100)]
+    result['save_raw_reviews_100_s'], _ = _timed(lambda: storage.save_raw_reviews("bench_000", new_reviews))
+    updates = {review['id']: {'category': '배송', 'sentiment': '부정', 'urgency': 4, 'summary': '배송 지연'} for review in new_reviews}
+    result['update_analysis_results_100_s'], _ = _timed(lambda: storage.update_analysis_results(updates))
+    result['get_existing_product_ids_s'], _ = _timed(storage.get_existing_product_ids)
+    result['get_product_activity_s'], _ = _timed(lambda: storage.get_product_activity(datetime.now() - timedelta(days=7)))
+    result['iter_unanalyzed_full_scan_s'], unanalyzed = _timed(lambda: sum(len(chunk) for chunk in storage.iter_unanalyzed(500)))
+    result['unanalyzed_rows'] = unanalyzed
+    return result
+
+def run_large_db(args):
+    from src.storage import ReviewStorage
+    from src.sqlite_storage import SQLiteReviewStorage
+
+    results = {}
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            csv_path = os.path.join(workdir, "reviews_db.csv")
+            generate_seconds, sample_ids = _timed(lambda: generate_csv(csv_path, rows))
+            entry = {'generate_s': generate_seconds, 'csv_size_mb': round(os.path.getsize(csv_path) / 1024 / 1024, 1)}
+
+            # CSV 백엔드: Bloom 사이드카가 없는 최초 기동(전체 인덱스 로딩)과 사이드카를 활용한 재기동 비용을 구분함
+            storage = ReviewStorage(csv_path)
+            entry['csv_cold_index_load_s'], _ = _timed(lambda: storage.is_review_exist(sample_ids[0]))
+            entry['csv_flush_index_s'], _ = _timed(storage.flush_index)
+            warm = ReviewStorage(csv_path)
+            entry['csv_warm_miss_s'], _ = _timed(lambda: warm.is_review_exist("0" * 32))
+            entry['csv'] = _storage_ops(storage, sample_ids, args.lookups)
+
+            # SQLite 백엔드: 최초 이관 비용과 동일 연산 비용
+            sqlite_path = os.path.join(workdir, "reviews.db")
+            entry['sqlite_migrate_s'], sqlite_storage = _timed(lambda: SQLiteReviewStorage(sqlite_path, migrate_from=csv_path))
+            entry['sqlite'] = _storage_ops(sqlite_storage, sample_ids, args.lookups)
+            sqlite_storage.close()
+        entry['peak_rss_mb'] = peak_rss_mb()
+        results[str(rows)] = entry
+    return results
+
+RUNNERS = {
+    'cold_backfill': run_cold_backfill,
+    'no_change': run_no_change,
+    'incremental': run_incremental,
+    'large_db': run_large_db,
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="GLOW.M 리뷰 파이프라인 오프라인 벤치마크")
+    parser.add_argument('--scenario', choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument('--output', help="결과 JSON 저장 경로 (미지정 시 표준 출력)")
+    # fixture 사이트
+    parser.add_argument('--products', type=int, default=4)
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--render-delay-ms', type=int, default=200)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1)
+    # 파이프라인 구성
+    parser.add_argument('--mode', choices=("dom", "network"), default="dom")
+    parser.add_argument('--backend', choices=("csv", "sqlite"), default="csv")
+    parser.add_argument('--max-concurrency', type=int, default=4)
+    parser.add_argument('--change-probe', action="store_true", help="전체 수집 전 '변경 없음' 프로브 사용")
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--new-per-cycle', type=int, default=5)
+    # Gemini/Slack 스텁
+    parser.add_argument('--llm-latency', type=float, default=0.3)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-rpm', type=int, default=1000)
+    parser.add_argument('--slack-throttle-every', type=int, default=0)
+    # 대용량 DB
+    parser.add_argument('--rows', type=int, nargs="+", default=[100000])
+    parser.add_argument('--lookups', type=int, default=10000)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # 단계별 소요 시간 분석을 위해 계측을 켜고, 진행 로그는 경고 이상만 출력함
+    configure_metrics({'metrics': {'enabled': True}})
+    configure_logging({'logging': {'level': "WARNING"}})
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    report = {
+        'generated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count()},
+        'parameters': vars(args),
+        'scenarios': {},
+    }
+    for name in scenarios:
+        try:
+            report['scenarios'][name] = RUNNERS[name](args)
+        except ImportError as e:
+            # playwright/google-genai가 설치되지 않은 환경에서는 해당 시나리오만 건너뜀
+            report['scenarios'][name] = {'skipped': f"의존성 누락: {e}"}
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, mode='w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,15 @@
-import schedule
 import time
-import asyncio
-import os
-import yaml
 import sys
+import argparse
+from datetime import datetime, timedelta
 
-from src.crawler import GlowmCrawler
-from src.processor import ReviewProcessor
-from src.notifier import SlackNotifier
-from src.storage import ReviewStorage
+from src.pipeline import ReviewPipeline
+from src.product_scheduler import ProductScheduler
+from src.worker_coordinator import WorkerCoordinator
+from src.backlog import build_backlog_worker
+from src.runtime import RuntimeContext
+from src.metrics import metrics
+from src.log import get_logger
 
 # ==========================================
 # 🎛️ [운영 설정] 시스템 가동 모드 정의
@@ -17,134 +18,271 @@ from src.storage import ReviewStorage
 # 이는 시스템 초기 구축 시 발생할 수 있는 '알림 폭탄'을 방어하기 위한 설계임
 FIRST_RUN_MODE = False
 
-with open("config/settings.yaml", "r", encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+# 설정 파일은 프로세스 기동 시 1회만 읽고, 이후에는 파일 수정 시에만 다시 읽음 (runtime.reload_if_changed)
+# 크롤러(playwright)/분석(google-genai)/알림(requests) 모듈은 해당 구성 요소를 처음 사용할 때 로딩됨
+runtime = RuntimeContext("config/settings.yaml")
+logger = get_logger("scheduler")
 
-# 실무 부서의 대응 속도와 서버 리소스 부하를 고려한 체크 주기 설정
+# 실무 부서의 대응 속도와 서버 리소스 부하를 고려한 기본 체크 주기 설정
+# (수집 이력이 없는 상품의 초기 주기이며, 이후에는 상품별 리뷰 유입 속도에 따라 자동 조정됨)
 CHECK_INTERVAL_MINUTES = 30
-PRODUCTS = config.get('products', [])
 
-def job():
+def _delta(after, before):
+    """재사용 구성 요소의 누적 통계에서 이번 사이클 증가분만 계산함."""
+    return {key: value - before.get(key, 0) for key, value in after.items()}
+
+
+def job(products=None):
     """
     정기적으로 실행되는 메인 파이프라인.
-    수집(Crawler) -> 저장(Storage) -> 분석(Processor) -> 알림(Notifier)의 전 과정을 제어함.
+    수집(Crawler) -> 저장(Storage) -> 분석(Processor) -> 알림(Notifier)의 전 과정을 동시 실행 단계로 제어함.
+    products를 지정하면 해당 상품(수집 예정 시각이 된 상품)만 수집하며, 상품별 처리 통계를 반환함.
     """
+    products = runtime.products if products is None else products
+    pipeline_config = runtime.section('pipeline')
+    metrics_config = runtime.section('metrics')
     current_time = time.strftime('%Y-%m-%d %H:%M:%S')
-    print(f"\n⏰ [스케줄러] 리뷰 수집 사이클 시작 ({current_time})")
-    
-    # 각 모듈의 독립성을 유지하기 위해 매 사이클마다 인스턴스를 초기화하여 
-    # 이전 사이클의 상태가 다음 사이클에 영향을 주지 않도록 격리(Isolation)함
-    crawler = GlowmCrawler()
-    processor = ReviewProcessor()
-    notifier = SlackNotifier()
-    storage = ReviewStorage()
-    
-    # [Smart Mute 로직] 현재 데이터베이스에 등록된 상품 목록을 조회하여 신규 상품 여부 판별
-    existing_products = storage.get_existing_product_ids()
-    
-    for product in PRODUCTS:
-        p_id = product['id']
-        p_name = product['name']
-        p_url = product['url']
-        
-        # [의사결정 로직]
-        # 신규 상품 등록 시 수백 건의 과거 리뷰가 한꺼번에 유입되므로,
-        # 초기 구축(Initial Build) 시에만 자동으로 알림을 차단하는 지능형 뮤트 기능 적용
-        is_new_product_entry = p_id not in existing_products
-        should_mute = FIRST_RUN_MODE or is_new_product_entry
-        
-        print(f"\n   📦 상품 점검: {p_name} ({p_id})")
-        if is_new_product_entry:
-            print("      ✨ [New] 신규 등록된 상품 감지! 초기 DB 구축 모드로 가동합니다 (알림 OFF).")
-        
-        # 무한 루프나 과도한 페이지 탐색을 방지하기 위한 안전 장치(Safety Limit) 설정
-        MAX_SAFETY_PAGES = 100 
-
-        try:
-            # 비동기 크롤러 실행을 동기 스케줄러 내에서 안전하게 래핑하여 실행
-            new_reviews_data = asyncio.run(
-                crawler.fetch_reviews(p_url, p_id, max_pages=MAX_SAFETY_PAGES, storage=storage)
-            )
-        except Exception as e:
-            # 개별 상품의 오류가 전체 스케줄러 중단으로 번지지 않도록 예외 전파 차단
-            print(f"   ❌ {p_name} 크롤링 도중 예외 발생: {e}")
-            continue
-
-        if not new_reviews_data:
-            print(f"   💤 업데이트된 신규 리뷰가 없습니다.")
-            continue
-
-        print(f"   🚀 {len(new_reviews_data)}건의 신규 데이터 발견! 전처리 및 분석 시작...")
-
-        batch_input = []
-        raw_text_map = {} 
-        
-        for item in new_reviews_data:
-            r_id = item['id']
-            text = item['content']
-            # 데이터 무결성을 보장하기 위해 분석 전 원본 데이터를 선행 저장
-            storage.save_raw_review(p_id, r_id, text)
-            batch_input.append({'id': r_id, 'text': text})
-            raw_text_map[r_id] = text
-
-        # [비용 최적화] API 호출 횟수를 줄이기 위해 10건 단위의 배치(Batch) 처리 수행
-        CHUNK_SIZE = 10
-        total_processed = 0
-        
-        for i in range(0, len(batch_input), CHUNK_SIZE):
-            current_batch = batch_input[i : i + CHUNK_SIZE]
-            print(f"   🧠 Gemini AI 분석 중 (Batch {i//CHUNK_SIZE + 1}: {len(current_batch)}건)...")
-            
-            # 지수 백오프 로직이 내장된 프로세서를 통해 안정적인 분석 결과 확보
-            analysis_results = processor.analyze_reviews_batch(current_batch)
-
-            if analysis_results:
-                for result in analysis_results:
-                    r_id = result.get('id')
-                    if not r_id or r_id not in raw_text_map: continue
-                    
-                    # 수집된 원본 텍스트와 매칭하여 최종 데이터 완성
-                    result['product_name'] = p_name
-                    result['raw_text'] = raw_text_map[r_id]
-                    
-                    # DB 내 분석 결과 업데이트 및 상태 플래그 변경
-                    storage.update_analysis_result(r_id, result)
-                    
-                    # [Smart Mute 적용] 실시간 모드일 때만 비개발 조직(CS팀)으로 알림 전송
-                    if not should_mute:
-                        notifier.send_notification(result)
-                        # 슬랙 API의 Rate Limit을 고려한 짧은 스로틀링(Throttling)
-                        time.sleep(1)
-                    
-                    total_processed += 1
-            else:
-                print("      ⚠️ 해당 Batch AI 분석 결과 수신 실패.")
-            
-            # 서버 부하 분산을 위한 배치 간 대기 시간 설정
-            time.sleep(2)
-
-        print(f"   ✅ {p_name} 처리 완료: 총 {total_processed}건 반영됨")
-        time.sleep(3)
-
-    print(f"\n🏁 전체 모니터링 사이클 완료! 다음 스케줄 대기 중...")
+    logger.info(f"\n⏰ [스케줄러] 리뷰 수집 사이클 시작 ({current_time})")
+    metrics.start_cycle()
+
+    # GenAI 클라이언트/LLM 캐시, Slack 세션/전송 큐, 저장소 인덱스, 근사 중복 인덱스는 사이클 간에 재사용하고
+    # (설정 파싱/클라이언트 생성/인덱스 로딩 비용 제거) 브라우저를 띄우는 크롤러만 사이클마다 생성함
+    crawler = runtime.crawler()
+    processor = runtime.processor
+    notifier = runtime.notifier
+    storage = runtime.storage
+    review_filter = runtime.review_filter
+
+    # 재사용 구성 요소의 통계는 누적값이므로, 사이클 시작 시점 값을 기준으로 이번 사이클 증가분을 보고함
+    notifier_before = dict(notifier.stats)
+    review_filter_before = dict(review_filter.stats)
+    cache_before = processor.cache.stats() if processor.cache else None
+
+    # 수집 → 저장 → 분석 → 알림 단계를 크기 제한 큐로 연결하여 동시에 실행함
+    # (상품 B를 수집하는 동안 상품 A의 분석/알림이 진행되어, 리뷰 발견 후 알림까지의 지연이 수 초 단위로 단축됨)
+    # 무한 루프나 과도한 페이지 탐색을 방지하기 위한 안전 장치(Safety Limit)로 최대 100페이지까지만 탐색함
+    pipeline = ReviewPipeline(
+        crawler, processor, notifier, storage,
+        max_pages=100,
+        first_run_mode=FIRST_RUN_MODE,
+        analyze_queue_size=pipeline_config.get('analyze_queue_size', 8),
+        notify_queue_size=pipeline_config.get('notify_queue_size', 200),
+        analysis_workers=pipeline_config.get('analysis_workers', 2),
+        review_filter=review_filter
+    )
+
+    logger.info(f"\n   🌐 {len(products)}개 상품 파이프라인 시작 (최대 {crawler.max_concurrency}개 병렬 수집)")
+    try:
+        # 비동기 파이프라인을 공용 이벤트 루프에서 실행 (루프에 묶인 비동기 GenAI 클라이언트를 사이클 간에 재사용)
+        with metrics.timer("cycle_seconds"):
+            product_stats = runtime.run(pipeline.run(products))
+    except Exception as e:
+        # 브라우저 기동 실패 등 공통 인프라 오류는 이번 사이클을 건너뛰고 다음 스케줄에서 재시도함
+        logger.error(f"   ❌ 파이프라인 실행 중 예외 발생: {e}")
+        product_stats = {product['id']: {'collected': 0, 'analyzed': 0, 'notified': 0, 'error': str(e)} for product in products}
+    finally:
+        # 사이클마다 중복 검사 인덱스를 영속화함 (알림 큐는 사이클 간에 유지되며 종료 시 runtime.close()에서 비움)
+        storage.flush_index()
+
+    for product in products:
+        p_stats = product_stats.get(product['id'])
+        if not p_stats or p_stats['error']: continue
+        if not p_stats['collected']:
+            logger.info(f"   💤 {product['name']}: 업데이트된 신규 리뷰가 없습니다.")
+        else:
+            logger.info(f"   ✅ {product['name']} 처리 완료: 신규 {p_stats['collected']}건 / 분석 {p_stats['analyzed']}건 "
+                        f"(근사 중복 재사용 {p_stats['deduplicated']}건) / 알림 {p_stats['notified']}건")
+
+    review_filter_stats = _delta(review_filter.stats, review_filter_before)
+    logger.info(f"   🧽 LLM 사전 필터: 금칙어 {review_filter_stats['keyword_filtered']}건 / 짧은 글 {review_filter_stats['too_short']}건 제외, "
+                f"근사 중복 {review_filter_stats['near_duplicates']}건은 대표 리뷰 결과 재사용")
+
+    filter_stats = crawler.request_filter.stats()
+    logger.info(f"   🧹 불필요한 요청 {filter_stats['blocked_requests']}건 차단 "
+                f"(추정 절감량 약 {filter_stats['estimated_bytes_saved'] / 1024 / 1024:.1f}MB, 유형별 가정 크기 기준)")
+
+    slack_stats = _delta(notifier.stats, notifier_before)
+    logger.info(f"   📨 슬랙 알림: 전송 {slack_stats['sent']}건 / 다이제스트 묶음 {slack_stats['digested']}건 / "
+                f"실패 {slack_stats['failed']}건 (전송 대기 {notifier.queue_depth()}건)")
+
+    cache_stats = None
+    if processor.cache:
+        after = processor.cache.stats()
+        hits = after['hits'] - (cache_before or {}).get('hits', 0)
+        misses = after['misses'] - (cache_before or {}).get('misses', 0)
+        cache_stats = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0}
+        logger.info(f"   💾 LLM 캐시: 적중 {cache_stats['hits']}건 / 미스 {cache_stats['misses']}건 (적중률 {cache_stats['hit_rate']:.0%})")
+
+    # [Observability] 누적 지표는 Prometheus 텍스트 파일로, 이번 사이클의 단계별 소요 시간/처리량은 JSON 요약으로 남김
+    if metrics.enabled:
+        metrics.write_prometheus(metrics_config.get('prometheus_path', "data/metrics.prom"))
+        summary = metrics.write_cycle_summary(metrics_config.get('summary_path', "data/cycle_summary.jsonl"), extra={
+            'products': product_stats,
+            'prefilter': review_filter_stats,
+            'request_filter': filter_stats,
+            'slack': slack_stats,
+            'llm_cache': cache_stats,
+        })
+        logger.info(f"   📊 사이클 지표 기록 완료 (소요 {summary['wall_seconds']}초)", extra={'cycle_summary': summary})
+
+    logger.info(f"\n🏁 전체 모니터링 사이클 완료! 다음 스케줄 대기 중...")
+    return product_stats
+
+def build_product_scheduler(previous=None):
+    """상품별 적응형 수집 주기 스케줄러를 생성함. previous를 전달하면 설정 변경 후에도 상품별 수집 이력을 이어받음."""
+    scheduling_config = runtime.section('scheduling')
+    product_scheduler = ProductScheduler(
+        min_interval_minutes=scheduling_config.get('min_interval_minutes', 10),
+        max_interval_minutes=scheduling_config.get('max_interval_minutes', 360),
+        initial_interval_minutes=CHECK_INTERVAL_MINUTES,
+        target_new_reviews_per_crawl=scheduling_config.get('target_new_reviews_per_crawl', 5),
+        stale_after_hours=scheduling_config.get('stale_after_hours', 72),
+        jitter=scheduling_config.get('jitter', 0.1),
+        max_products_per_cycle=scheduling_config.get('max_products_per_cycle'),
+        initial_burst_minutes=scheduling_config.get('initial_burst_minutes'),
+    )
+    if previous is not None:
+        product_scheduler.states = previous.states
+    return product_scheduler
+
+def build_coordinator(worker_id=None):
+    """workers 섹션이 활성화된 경우 다른 워커 프로세스와 상품을 나누어 수집하기 위한 조율기를 생성함."""
+    workers_config = runtime.section('workers')
+    if not workers_config.get('enabled', False):
+        return None
+    return WorkerCoordinator(
+        state_dir=workers_config.get('state_dir', "data/workers"),
+        worker_id=worker_id or workers_config.get('worker_id'),
+        mode=workers_config.get('mode', "hash"),
+        lease_ttl_seconds=workers_config.get('lease_ttl_seconds', 900),
+        heartbeat_seconds=workers_config.get('heartbeat_seconds', 30),
+    )
+
+def run_due_products(product_scheduler, coordinator=None):
+    """
+    수집 예정 시각이 된 상품만 골라 1회 파이프라인을 실행하고, 결과를 스케줄러에 반영함.
+    워커 모드에서는 이 워커가 담당하는 상품 중 리스를 획득한 상품만 수집하고, 다음 수집 예정 시각과 함께 리스를 반납함.
+    """
+    products = runtime.products
+    candidates = products if coordinator is None else coordinator.assigned(products)
+    due = product_scheduler.due_products(candidates)
+    if coordinator is not None and due:
+        leased = set(coordinator.acquire([product['id'] for product in due]))
+        due = [product for product in due if product['id'] in leased]
+    if not due:
+        return
+
+    next_due_map = {}
+    try:
+        product_stats = job(due)
+        for product in due:
+            p_stats = product_stats.get(product['id']) or {'collected': 0, 'error': None}
+            next_due = product_scheduler.record_result(product['id'], p_stats['collected'], p_stats['error'])
+            next_due_map[product['id']] = next_due
+            logger.info(f"   🗓️ {product['name']}: 다음 수집 {next_due.strftime('%H:%M')} "
+                        f"(주기 {product_scheduler.states[product['id']]['interval'].total_seconds() / 60:.0f}분)")
+    finally:
+        if coordinator is not None:
+            coordinator.release(next_due_map, keys=[product['id'] for product in due])
+
+def seconds_until_next_due(product_scheduler, coordinator=None):
+    """
+    가장 먼저 수집 예정인 상품까지 대기할 시간(초)을 계산함.
+    설정 변경 감지/백로그 주기 확인/워커 멤버십 변화 반영을 위해 tick_seconds를 상한으로 둠.
+    lease 모드는 다른 워커가 기록한 공유 스케줄(리스)을 따르므로 tick_seconds마다 확인함.
+    """
+    tick_seconds = runtime.section('scheduling').get('tick_seconds', 30)
+    if coordinator is not None and coordinator.mode == "lease":
+        return tick_seconds
+    products = runtime.products if coordinator is None else coordinator.assigned(runtime.products)
+    now = datetime.now()
+    wakeup = product_scheduler.next_wakeup(now, [product['id'] for product in products])
+    return min(max((wakeup - now).total_seconds(), 1), tick_seconds)
+
+def run_backlog():
+    """
+    LLM 재시도 한도 초과 등으로 '분석 미완료(N)'로 남은 리뷰를 재분석하는 백로그 작업.
+    off_peak_hours로 지정한 한가한 시간대에만 실행하여 실시간 수집/분석과 API 쿼터를 다투지 않도록 함.
+    """
+    # FIRST_RUN_MODE(초기 구축)에서는 백로그 재분석 결과도 알림 없이 DB에만 반영함
+    notifier = None if FIRST_RUN_MODE else runtime.notifier
+    worker = build_backlog_worker(runtime.config, runtime.processor, runtime.storage, notifier)
+    if not worker.is_off_peak():
+        return
+
+    logger.info(f"\n🗂️ [스케줄러] 미분석 리뷰 백로그 처리 시작 ({time.strftime('%Y-%m-%d %H:%M:%S')})")
+    try:
+        stats = runtime.run(worker.run())
+    except Exception as e:
+        logger.error(f"   ❌ 백로그 처리 중 예외 발생: {e}")
+        return
+    finally:
+        runtime.storage.flush_index()
+    logger.info(f"   ✅ 백로그 처리 완료: 대상 {stats['scanned']}건 / 분석 {stats['analyzed']}건 / "
+                f"알림 {stats['notified']}건 / 오래되어 알림 생략 {stats['stale_skipped']}건 / "
+                f"초기 구축분 알림 생략 {stats['muted']}건 / 최근 수집분 보류 {stats['deferred']}건")
 
 if __name__ == "__main__":
-    print(f"🚀 [GLOW.M] 지능형 리뷰 자동화 모니터링 시스템 가동")
-    print(f"   - 타겟 상품: {len(PRODUCTS)}개 리스트 로드 완료")
-    print(f"   - 체크 주기: {CHECK_INTERVAL_MINUTES}분 간격")
-    
-    # 서버 재시작 시 데이터 공백을 막기 위해 즉시 1회 실행 후 스케줄 진입
-    job()
-    
-    schedule.every(CHECK_INTERVAL_MINUTES).minutes.do(job)
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(1)
-        except KeyboardInterrupt:
-            print("\n👋 시스템을 정상적으로 종료합니다.")
-            break
-        except Exception as e:
-            # 예상치 못한 시스템 런타임 에러 발생 시 자동 복구 로직
-            print(f"❌ 런타임 에러 발생: {e}. 1분 후 자동 재시도합니다.")
-            time.sleep(60)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="GLOW.M 리뷰 모니터링 스케줄러")
+    parser.add_argument('--worker-id', help="워커 모드에서 사용할 워커 식별자 (기본값: 호스트명-PID)")
+    args = parser.parse_args()
+
+    scheduling_config = runtime.section('scheduling')
+    logger.info(f"🚀 [GLOW.M] 지능형 리뷰 자동화 모니터링 시스템 가동")
+    logger.info(f"   - 타겟 상품: {len(runtime.products)}개 리스트 로드 완료")
+    logger.info(f"   - 체크 주기: 상품별 적응형 ({scheduling_config.get('min_interval_minutes', 10)}~"
+                f"{scheduling_config.get('max_interval_minutes', 360)}분, 이력 없는 상품은 {CHECK_INTERVAL_MINUTES}분)")
+
+    # 저장된 수집 시각으로 상품별 리뷰 유입 속도를 복원한 뒤, 재시작 직후 전 상품을 즉시 1회 수집함
+    product_scheduler = build_product_scheduler()
+    product_scheduler.bootstrap(runtime.storage, runtime.products)
+    last_backlog_run = None
+
+    # 워커 모드: 생존 신호/리스 갱신 스레드를 기동하고, 종료 시 보유 리스를 반납하여 다른 워커가 즉시 인수하도록 함
+    coordinator = build_coordinator(args.worker_id)
+    if coordinator is not None:
+        coordinator.start()
+        logger.info(f"   - 워커 모드: {coordinator.worker_id} ({coordinator.mode} 분배, "
+                    f"현재 {len(coordinator.live_workers())}개 워커 가동 중)")
+
+    try:
+        while True:
+            try:
+                # [Hot Reload] 설정 파일이 수정된 경우에만 다시 읽고, 바뀐 섹션에 의존하는 구성 요소만 재생성함
+                changed = runtime.reload_if_changed()
+                if 'scheduling' in changed:
+                    product_scheduler = build_product_scheduler(product_scheduler)
+                added = [p for p in runtime.products if p['id'] not in product_scheduler.states]
+                if 'products' in changed and added:
+                    # 새로 추가된 상품의 수집 이력을 저장소에서 복원함 (기존 상품의 상태는 유지됨)
+                    product_scheduler.bootstrap(runtime.storage, added)
+
+                run_due_products(product_scheduler, coordinator)
+                backlog_config = runtime.section('backlog')
+                backlog_interval_seconds = backlog_config.get('interval_minutes', 60) * 60
+                if backlog_config.get('enabled', True) and (
+                    last_backlog_run is None or time.monotonic() - last_backlog_run >= backlog_interval_seconds
+                ):
+                    last_backlog_run = time.monotonic()
+                    # 같은 미분석 리뷰를 여러 워커가 중복 분석하지 않도록 백로그는 한 워커만 실행함
+                    if coordinator is None:
+                        run_backlog()
+                    elif coordinator.acquire_singleton("backlog"):
+                        try:
+                            run_backlog()
+                        finally:
+                            coordinator.release_singleton("backlog", datetime.now() + timedelta(seconds=backlog_interval_seconds))
+                # 고정 주기 대신 다음 수집 예정 시각까지만 대기하여 상품별 적응형 주기를 지연 없이 지킴
+                time.sleep(seconds_until_next_due(product_scheduler, coordinator))
+            except KeyboardInterrupt:
+                logger.info("\n👋 시스템을 정상적으로 종료합니다.")
+                break
+            except Exception as e:
+                # 예상치 못한 시스템 런타임 에러 발생 시 자동 복구 로직
+                logger.error(f"❌ 런타임 에러 발생: {e}. 1분 후 자동 재시도합니다.")
+                time.sleep(60)
+    finally:
+        if coordinator is not None:
+            coordinator.stop()
+        # 남은 알림/다이제스트 전송과 인덱스 영속화를 마친 뒤 이벤트 루프를 정리함
+        runtime.close()
@@ -0,0 +1,224 @@
+import os
+import csv
+import json
+from datetime import date, datetime
+
+# 집계 차원: 상품 × 카테고리 × 감성 × 긴급도 × 수집일
+DIMENSIONS = ('product_id', 'category', 'sentiment', 'urgency', 'day')
+
+def _normalize_urgency(value):
+    """CSV에는 문자열, LLM 결과에는 정수로 들어오는 긴급도를 정수로 통일함 (판별 불가 시 0)."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def _normalize_day(value):
+    """date/datetime/'YYYY-MM-DD...' 문자열을 'YYYY-MM-DD' 문자열로 변환함 (문자열 비교로 기간 필터링)."""
+    if value is None: return None
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+class ReviewAggregates:
+    """
+    분석 완료(Y) 리뷰를 상품 × 카테고리 × 감성 × 긴급도 × 수집일 단위로 집계한 건수 테이블입니다.
+    저장소가 분석 결과를 반영할 때마다 증분 갱신되므로, 대시보드 질의(이번 주 상품별 부정 비율,
+    카테고리별 긴급 리뷰 추이 등)는 전체 리뷰가 아닌 그룹 수에 비례하는 비용(O(groups))으로 응답합니다.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.counts = {}        # (product_id, category, sentiment, urgency, day) -> 건수
+        self.signature = None   # 집계가 반영하고 있는 원본 저장소의 시그니처 (CSV: (mtime_ns, size))
+        self._dirty = False
+
+    @staticmethod
+    def group_key(product_id, date_collected, category, sentiment, urgency):
+        return (product_id, category or '', sentiment or '', _normalize_urgency(urgency), _normalize_day(date_collected) or '')
+
+    def add(self, product_id, date_collected, category, sentiment, urgency, delta=1):
+        key = self.group_key(product_id, date_collected, category, sentiment, urgency)
+        count = self.counts.get(key, 0) + delta
+        if count > 0:
+            self.counts[key] = count
+        else:
+            self.counts.pop(key, None)
+        self._dirty = True
+
+    def reset(self):
+        self.counts = {}
+        self.signature = None
+        self._dirty = True
+
+    def mark_synced(self, signature):
+        """원본 저장소의 현재 시그니처를 집계 기준점으로 갱신함 (집계에 영향 없는 쓰기 이후에도 호출)."""
+        self.signature = signature
+        self._dirty = True
+
+    # ------------------------------------------------------------------
+    # 영속화 (CSV 백엔드의 사이드카 파일)
+    # ------------------------------------------------------------------
+    def save(self):
+        """원본 시그니처와 함께 JSON 사이드카로 저장함. 임시 파일에 기록 후 원자적으로 교체함."""
+        if not self.path or not self._dirty: return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        payload = {
+            'signature': list(self.signature) if self.signature else None,
+            'groups': [list(key) + [count] for key, count in self.counts.items()],
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """사이드카 파일을 복원함. 파일이 없거나 손상된 경우 빈 집계(시그니처 없음)를 반환하여 재구축을 유도함."""
+        aggregates = cls(path)
+        try:
+            with open(path, mode='r', encoding='utf-8') as f:
+                payload = json.load(f)
+            aggregates.counts = {tuple(group[:-1]): group[-1] for group in payload['groups']}
+            aggregates.signature = tuple(payload['signature']) if payload.get('signature') else None
+        except (OSError, ValueError, KeyError, TypeError):
+            aggregates.counts = {}
+            aggregates.signature = None
+        return aggregates
+
+    # ------------------------------------------------------------------
+    # 질의 API
+    # ------------------------------------------------------------------
+    def _matches(self, key, since, until, min_urgency, filters):
+        record = dict(zip(DIMENSIONS, key))
+        if since and record['day'] < since: return False
+        if until and record['day'] > until: return False
+        if min_urgency is not None and record['urgency'] < min_urgency: return False
+        for dimension, expected in filters.items():
+            if isinstance(expected, (list, tuple, set, frozenset)):
+                if record[dimension] not in expected: return False
+            elif record[dimension] != expected:
+                return False
+        return True
+
+    def query(self, group_by=('product_id',), since=None, until=None, min_urgency=None, **filters):
+        """
+        조건에 맞는 그룹의 건수를 group_by 차원으로 합산하여 [{차원: 값, ..., 'count': n}, ...] 형태로 반환함.
+        since/until: 수집일 범위(양 끝 포함, date 또는 'YYYY-MM-DD'), min_urgency: 긴급도 하한
+        filters: product_id/category/sentiment/urgency/day 차원별 값 또는 값 목록
+          예) query(group_by=('category', 'day'), min_urgency=4)  → 카테고리별 긴급 리뷰 일별 추이
+        """
+        unknown = set(group_by) - set(DIMENSIONS) | set(filters) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"지원하지 않는 집계 차원입니다: {', '.join(sorted(unknown))} (허용값: {', '.join(DIMENSIONS)})")
+        since, until = _normalize_day(since), _normalize_day(until)
+        indices = [DIMENSIONS.index(dimension) for dimension in group_by]
+
+        totals = {}
+        for key, count in self.counts.items():
+            if not self._matches(key, since, until, min_urgency, filters): continue
+            group = tuple(key[i] for i in indices)
+            totals[group] = totals.get(group, 0) + count
+        return [{**dict(zip(group_by, group)), 'count': count} for group, count in sorted(totals.items())]
+
+    def share(self, dimension, value, group_by=('product_id',), since=None, until=None, min_urgency=None, **filters):
+        """
+        그룹별 전체 건수 대비 dimension == value인 건수의 비율을 반환함.
+          예) share('sentiment', '부정', since=이번 주 월요일)  → 이번 주 상품별 부정 리뷰 비율
+        """
+        totals = self.query(group_by, since, until, min_urgency, **filters)
+        matched = self.query(group_by, since, until, min_urgency, **{**filters, dimension: value})
+        matched_counts = {tuple(row[d] for d in group_by): row['count'] for row in matched}
+        results = []
+        for row in totals:
+            hits = matched_counts.get(tuple(row[d] for d in group_by), 0)
+            results.append({**row, 'matched': hits, 'share': round(hits / row['count'], 4) if row['count'] else 0.0})
+        return results
+
+    # ------------------------------------------------------------------
+    # 내보내기
+    # ------------------------------------------------------------------
+    def export(self, path):
+        """
+        집계 테이블을 확장자에 따라 Parquet(.parquet), Arrow IPC(.arrow/.feather) 또는 CSV(.csv)로 내보냄.
+        Parquet/Arrow는 선택 의존성인 pyarrow가 필요하며, 문자열 차원은 사전 인코딩(Dictionary Encoding)하여 용량을 줄임.
+        내보낸 그룹 수를 반환함.
+        """
+        rows = sorted(self.counts.items())
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension == ".csv":
+            # 엑셀에서 바로 열 수 있도록 기존 DB와 동일한 utf-8-sig 인코딩을 사용함
+            with open(path, mode='w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(list(DIMENSIONS) + ['count'])
+                for key, count in rows:
+                    writer.writerow(list(key) + [count])
+            return len(rows)
+
+        if extension not in (".parquet", ".arrow", ".feather"):
+            raise ValueError(f"지원하지 않는 내보내기 형식입니다: {extension} (.parquet, .arrow, .feather, .csv)")
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                f"{extension} 내보내기에는 선택 패키지 pyarrow가 필요합니다. "
+                f"pip install pyarrow 후 다시 실행하거나, 추가 설치가 필요 없는 .csv 경로로 내보내세요."
+            ) from e
+
+        def parse_day(day):
+            try:
+                return date.fromisoformat(day)
+            except ValueError:
+                return None
+
+        columns = list(zip(*[key for key, _ in rows])) if rows else [()] * len(DIMENSIONS)
+        table = pa.table({
+            'product_id': pa.array(columns[0], type=pa.string()).dictionary_encode(),
+            'category': pa.array(columns[1], type=pa.string()).dictionary_encode(),
+            'sentiment': pa.array(columns[2], type=pa.string()).dictionary_encode(),
+            'urgency': pa.array(columns[3], type=pa.int8()),
+            'day': pa.array([parse_day(day) for day in columns[4]], type=pa.date32()),
+            'count': pa.array([count for _, count in rows], type=pa.int64()),
+        })
+        tmp_path = f"{path}.tmp"
+        if extension == ".parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp_path, compression="zstd")
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+        return len(rows)
+
+if __name__ == "__main__":
+    # 대시보드/엑셀용 집계 파일 내보내기 및 간단한 조회 CLI
+    # 사용법: python -m src.aggregates export [data/review_aggregates.csv | *.parquet | *.arrow]
+    #         python -m src.aggregates query product_id,sentiment [since(YYYY-MM-DD)]
+    import sys
+    import yaml
+    from src.storage import create_storage
+    from src.log import get_logger
+
+    logger = get_logger("aggregates")
+
+    with open("config/settings.yaml", "r", encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+    storage = create_storage(config)
+    aggregates = storage.get_aggregates()
+    if command == "query":
+        group_by = tuple(sys.argv[2].split(",")) if len(sys.argv) > 2 else ('product_id',)
+        since = sys.argv[3] if len(sys.argv) > 3 else None
+        for row in aggregates.query(group_by, since=since):
+            print(json.dumps(row, ensure_ascii=False))
+    else:
+        # 기본 형식은 추가 설치 없이 동작하는 CSV (Parquet/Arrow는 확장자로 지정하며 pyarrow 필요)
+        path = sys.argv[2] if len(sys.argv) > 2 else "data/review_aggregates.csv"
+        try:
+            exported = aggregates.export(path)
+        except (ImportError, ValueError) as e:
+            logger.error(f"❌ 집계 내보내기 실패: {e}")
+            sys.exit(1)
+        logger.info(f"✅ 집계 내보내기 완료: {exported}개 그룹 → {path}")
@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+class AnalysisCache:
+    """
+    LLM 분석 결과를 리뷰 본문 기준으로 재사용하기 위한 디스크 기반 콘텐츠 주소 캐시(Content-Addressed Cache)입니다.
+    키는 '정규화된 본문 + 모델명 + 프롬프트 버전'의 해시이므로, 상품 ID나 페이지 컨텍스트가 달라도
+    동일한 본문이라면 재분석 없이 결과를 재사용하며, 모델/프롬프트 변경 시에는 자동으로 무효화됩니다.
+    """
+    def __init__(self, filepath="data/llm_cache.db", max_entries=200000, max_age_days=90, evict_every=100):
+        self.filepath = filepath
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        # 매 저장마다 COUNT(*)를 실행하지 않도록, 추적 중인 건수가 한도를 넘거나 evict_every회 저장할 때만 정리함
+        self.evict_every = max(1, evict_every)
+        self._puts_since_evict = 0
+        self._count = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON analysis_cache(accessed_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_created_at ON analysis_cache(created_at)")
+        self.evict()
+
+    @staticmethod
+    def normalize(text):
+        """유니코드 정규화(NFKC)와 공백 축약으로 표기만 다른 동일 본문을 같은 키로 매핑함."""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+    def make_key(self, text, model_name, prompt_version):
+        source = f"{model_name}\x00{prompt_version}\x00{self.normalize(text)}"
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """여러 키를 한 번의 쿼리로 조회하여 {key: result} 딕셔너리로 반환하고 적중/미스 횟수를 집계함."""
+        keys = list(dict.fromkeys(keys))
+        if not keys: return {}
+        found = {}
+        now = time.time()
+        with self.lock, self.conn:
+            # SQLite의 바인딩 변수 개수 제한을 피하기 위해 나누어 조회함
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT key, result, created_at FROM analysis_cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, result, created_at in rows:
+                    if self.max_age_seconds and now - created_at > self.max_age_seconds:
+                        continue
+                    found[key] = json.loads(result)
+                # LRU 방식 용량 제한을 위해 적중한 항목의 마지막 접근 시각을 갱신함
+                self.conn.executemany(
+                    "UPDATE analysis_cache SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in chunk if key in found]
+                )
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """
+        {key: result} 딕셔너리를 단일 트랜잭션으로 저장함.
+        추적 건수는 갱신(UPSERT)도 신규로 세는 상한값이므로, 한도를 넘었다고 판단되면 정리 시점에 실제 건수로 보정함.
+        """
+        if not entries: return
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO analysis_cache (key, result, created_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET result = excluded.result, "
+                "created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+                [(key, json.dumps(result, ensure_ascii=False), now, now) for key, result in entries.items()]
+            )
+            self._count += len(entries)
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= self.evict_every or (self.max_entries and self._count > self.max_entries)
+        if due:
+            self.evict()
+
+    async def get_many_async(self, keys):
+        """get_many를 워커 스레드에서 실행하여 SQLite 조회가 이벤트 루프를 막지 않도록 함."""
+        return await asyncio.to_thread(self.get_many, list(keys))
+
+    async def put_many_async(self, entries):
+        """put_many(및 필요 시 정리)를 워커 스레드에서 실행함."""
+        await asyncio.to_thread(self.put_many, entries)
+
+    def evict(self):
+        """보존 기간이 지난 항목을 삭제하고, 최대 건수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제함."""
+        with self.lock, self.conn:
+            if self.max_age_seconds:
+                self.conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+            count = self.conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            if self.max_entries and count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM analysis_cache WHERE key IN "
+                    "(SELECT key FROM analysis_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+                count = self.max_entries
+            self._count = count
+            self._puts_since_evict = 0
+
+    def close(self):
+        """SQLite 연결을 닫음 (설정 다시 읽기로 프로세서가 교체될 때 호출됨)."""
+        with self.lock:
+            self.conn.close()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
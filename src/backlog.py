@@ -0,0 +1,201 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from src.metrics import metrics
+from src.log import get_logger
+
+logger = get_logger("backlog")
+
+# 오래된(Stale) 미분석 리뷰의 알림 정책
+STALE_POLICIES = ("skip", "urgent_only", "notify")
+
+class BacklogWorker:
+    """
+    LLM 재시도 한도 초과 등으로 '분석 미완료(N)' 상태에 머문 리뷰를 일괄 재분석하는 백로그 워커입니다.
+    크롤러는 이미 저장된 리뷰를 '수집 완료'로 간주하고 멈추므로, 이 워커가 없으면 해당 리뷰는 영구히 분석/알림되지 않습니다.
+    저장소를 청크 단위로 스트리밍하여 DB 크기와 무관하게 메모리 사용량을 일정하게 유지합니다.
+    """
+    def __init__(self, processor, storage, notifier=None, products=None, chunk_size=500,
+                 stale_after_hours=24, stale_policy="urgent_only", stale_min_urgency=4,
+                 off_peak_hours=None, max_reviews_per_run=None, min_age_minutes=30, backfill_window_minutes=10):
+        self.processor = processor
+        self.storage = storage
+        self.notifier = notifier
+        # 알림 메시지에 상품명을 표시하기 위한 product_id → 상품 정보 매핑
+        self.products = {p['id']: p for p in (products or [])}
+        self.chunk_size = chunk_size
+        # 수집 후 stale_after_hours가 지난 리뷰는 뒤늦은 알림이 CS팀에 혼선을 줄 수 있으므로 정책에 따라 처리함
+        # - skip: 분석 결과만 저장하고 알림 생략 / urgent_only: 긴급도 stale_min_urgency 이상만 알림 / notify: 모두 알림
+        if stale_policy not in STALE_POLICIES:
+            raise ValueError(f"지원하지 않는 stale_policy입니다: {stale_policy} (허용값: {', '.join(STALE_POLICIES)})")
+        self.stale_after = timedelta(hours=stale_after_hours)
+        self.stale_policy = stale_policy
+        self.stale_min_urgency = stale_min_urgency
+        # [시작 시각, 종료 시각) 형태의 한가한 시간대 (예: [1, 7] → 01시~07시), None이면 항상 실행 가능
+        self.off_peak_hours = off_peak_hours
+        # 1회 실행에서 처리할 최대 리뷰 수 (LLM 비용/쿼터 보호용), None이면 제한 없음
+        self.max_reviews_per_run = max_reviews_per_run
+        # 수집 후 min_age_minutes가 지나지 않은 리뷰는 건너뜀 — 파이프라인(다른 워커 포함)이 저장 직후 분석 중인 리뷰를
+        # 백로그가 가로채 같은 리뷰를 중복 분석·중복 알림하지 않도록 하기 위한 유예 시간
+        self.min_age = timedelta(minutes=min_age_minutes)
+        # 상품의 최초 수집 시각부터 backfill_window_minutes 이내에 저장된 리뷰는 알림이 차단된 초기 구축(Smart Mute)분으로 간주하여,
+        # 재분석 결과만 반영하고 알림은 보내지 않음 (신규 상품의 과거 리뷰가 백로그를 통해 CS팀에 알림되는 것을 방지)
+        self.backfill_window = timedelta(minutes=backfill_window_minutes)
+        self._first_collected = {}
+
+        self.stats = {'scanned': 0, 'analyzed': 0, 'notified': 0, 'stale_skipped': 0, 'muted': 0, 'deferred': 0}
+
+    def is_off_peak(self, now=None):
+        """현재 시각이 백로그 처리 허용 시간대인지 판별함 (자정을 넘기는 구간도 지원)."""
+        if not self.off_peak_hours:
+            return True
+        start, end = self.off_peak_hours
+        hour = (now or datetime.now()).hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    @staticmethod
+    def _collected_at(date_collected):
+        try:
+            return datetime.strptime(date_collected, "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            return None
+
+    def _is_stale(self, date_collected, now):
+        collected_at = self._collected_at(date_collected)
+        # 수집 시각을 알 수 없는 레거시 데이터는 오래된 항목으로 간주함
+        return collected_at is None or now - collected_at > self.stale_after
+
+    def _is_recent(self, review, now):
+        collected_at = self._collected_at(review['date_collected'])
+        return collected_at is not None and now - collected_at < self.min_age
+
+    def _is_backfill(self, review):
+        """알림이 차단된 상태로 수집된 신규 상품의 초기 구축분인지 판별함."""
+        first_collected = self._first_collected.get(review['product_id'])
+        collected_at = self._collected_at(review['date_collected'])
+        if first_collected is None or collected_at is None:
+            return False
+        return collected_at <= first_collected + self.backfill_window
+
+    def _should_notify(self, review, result, now):
+        if not self.notifier:
+            return False
+        if self._is_backfill(review):
+            return False
+        if not self._is_stale(review['date_collected'], now) or self.stale_policy == "notify":
+            return True
+        if self.stale_policy == "urgent_only":
+            try:
+                return int(result.get('urgency', 1)) >= self.stale_min_urgency
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def _process_chunk(self, chunk, now):
+        review_map = {review['id']: review for review in chunk}
+        batch_input = [{'id': review['id'], 'text': review['content']} for review in chunk]
+        # 토큰 예산 기반 대형 배치 + 캐시 + Rate Limiter가 내장된 프로세서로 청크 전체를 한 번에 분석함
+        analysis_results = await self.processor.analyze_reviews_async(batch_input)
+
+        valid_results = {}
+        for result in analysis_results or []:
+            if not isinstance(result, dict): continue
+            review = review_map.get(result.get('id'))
+            if not review: continue
+            product = self.products.get(review['product_id'], {})
+            result['product_name'] = product.get('name', review['product_id'])
+            result['raw_text'] = review['content']
+            valid_results[review['id']] = result
+
+        # 청크 단위로 한 번에 반영하여 CSV 재작성/SQLite 트랜잭션 횟수를 최소화함
+        # (재작성/잠금 대기가 이벤트 루프를 막지 않도록 스레드에서 실행함)
+        self.stats['analyzed'] += await asyncio.to_thread(self.storage.update_analysis_results, valid_results)
+
+        for review_id, result in valid_results.items():
+            if self._should_notify(review_map[review_id], result, now):
+                self.notifier.enqueue(result)
+                self.stats['notified'] += 1
+            elif self.notifier and self._is_backfill(review_map[review_id]):
+                self.stats['muted'] += 1
+            else:
+                self.stats['stale_skipped'] += 1
+
+    async def run(self, now=None):
+        """미분석 리뷰를 청크 단위로 스트리밍하며 분석/반영/알림을 수행하고 처리 통계를 반환함."""
+        now = now or datetime.now()
+        self.stats = {'scanned': 0, 'analyzed': 0, 'notified': 0, 'stale_skipped': 0, 'muted': 0, 'deferred': 0}
+        if self.notifier:
+            activity = await asyncio.to_thread(self.storage.get_product_activity, now)
+            self._first_collected = {product_id: stats.get('first_collected') for product_id, stats in activity.items()}
+        chunks = self.storage.iter_unanalyzed(self.chunk_size)
+        # 청크 조회(CSV 파싱/SQLite 쿼리)도 스레드에서 실행하여 수집/알림 중인 이벤트 루프를 막지 않음
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            fresh = [review for review in chunk if not self._is_recent(review, now)]
+            self.stats['deferred'] += len(chunk) - len(fresh)
+            chunk = fresh
+            if not chunk:
+                continue
+            if self.max_reviews_per_run is not None:
+                chunk = chunk[: self.max_reviews_per_run - self.stats['scanned']]
+            if not chunk:
+                break
+            self.stats['scanned'] += len(chunk)
+            logger.info(f"   🗂️ [Backlog] 미분석 리뷰 {len(chunk)}건 재분석 중 (누적 {self.stats['scanned']}건)...",
+                        extra={'stage': "backlog", 'reviews': len(chunk)})
+            metrics.inc("backlog_reviews_total", len(chunk))
+            await self._process_chunk(chunk, now)
+        return self.stats
+
+def build_backlog_worker(config, processor, storage, notifier=None):
+    """settings.yaml의 backlog 섹션으로 BacklogWorker를 생성함 (스케줄러와 단독 실행 진입점이 공용으로 사용)."""
+    config = config or {}
+    backlog_config = config.get('backlog', {}) or {}
+    scheduling_config = config.get('scheduling', {}) or {}
+    workers_config = config.get('workers', {}) or {}
+    # 워커 모드에서는 다른 워커가 리스를 쥔 채 분석 중일 수 있는 리뷰를 건드리지 않도록 리스 만료 시간 이상 유예함
+    default_min_age = 30
+    if workers_config.get('enabled', False):
+        default_min_age = max(default_min_age, workers_config.get('lease_ttl_seconds', 900) / 60)
+    return BacklogWorker(
+        processor, storage, notifier,
+        products=config.get('products', []),
+        chunk_size=backlog_config.get('chunk_size', 500),
+        stale_after_hours=backlog_config.get('stale_after_hours', 24),
+        stale_policy=backlog_config.get('stale_policy', 'urgent_only'),
+        stale_min_urgency=backlog_config.get('stale_min_urgency', 4),
+        off_peak_hours=backlog_config.get('off_peak_hours'),
+        max_reviews_per_run=backlog_config.get('max_reviews_per_run'),
+        min_age_minutes=backlog_config.get('min_age_minutes', default_min_age),
+        # 다음 수집은 최소 주기(지터 포함)보다 빨리 실행되지 않으므로, 그 이전에 저장된 리뷰는 모두 초기 구축 수집분임
+        backfill_window_minutes=backlog_config.get(
+            'backfill_window_minutes',
+            scheduling_config.get('min_interval_minutes', 10) * (1 - scheduling_config.get('jitter', 0.1))
+        ),
+    )
+
+if __name__ == "__main__":
+    # 스케줄러와 별도로 백로그만 수동 처리하기 위한 단독 실행 진입점
+    # 사용법: python -m src.backlog [--no-notify]
+    # (GenAI SDK는 실제 분석할 미분석 리뷰가 있을 때만 로딩되므로, 처리 대상이 없으면 즉시 종료됨)
+    import sys
+    # 스케줄러와 같은 운영 설정(FIRST_RUN_MODE)과 실행 환경을 사용함 (scheduler 모듈은 임포트만으로는 스케줄 루프를 실행하지 않음)
+    from scheduler import FIRST_RUN_MODE, runtime
+
+    # FIRST_RUN_MODE(초기 구축) 또는 --no-notify 지정 시 재분석 결과를 알림 없이 DB에만 반영함
+    notifier = None if FIRST_RUN_MODE or "--no-notify" in sys.argv[1:] else runtime.notifier
+    # 수동 실행은 한가한 시간대(off_peak_hours) 제한 없이 즉시 처리함
+    worker = build_backlog_worker(runtime.config, runtime.processor, runtime.storage, notifier)
+    try:
+        stats = runtime.run(worker.run())
+    finally:
+        # 남은 알림 전송과 인덱스 영속화를 마친 뒤 종료함
+        runtime.close()
+    logger.info(f"✅ 백로그 처리 완료: 대상 {stats['scanned']}건 / 분석 {stats['analyzed']}건 / "
+                f"알림 {stats['notified']}건 / 오래되어 알림 생략 {stats['stale_skipped']}건 / "
+                f"초기 구축분 알림 생략 {stats['muted']}건 / 최근 수집분 보류 {stats['deferred']}건",
+                extra={'stage': "backlog", **stats})
@@ -0,0 +1,151 @@
+import time
+import asyncio
+from datetime import datetime, timedelta
+
+from src import review_api
+from src.metrics import metrics
+from src.log import get_logger
+
+logger = get_logger("probe")
+
+# 프로브 결과: 변경 없음(전체 수집 생략) / 변경 있음 / 판별 불가(지문 없음, 요청 실패 등 — 안전하게 전체 수집)
+UNCHANGED, CHANGED, UNKNOWN = "unchanged", "changed", "unknown"
+
+# 브라우저가 리뷰 API를 호출할 때 보낸 요청 헤더 중 프로브가 재사용하는 항목
+# (일반 UA/쿠키 없이 요청하면 봇 차단·동의 페이지가 304나 같은 ETag를 돌려줘 '변경 없음'으로 오판될 수 있음)
+# 지문과 함께 디스크에 저장하는 헤더는 민감하지 않은 항목으로 한정하고, 세션 자격 증명인 쿠키는 프로세스 메모리에만 보관함
+BROWSER_HEADER_KEYS = ('user-agent', 'accept-language', 'referer')
+SESSION_HEADER_KEYS = ('cookie',)
+
+def _pick_headers(request_headers, keys):
+    request_headers = {key.lower(): value for key, value in (request_headers or {}).items()}
+    return {key: request_headers[key] for key in keys if request_headers.get(key)}
+
+def build_fingerprint(api_url, path, raw_records, etag=None, last_modified=None, request_headers=None):
+    """
+    수집 중 포착한 첫 페이지 API 응답(및 브라우저의 요청 헤더)으로 다음 사이클의 프로브에 사용할 지문을 구성함.
+    지문은 저장소(JSON 사이드카/SQLite)에 영속화되므로 쿠키는 포함하지 않음 (ChangeProbe.remember_session 참고).
+    """
+    return {
+        'api_url': api_url,
+        'path': list(path),
+        'head_hash': review_api.page_fingerprint(raw_records),
+        'etag': etag,
+        'last_modified': last_modified,
+        'headers': _pick_headers(request_headers, BROWSER_HEADER_KEYS),
+        'verified_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+class ChangeProbe:
+    """
+    전체 수집 전에 리뷰 API 첫 페이지만 가볍게 요청하여 '변경 없음'을 판별하는 프로브입니다.
+    브라우저를 띄우지 않고 HTTP 요청 1회(가능하면 ETag 조건부 요청으로 304 응답)로 끝나므로,
+    신규 리뷰가 없는 사이클은 상품당 수십 ms 수준으로 종료됩니다.
+    지문이 없거나, 요청이 실패하거나, 마지막 전체 수집 후 full_crawl_every_hours가 지나면 전체 수집으로 진행함.
+    요청에는 크롤러의 브라우저가 보낸 User-Agent/쿠키(쿠키는 메모리에만 보관)를 재사용하며, '변경 없음'이 max_consecutive_unchanged회 이어지면
+    응답을 신뢰하지 않고 전체 수집으로 검증함.
+    """
+    def __init__(self, timeout_seconds=5, full_crawl_every_hours=24, max_concurrency=8, session=None, headers=None,
+                 max_consecutive_unchanged=12):
+        self.timeout_seconds = timeout_seconds
+        # 정렬 기준 변경 등으로 첫 페이지 지문이 신규 리뷰를 반영하지 못하는 경우를 대비한 주기적 전체 수집
+        self.full_crawl_every = timedelta(hours=full_crawl_every_hours) if full_crawl_every_hours else None
+        self.max_concurrency = max_concurrency
+        self._session = session
+        self.headers = headers or {'User-Agent': "Mozilla/5.0", 'Accept': "application/json"}
+        # 상품별 연속 '변경 없음' 횟수 — 차단 페이지의 304가 반복되어 상품이 계속 건너뛰어지는 상황을 방지함
+        self.max_consecutive_unchanged = max_consecutive_unchanged
+        self._unchanged_streak = {}
+        # 상품별 브라우저 세션 헤더(쿠키) — 디스크에 남기지 않고 이 인스턴스가 살아 있는 동안만 재사용함
+        self._session_headers = {}
+
+    @property
+    def session(self):
+        """HTTP 세션을 최초 프로브 시 생성함 (프로브를 쓰지 않는 실행/CLI는 requests를 불러오지 않음)."""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def remember_session(self, product_id, request_headers):
+        """전체 수집 중 브라우저가 보낸 요청 헤더에서 쿠키만 메모리에 보관하여 다음 프로브에 사용함."""
+        session_headers = _pick_headers(request_headers, SESSION_HEADER_KEYS)
+        if session_headers:
+            self._session_headers[product_id] = session_headers
+        else:
+            self._session_headers.pop(product_id, None)
+
+    def _request(self, fingerprint, session_headers=None):
+        headers = dict(self.headers)
+        # 지문에 기록된 브라우저 헤더(User-Agent 등)와 메모리의 쿠키로 기본 헤더를 덮어써 수집 시와 같은 클라이언트로 요청함
+        # (이전 버전이 지문에 저장한 쿠키는 사용하지 않음 — 다음 전체 수집에서 지문이 갱신되며 제거됨)
+        browser_headers = _pick_headers(fingerprint.get('headers'), BROWSER_HEADER_KEYS)
+        for key, value in {**browser_headers, **(session_headers or {})}.items():
+            for existing in [k for k in headers if k.lower() == key]:
+                del headers[existing]
+            headers[key] = value
+        if fingerprint.get('etag'):
+            headers['If-None-Match'] = fingerprint['etag']
+        if fingerprint.get('last_modified'):
+            headers['If-Modified-Since'] = fingerprint['last_modified']
+        return self.session.get(fingerprint['api_url'], headers=headers, timeout=self.timeout_seconds)
+
+    def _is_expired(self, fingerprint, now):
+        if not self.full_crawl_every: return False
+        try:
+            verified_at = datetime.strptime(fingerprint.get('verified_at', ''), "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return True
+        return now - verified_at > self.full_crawl_every
+
+    async def probe(self, product_id, fingerprint, now=None):
+        """상품 1건의 변경 여부를 UNCHANGED / CHANGED / UNKNOWN 중 하나로 반환함."""
+        if not fingerprint or not fingerprint.get('api_url'):
+            return UNKNOWN
+        if self._is_expired(fingerprint, now or datetime.now()):
+            return UNKNOWN
+
+        started = time.perf_counter()
+        try:
+            # requests는 동기 라이브러리이므로 이벤트 루프를 막지 않도록 스레드에서 실행함
+            response = await asyncio.to_thread(self._request, fingerprint, self._session_headers.get(product_id))
+            if response.status_code == 304:
+                status = UNCHANGED
+            elif response.ok:
+                raw_records = review_api.get_by_path(response.json(), tuple(fingerprint.get('path') or ()))
+                # 응답 구조가 바뀌어 리뷰 목록을 찾지 못하면 판별하지 않고 전체 수집으로 넘김
+                if not raw_records:
+                    status = UNKNOWN
+                else:
+                    status = UNCHANGED if review_api.page_fingerprint(raw_records) == fingerprint.get('head_hash') else CHANGED
+            else:
+                status = UNKNOWN
+        # requests.RequestException은 OSError의 하위 클래스이므로 requests를 불러오지 않고도 포착됨
+        except (OSError, ValueError) as e:
+            logger.info(f"   ⚠️ [{product_id}] 변경 감지 프로브 실패 ({e}). 전체 수집으로 진행합니다.", extra={'product_id': product_id})
+            status = UNKNOWN
+
+        if status == UNCHANGED:
+            streak = self._unchanged_streak.get(product_id, 0) + 1
+            if self.max_consecutive_unchanged and streak > self.max_consecutive_unchanged:
+                logger.info(f"   🔎 [{product_id}] 변경 없음이 {streak - 1}회 연속되어 전체 수집으로 검증합니다.",
+                            extra={'product_id': product_id})
+                status, streak = UNKNOWN, 0
+            self._unchanged_streak[product_id] = streak
+        else:
+            self._unchanged_streak.pop(product_id, None)
+
+        metrics.observe("crawl_probe_seconds", time.perf_counter() - started, product=product_id)
+        metrics.inc("crawl_probe_total", outcome=status)
+        return status
+
+    async def probe_many(self, products, storage, now=None):
+        """여러 상품을 동시에 프로브하여 {product_id: 상태}를 반환함 (저장소에 보관된 지문을 사용)."""
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(product):
+            async with slots:
+                return await self.probe(product['id'], storage.get_fingerprint(product['id']), now)
+
+        statuses = await asyncio.gather(*(run(p) for p in products))
+        return {p['id']: status for p, status in zip(products, statuses)}
@@ -1,157 +1,535 @@
+import re
+import time
 import asyncio
-from playwright.async_api import async_playwright
+import hashlib
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+from src import review_api
+from src.change_probe import UNCHANGED, build_fingerprint
+from src.request_filter import RequestFilter
+from src.review_filter import ReviewFilter
+from src.metrics import metrics
+from src.log import get_logger
+
+logger = get_logger("crawler")
+
+# 고정 대기(sleep) 대신 이벤트 기반 대기를 사용하되, 무한 대기를 방지하기 위한 상한(ms)을 설정함
+DEFAULT_TIMEOUTS = {
+    'page_load': 15000,     # 최초 접속 후 DOM 준비까지의 상한
+    'scroll_render': 1500,  # 스크롤 1회당 리뷰 위젯 렌더링을 기다리는 상한
+    'page_turn': 10000,     # 다음 페이지 클릭 후 리뷰 목록이 교체되기까지의 상한
+    'stuck_grace': 3000,    # 목록 미갱신(Stuck) 시 네트워크 유휴 상태를 추가로 기다리는 상한
+    'api_capture': 8000,    # network 모드에서 리뷰 API 응답이 관측되기를 기다리는 상한
+}
+
+# 리뷰 수집에 불필요한 브라우저 기능을 비활성화하여 컨텍스트당 메모리/CPU 점유를 줄이는 경량 프로필
+LIGHTWEIGHT_BROWSER_ARGS = [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-dev-shm-usage",
+    "--mute-audio",
+    "--no-first-run",
+]
+
+# 리뷰 위젯이 호출하는 API를 식별하기 위한 기본 URL 패턴
+DEFAULT_API_URL_PATTERN = r"review"
+
+# 현재 렌더링된 리뷰 목록 전체의 텍스트 스냅샷 (페이지 전환 완료 여부 판별용)
+_SNAPSHOT_JS = "(sel) => Array.from(document.querySelectorAll(sel)).map(e => e.innerText.trim()).join('\\n')"
+# 리뷰 목록이 존재하고, 클릭 전 스냅샷과 달라졌을 때 true를 반환하는 브라우저 측 대기 조건
+_CHANGED_JS = """([sel, before]) => {
+    const els = document.querySelectorAll(sel);
+    if (!els.length) return false;
+    return Array.from(els).map(e => e.innerText.trim()).join('\\n') !== before;
+}"""
+
+# 페이지 내 모든 리뷰의 본문/컨텍스트/메타데이터를 단 1회의 CDP 왕복으로 추출하는 스크립트
+# (요소마다 inner_text()/evaluate()를 호출하던 O(2n) IPC를 O(1)로 축소)
+_EXTRACT_JS = """(els) => els.map(el => {
+    const box = (el.parentElement && el.parentElement.parentElement) || el;
+    const pick = (selector) => {
+        const node = box.querySelector(selector);
+        return node ? (node.getAttribute('aria-label') || node.innerText || '').trim() : '';
+    };
+    const context = box.innerText || '';
+    const idNode = el.closest('[data-review-id], [data-review-no], [data-id]');
+    const date = context.match(/\\d{2,4}[.\\-\\/]\\s?\\d{1,2}[.\\-\\/]\\s?\\d{1,2}/);
+    return {
+        text: (el.innerText || '').trim(),
+        context: box === el ? (el.innerText || '').trim() : context,
+        date: date ? date[0] : '',
+        rating: pick('[class*="rating"], [class*="star"], [aria-label*="별점"]'),
+        author: pick('[class*="author"], [class*="nickname"], [class*="user-name"], [class*="writer"]'),
+        review_id: idNode ? (idNode.dataset.reviewId || idNode.dataset.reviewNo || idNode.dataset.id || '') : '',
+    };
+})"""
 
 class GlowmCrawler:
     """
     이커머스 플랫폼의 리뷰 데이터를 수집하는 최적화된 크롤링 엔진입니다.
     네트워크 지연, 동적 로딩, 데이터 중복 및 안티 크롤링 우회를 고려하여 설계되었습니다.
+    하나의 장기 실행 브라우저 위에서 여러 상품을 동시에 수집할 수 있습니다.
     """
-    def __init__(self):
-        # AI 분석의 품질을 높이기 위해 노이즈(광고, 짧은 글)를 제거하는 필터링 상수를 정의함
+    def __init__(self, max_concurrency=4, per_host_concurrency=2, timeouts=None,
+                 mode="dom", api_url_pattern=DEFAULT_API_URL_PATTERN, request_filter=None, review_filter=None,
+                 change_probe=None):
         self.text_selector = "p.alp-body15" 
-        self.min_length = 5
-        self.blacklist_keywords = ["의료기기", "개인차", "제공받아"]
+        # AI 분석의 품질을 높이기 위해 노이즈(광고, 짧은 글)를 제거하는 사전 필터 (금칙어는 settings.yaml에서 관리)
+        self.review_filter = review_filter if review_filter is not None else ReviewFilter()
+
+        # 동시 수집 한도: 전체 브라우저 컨텍스트 수와 동일 호스트에 대한 동시 접속 수를 각각 제한함
+        # (호스트별 제한은 대상 쇼핑몰의 Rate Limit/봇 차단을 유발하지 않기 위함)
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self._playwright = None
+        self.browser = None
+        self._context_slots = None
+        self._host_slots = {}
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+
+        # 수집 모드: "dom"(렌더링된 화면 스크래핑) 또는 "network"(위젯의 리뷰 API 응답을 직접 수집)
+        # network 모드는 API 응답이 관측되지 않으면 자동으로 dom 모드로 폴백함
+        self.mode = mode
+        self.api_url_pattern = re.compile(api_url_pattern)
+
+        # 이미지/폰트/광고 스크립트 등 리뷰와 무관한 요청을 차단하는 라우팅 레이어 (모든 컨텍스트가 통계를 공유함)
+        self.request_filter = request_filter if request_filter is not None else RequestFilter()
+
+        # 전체 수집 전에 리뷰 API 첫 페이지만 요청하여 '변경 없음'을 판별하는 프로브 (None이면 항상 전체 수집)
+        # 전체 수집 중 포착한 첫 페이지 API 응답으로 상품별 지문을 갱신하며, 수집 성공 시에만 저장소에 반영함
+        self.change_probe = change_probe
+        self.fingerprints = {}
+
+    async def start(self):
+        """여러 상품이 공유할 브라우저를 1회만 기동함 (상품마다 Chromium을 재시작하는 비용 제거)."""
+        if self.browser: return
+        self._playwright = await async_playwright().start()
+        # 서버 리소스 점유를 최소화하기 위해 Headless 모드를 기본으로 사용함
+        self.browser = await self._playwright.chromium.launch(headless=True, args=LIGHTWEIGHT_BROWSER_ARGS)
+        self._context_slots = asyncio.Semaphore(self.max_concurrency)
+        self._host_slots = {}
+
+    async def close(self):
+        # 브라우저 리소스 해제를 보장하여 시스템 부하 방지
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_slots[host]
+
+    def _content_keys(self, storage):
+        """상품 1회 수집 동안 사용할 본문 기반 키 순번 관리자 (저장소가 없으면 None)."""
+        if storage is None:
+            return None
+        return review_api.ContentKeyIndex(lambda source: storage.is_review_exist(storage.generate_id(source)))
+
+    def _collect_new(self, storage, product_id, entries, content_keys, collected):
+        """
+        증분 중단 지점 이전의 신규 리뷰에 ID를 부여하여 collected에 추가하고, (신규 건수, 중단 여부)를 반환함.
+        중단 지점은 review_api.find_stop_index로 판별하며, 플랫폼 리뷰 ID가 있으면 이를 ID로 쓰고
+        없으면 본문 기반 키에 저장된 리뷰와 겹치지 않는 순번을 붙임.
+        """
+        stop_index = review_api.find_stop_index(entries, content_keys, content_keys.exists)
+        for entry in entries[:stop_index]:
+            record = entry['record']
+            source = entry['upstream'] or content_keys.assign(entry['content_key'])
+            collected.append({
+                'content': record['content'],
+                'id': storage.generate_id(source),
+                'date': record['date'],
+                'rating': record['rating'],
+                'author_hash': record['author_hash'],
+                'upstream_id': record['upstream_id']
+            })
+        if stop_index < len(entries):
+            logger.info(f"   🛑 이미 처리한 리뷰 발견! (여기서 수집 종료)", extra={'product_id': product_id})
+            return stop_index, True
+        return stop_index, False
 
     def is_valid_review(self, text):
         """
         수집 단계에서 데이터 클렌징을 수행하여 LLM API 비용을 절감하고 분석 정확도를 높임.
+        금칙어 목록은 단일 정규식으로 컴파일되어 있어 키워드 수와 무관하게 리뷰당 1회만 탐색함.
         """
-        for keyword in self.blacklist_keywords:
-            if keyword in text: return False
-        if len(text.strip()) < self.min_length: return False
-        return True
+        return self.review_filter.is_valid(text)
+
+    def _record_page_metrics(self, product_id, mode, page_started, extracted, new_count):
+        """페이지 1건의 처리 시간과 추출/신규 리뷰 수를 기록함 (pages/sec = crawl_pages_total / crawl_page_seconds_sum)."""
+        metrics.observe("crawl_page_seconds", time.perf_counter() - page_started, product=product_id, mode=mode)
+        metrics.inc("crawl_pages_total", product=product_id, mode=mode)
+        metrics.inc("crawl_reviews_extracted_total", extracted, product=product_id)
+        metrics.inc("crawl_new_reviews_total", new_count, product=product_id)
+
+    async def extract_review_records(self, page):
+        """
+        현재 페이지의 리뷰를 1회의 page.evaluate 호출로 구조화된 레코드 리스트로 추출함.
+        브라우저는 원시 데이터만 반환하고, 유효성 필터링(is_valid_review)은 Python 측에서 수행함.
+        작성자 정보는 개인정보 보호를 위해 원문 대신 해시값으로만 보관함.
+        """
+        raw_records = await page.eval_on_selector_all(self.text_selector, _EXTRACT_JS)
+        records = []
+        for raw in raw_records:
+            content = raw['text']
+            if not self.is_valid_review(content):
+                continue
+            author = raw.get('author') or ''
+            records.append({
+                'content': content,
+                'full_context': raw.get('context') or content,
+                'date': raw.get('date') or '',
+                'rating': raw.get('rating') or '',
+                'author_hash': hashlib.md5(author.encode('utf-8')).hexdigest() if author else '',
+                # 위젯이 리뷰 요소에 플랫폼 리뷰 ID(data-review-id 등)를 노출하면 network 모드와 같은 ID 기준으로 사용함
+                'upstream_id': raw.get('review_id') or '',
+            })
+        return records
+
+    async def fetch_many(self, products, max_pages=100, storage=None, on_page=None):
+        """
+        여러 상품을 공유 브라우저 위에서 동시에 수집함.
+        products: settings.yaml의 products 리스트 ({'id', 'url', ...})
+        반환값: {product_id: 신규 리뷰 리스트 또는 Exception} — 개별 상품의 실패가 전체로 번지지 않도록 격리함.
+        on_page: 페이지마다 신규 리뷰가 확보될 때 호출되는 비동기 콜백 async (product_id, reviews) -> None
+        """
+        results = {}
+        if self.change_probe and storage:
+            # 브라우저 기동 전에 HTTP 프로브로 변경 없는 상품을 걸러냄 (신규 리뷰 0건 사이클의 대부분을 차지)
+            statuses = await self.change_probe.probe_many(products, storage)
+            for product_id, status in statuses.items():
+                if status == UNCHANGED:
+                    logger.info(f"   💤 [{product_id}] 변경 없음 (프로브). 전체 수집을 생략합니다.", extra={'product_id': product_id})
+                    results[product_id] = []
+            products = [p for p in products if p['id'] not in results]
+            if not products:
+                return results
 
-    async def fetch_reviews(self, url, product_id, max_pages=100, storage=None):
+        owns_browser = self.browser is None
+        if owns_browser:
+            await self.start()
+        try:
+            crawled = await asyncio.gather(
+                *(
+                    self.fetch_reviews(
+                        p['url'], p['id'], max_pages=max_pages, storage=storage,
+                        allow_url_patterns=p.get('allow_url_patterns'), on_page=on_page
+                    )
+                    for p in products
+                ),
+                return_exceptions=True
+            )
+        finally:
+            if owns_browser:
+                await self.close()
+        for p, result in zip(products, crawled):
+            results[p['id']] = result
+            # 수집 도중 실패한 상품의 지문을 기록하면 놓친 리뷰가 '변경 없음'으로 가려지므로 성공한 경우에만 반영함
+            fingerprint = self.fingerprints.pop(p['id'], None)
+            if storage and fingerprint and not isinstance(result, Exception):
+                # 지문 기록은 프로세스 간 파일 잠금을 잡으므로, 분석/알림 단계가 진행 중인 이벤트 루프를 막지 않도록 스레드에서 실행함
+                await asyncio.to_thread(storage.set_fingerprint, p['id'], fingerprint)
+        return results
+
+    async def fetch_reviews(self, url, product_id, max_pages=100, storage=None, allow_url_patterns=None, on_page=None):
         """
         비동기 브라우저 제어를 통한 리뷰 수집 메인 파이프라인.
         증분 수집(Incremental Crawling) 방식을 채택하여 리소스를 최적화함.
+        공유 브라우저가 기동되어 있지 않다면 단독 실행을 위해 자체적으로 기동/종료함.
+        allow_url_patterns: 이 상품에 한해 요청 차단에서 제외할 URL 정규식 리스트
         """
-        async with async_playwright() as p:
-            # 서버 리소스 점유를 최소화하기 위해 Headless 모드를 기본으로 사용함
-            browser = await p.chromium.launch(headless=True) 
+        if self.browser is None:
+            async with self:
+                return await self.fetch_reviews(url, product_id, max_pages, storage, allow_url_patterns, on_page)
+
+        # 동시 실행 한도 내에서 슬롯을 확보한 뒤, 상품 단위로 컨텍스트 생명주기를 격리하여 메모리 누수를 방지함
+        # 호스트 슬롯을 먼저 확보하여, 같은 호스트의 순서를 기다리는 작업이 전역 슬롯을 점유해 다른 호스트의 수집을 막지 않도록 함
+        async with self._host_slot(url), self._context_slots:
             # 실제 사용자와 유사한 Viewport 설정을 통해 봇 감지 알고리즘을 우회함
-            context = await browser.new_context(viewport={"width": 1280, "height": 1080})
-            page = await context.new_page()
-            
-            print(f"🌐 접속 중: {url}")
-            await page.goto(url)
-            # SPA(Single Page Application) 특유의 무거운 렌더링을 고려한 충분한 초기 로딩 대기
-            print("   ⏳ 페이지 로딩 대기 중 (5초)...")
-            await page.wait_for_timeout(5000)
-            
-            new_reviews_collected = []
+            # Service Worker가 요청을 가로채면 라우팅 차단이 우회되므로 비활성화함
+            context = await self.browser.new_context(
+                viewport={"width": 1280, "height": 1080},
+                service_workers="block"
+            )
+            try:
+                await self.request_filter.attach(context, allow_url_patterns)
+                page = await context.new_page()
+                with metrics.timer("crawl_product_seconds", product=product_id):
+                    return await self._crawl_product(page, url, product_id, max_pages, storage, on_page)
+            except Exception:
+                metrics.inc("crawl_errors_total", product=product_id)
+                raise
+            finally:
+                await context.close()
+
+    async def _crawl_product(self, page, url, product_id, max_pages, storage, on_page=None):
+        """단일 상품의 페이지네이션 수집 로직. 상품별로 독립적인 증분 중단(Incremental Stop) 상태를 가짐."""
+        captured = None
+        # network 모드의 API 수집 경로와, dom 모드에서도 변경 감지 지문 학습을 위해 리뷰 API 응답을 감청함
+        if self.mode == "network" or self.change_probe:
+            captured = self._capture_review_api(page)
+
+        logger.info(f"🌐 [{product_id}] 접속 중: {url}", extra={'product_id': product_id, 'stage': "crawl"})
+        # SPA 렌더링 완료를 고정 5초 대기 대신 DOM 준비 이벤트로 감지하여, 사이트의 실제 응답 속도만큼만 대기함
+        with metrics.timer("crawl_page_load_seconds", product=product_id):
+            await page.goto(url, wait_until="domcontentloaded", timeout=self.timeouts['page_load'])
+
+        if self.mode == "network":
+            if await self._wait_for_api_capture(page, captured):
+                reviews = await self._crawl_via_api(page, captured, product_id, max_pages, storage, on_page)
+                self._learn_fingerprint(product_id, captured)
+                return reviews
+            logger.info(f"   ↩️ [{product_id}] 리뷰 API 응답 미관측. DOM 수집 모드로 전환합니다.", extra={'product_id': product_id})
+            metrics.inc("crawl_api_fallbacks_total", product=product_id)
+
+        reviews = await self._crawl_via_dom(page, product_id, max_pages, storage, on_page)
+        self._learn_fingerprint(product_id, captured)
+        return reviews
+
+    def _learn_fingerprint(self, product_id, captured):
+        """수집 중 포착한 첫 페이지 API 응답으로 다음 사이클의 변경 감지 지문을 구성함 (API 미관측 시 생략)."""
+        if not self.change_probe or captured is None or not captured['event'].is_set():
+            return
+        raw_records = review_api.get_by_path(captured['payload'], captured['path'])
+        self.fingerprints[product_id] = build_fingerprint(
+            captured['url'], captured['path'], raw_records,
+            etag=captured.get('etag'), last_modified=captured.get('last_modified'),
+            request_headers=captured.get('request_headers')
+        )
+        # 쿠키는 지문(디스크)에 남기지 않고 프로브 인스턴스의 메모리에만 전달함
+        self.change_probe.remember_session(product_id, captured.get('request_headers'))
+
+    def _capture_review_api(self, page):
+        """
+        페이지의 XHR/fetch 응답을 감청하여 리뷰 위젯이 호출하는 API의 첫 응답(URL, JSON, 리뷰 경로)을 포착함.
+        반드시 page.goto 이전에 호출해야 최초 로딩 시의 API 호출을 놓치지 않음.
+        """
+        captured = {'event': asyncio.Event()}
+
+        async def on_response(response):
+            if captured['event'].is_set(): return
+            if response.request.resource_type not in ("xhr", "fetch"): return
+            if not self.api_url_pattern.search(response.url): return
+            try:
+                payload = await response.json()
+            except Exception:
+                return
+            path = review_api.find_review_list(payload)
+            if path is None: return
+            try:
+                # 쿠키를 포함한 실제 요청 헤더 — 프로브가 브라우저와 같은 User-Agent/쿠키로 요청하도록 전달함 (쿠키는 메모리에만 보관)
+                request_headers = await response.request.all_headers()
+            except Exception:
+                request_headers = response.request.headers
+            captured.update({
+                'url': response.url, 'payload': payload, 'path': path,
+                # 프로브의 조건부 요청(If-None-Match/If-Modified-Since)에 사용할 캐시 검증자
+                'etag': response.headers.get('etag'), 'last_modified': response.headers.get('last-modified'),
+                'request_headers': request_headers,
+            })
+            captured['event'].set()
+
+        page.on("response", on_response)
+        return captured
+
+    async def _wait_for_api_capture(self, page, captured):
+        """지연 로딩 위젯이 API를 호출하도록 스크롤을 유도하며, 상한 시간 내 응답 포착 여부를 반환함."""
+        deadline = asyncio.get_running_loop().time() + self.timeouts['api_capture'] / 1000
+        while not captured['event'].is_set():
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return False
+            await page.mouse.wheel(0, 1000)
+            try:
+                await asyncio.wait_for(captured['event'].wait(), timeout=min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                continue
+        return True
+
+    async def _crawl_via_api(self, page, captured, product_id, max_pages, storage, on_page=None):
+        """
+        포착한 리뷰 API를 브라우저 컨텍스트의 요청 세션(쿠키 공유)으로 직접 페이지네이션함.
+        렌더링/스크롤 비용이 없으며, 리뷰 ID는 DOM 모드와 같은 규칙(플랫폼 리뷰 ID 또는 review_api.ContentKeyIndex)으로 생성함.
+        """
+        logger.info(f"   📡 [{product_id}] 리뷰 API 감지: {captured['url']}", extra={'product_id': product_id})
+        path = captured['path']
+        api_url = captured['url']
+        payload = captured['payload']
+        new_reviews_collected = []
+        previous_ids = None
+        content_keys = self._content_keys(storage)
+
+        for current_page in range(1, max_pages + 1):
+            page_started = time.perf_counter()
+            raw_records = review_api.get_by_path(payload, path)
+            if not raw_records:
+                logger.info(f"   ✅ [{product_id}] 마지막 페이지입니다 (API 응답 없음).", extra={'product_id': product_id})
+                break
+
+            records = [review_api.normalize_record(raw) for raw in raw_records if isinstance(raw, dict)]
+            page_ids = [record['upstream_id'] or record['raw'] for record in records]
+            # 페이지 파라미터가 무시되어 동일한 목록이 반복 반환되는 경우 무한 루프를 방지함
+            if page_ids == previous_ids:
+                logger.info(f"   ✅ [{product_id}] 마지막 페이지입니다 (동일 응답 반복).", extra={'product_id': product_id})
+                break
+            previous_ids = page_ids
+
+            logger.info(f"📄 [{product_id}] [API Page {current_page}] {len(records)}건 수신",
+                        extra={'product_id': product_id, 'page': current_page, 'records': len(records)})
             stop_crawling = False
+            page_new_count = 0
+            if storage:
+                entries = []
+                for record in records:
+                    if not self.is_valid_review(record['content']):
+                        continue
+                    author_hash = hashlib.md5(record['author'].encode('utf-8')).hexdigest() if record['author'] else ''
+                    # 플랫폼 리뷰 ID(upstream_id)가 없는 응답은 원본 JSON 기반의 레거시 ID로 저장된 이력도 함께 조회함
+                    legacy = '' if record['upstream_id'] else f"{product_id}_api_{record['raw']}"
+                    entries.append(review_api.id_entry(product_id, {**record, 'author_hash': author_hash}, legacy))
+                # 이미 수집된 기록이 있다면 즉시 중단하여 네트워크 부하를 줄임 (증분 수집 전략)
+                page_new_count, stop_crawling = self._collect_new(
+                    storage, product_id, entries, content_keys, new_reviews_collected
+                )
+
+            logger.info(f"   -> {page_new_count}개의 신규 리뷰 확보",
+                        extra={'product_id': product_id, 'page': current_page, 'new_reviews': page_new_count})
+            self._record_page_metrics(product_id, "network", page_started, len(records), page_new_count)
+            if on_page and page_new_count:
+                # 파이프라인 모드: 상품 전체 수집 완료를 기다리지 않고 페이지 단위로 후속 단계(저장/분석)에 전달함
+                await on_page(product_id, new_reviews_collected[-page_new_count:])
+            if stop_crawling or current_page == max_pages: break
+
+            api_url = review_api.next_page_url(api_url, len(raw_records))
+            try:
+                response = await page.request.get(api_url, timeout=self.timeouts['page_turn'])
+                if not response.ok:
+                    logger.warning(f"   ⚠️ [{product_id}] API 페이지 요청 실패: {response.status}", extra={'product_id': product_id})
+                    break
+                payload = await response.json()
+            except Exception as e:
+                logger.warning(f"   ⚠️ [{product_id}] API 페이지 이동 중 오류: {e}", extra={'product_id': product_id})
+                break
+
+        return new_reviews_collected
+
+    async def _crawl_via_dom(self, page, product_id, max_pages, storage, on_page=None):
+        """렌더링된 리뷰 위젯을 스크롤/클릭으로 순회하며 수집하는 기본 경로."""
+        new_reviews_collected = []
+        stop_crawling = False
+        content_keys = self._content_keys(storage)
+        
+        for current_page in range(1, max_pages + 1):
+            if stop_crawling: break
+
+            page_started = time.perf_counter()
+            logger.info(f"📄 [{product_id}] [Page {current_page}] 수집 시작...", extra={'product_id': product_id, 'page': current_page})
             
-            for current_page in range(1, max_pages + 1):
-                if stop_crawling: break
-
-                print(f"📄 [Page {current_page}] 수집 시작...")
-                
-                # [Anti-Crawling 대응] 마우스 휠 스크롤을 시뮬레이션하여 
-                # 지연 로딩(Lazy Loading)된 리뷰 위젯의 렌더링을 강제로 트리거함
-                review_found = False
-                for _ in range(5):
-                    await page.mouse.wheel(0, 1000)
-                    await asyncio.sleep(1) # 네트워크 응답 시간을 고려한 짧은 폴링(Polling) 대기
-                    if await page.locator(self.text_selector).count() > 0:
-                        review_found = True
-                        break
-                
-                if not review_found:
-                    print("   ⛔ 리뷰 위젯을 못 찾았습니다.")
+            # [Anti-Crawling 대응] 마우스 휠 스크롤을 시뮬레이션하여 
+            # 지연 로딩(Lazy Loading)된 리뷰 위젯의 렌더링을 강제로 트리거함
+            # 고정 1초 폴링 대신 셀렉터 등장 이벤트를 기다리므로 위젯이 렌더링되는 즉시 다음 단계로 진행함
+            review_found = False
+            for _ in range(5):
+                await page.mouse.wheel(0, 1000)
+                try:
+                    await page.wait_for_selector(self.text_selector, state="attached", timeout=self.timeouts['scroll_render'])
+                    review_found = True
                     break
+                except PlaywrightTimeoutError:
+                    continue
+            
+            if not review_found:
+                logger.warning("   ⛔ 리뷰 위젯을 못 찾았습니다.", extra={'product_id': product_id})
+                break
 
-                review_elements = await page.query_selector_all(self.text_selector)
-                page_new_count = 0
-                
-                for element in review_elements:
-                    content = await element.inner_text()
-                    content = content.strip()
-                    
-                    if not self.is_valid_review(content):
-                        continue
-                    
-                    # 리뷰의 컨텍스트를 풍부하게 확보하기 위해 부모 요소를 포함한 전체 텍스트 수집
-                    try:
-                        full_context = await element.evaluate("el => el.parentElement.parentElement.innerText")
-                    except:
-                        full_context = content
-                    
-                    # [데이터 무결성 관리] MD5 해시 기반 고유 ID를 생성하여 중복 수집을 기술적으로 차단
-                    if storage:
-                        unique_source = f"{product_id}_{full_context}"
-                        review_id = storage.generate_id(unique_source)
+            review_records = await self.extract_review_records(page)
+            page_new_count = 0
+            
+            # [데이터 무결성 관리] MD5 해시 기반 고유 ID를 생성하여 중복 수집을 기술적으로 차단
+            # network 모드와 동일한 규칙(플랫폼 리뷰 ID 또는 본문/작성자/작성일/별점 + 순번)으로 ID를 생성하여
+            # 모드 전환 시에도 중복 판별이 유지됨
+            if storage:
+                entries = [
+                    review_api.id_entry(product_id, record, f"{product_id}_{record['full_context']}") # 레거시 ID
+                    for record in review_records
+                ]
+                # 이미 수집된 기록이 있다면 즉시 중단하여 네트워크 부하를 줄임 (증분 수집 전략)
+                page_new_count, stop_crawling = self._collect_new(
+                    storage, product_id, entries, content_keys, new_reviews_collected
+                )
+            
+            logger.info(f"   -> {page_new_count}개의 신규 리뷰 확보",
+                        extra={'product_id': product_id, 'page': current_page, 'new_reviews': page_new_count})
+            self._record_page_metrics(product_id, "dom", page_started, len(review_records), page_new_count)
+            if on_page and page_new_count:
+                # 파이프라인 모드: 상품 전체 수집 완료를 기다리지 않고 페이지 단위로 후속 단계(저장/분석)에 전달함
+                await on_page(product_id, new_reviews_collected[-page_new_count:])
+            
+            if stop_crawling: break
+
+            # [페이지 네이션 안정성 강화]
+            try:
+                pagination_bar = page.locator("review-number-pagination .pagination-layout--desktop")
+                if await pagination_bar.count() > 0:
+                    icon_buttons = pagination_bar.locator("button:has(svg)")
+                    if await icon_buttons.count() > 0:
+                        next_btn = icon_buttons.last
                         
-                        # 이미 수집된 기록이 있다면 즉시 중단하여 네트워크 부하를 줄임 (증분 수집 전략)
-                        if storage.is_review_exist(review_id):
-                            print(f"   🛑 이미 처리한 리뷰 발견! (여기서 수집 종료)")
-                            stop_crawling = True
-                            break 
-
-                        new_reviews_collected.append({
-                            'content': content,
-                            'id': review_id
-                        })
-                        page_new_count += 1
-                
-                print(f"   -> {page_new_count}개의 신규 리뷰 확보")
-                
-                if stop_crawling: break
-
-                # [페이지 네이션 안정성 강화]
-                try:
-                    pagination_bar = page.locator("review-number-pagination .pagination-layout--desktop")
-                    if await pagination_bar.count() > 0:
-                        icon_buttons = pagination_bar.locator("button:has(svg)")
-                        if await icon_buttons.count() > 0:
-                            next_btn = icon_buttons.last
-                            
-                            # 비활성화된 버튼을 체크하여 파이프라인의 정상 종료 시점을 판별함
-                            if await next_btn.is_disabled():
-                                print("   ✅ 마지막 페이지입니다 (버튼 비활성).")
-                                break
-                            
-                            class_attr = await next_btn.get_attribute("class")
-                            if class_attr and "disabled" in class_attr:
-                                print("   ✅ 마지막 페이지입니다 (클래스 체크).")
-                                break
-
-                            # [Stuck 감지 로직] 버튼을 눌렀음에도 데이터가 갱신되지 않는 현상을 방어함
-                            async def get_first_valid_text():
-                                elements = await page.query_selector_all(self.text_selector)
-                                for el in elements:
-                                    text = (await el.inner_text()).strip()
-                                    if self.is_valid_review(text):
-                                        return text
-                                return None 
-
-                            # 1. 클릭 전 데이터 스냅샷 저장
-                            current_valid_text = await get_first_valid_text()
-
-                            # 2. 다음 페이지 이동 시뮬레이션
-                            await next_btn.click()
-                            
-                            print("   ⏳ 다음 페이지 로딩 대기 (5초)...")
-                            await page.wait_for_timeout(5000)
-                            
-                            # 3. 이동 후 데이터 비교를 통해 실질적 렌더링 완료 여부 검증
-                            new_valid_text = await get_first_valid_text()
-
-                            if current_valid_text and new_valid_text:
-                                if current_valid_text == new_valid_text:
-                                    # 네트워크 지연으로 데이터가 늦게 올 경우를 대비한 방어적 추가 대기
-                                    print(f"      ⚠️ [Stuck 감지] 데이터 미갱신. 추가 대기 수행...")
-                                    await page.wait_for_timeout(3000)
-                            
-                        else:
+                        # 비활성화된 버튼을 체크하여 파이프라인의 정상 종료 시점을 판별함
+                        if await next_btn.is_disabled():
+                            logger.info("   ✅ 마지막 페이지입니다 (버튼 비활성).", extra={'product_id': product_id})
                             break
+                        
+                        class_attr = await next_btn.get_attribute("class")
+                        if class_attr and "disabled" in class_attr:
+                            logger.info("   ✅ 마지막 페이지입니다 (클래스 체크).", extra={'product_id': product_id})
+                            break
+
+                        # [Stuck 감지 로직] 버튼을 눌렀음에도 데이터가 갱신되지 않는 현상을 방어함
+                        # 1. 클릭 전 리뷰 목록 스냅샷 저장
+                        before_snapshot = await page.evaluate(_SNAPSHOT_JS, self.text_selector)
+
+                        # 2. 다음 페이지 이동 시뮬레이션
+                        await next_btn.click()
+                        
+                        # 3. 고정 5초 대기 대신 리뷰 목록이 실제로 교체되는 시점을 브라우저 측에서 감지함
+                        try:
+                            await page.wait_for_function(
+                                _CHANGED_JS, arg=[self.text_selector, before_snapshot],
+                                timeout=self.timeouts['page_turn']
+                            )
+                        except PlaywrightTimeoutError:
+                            # 네트워크 지연으로 데이터가 늦게 올 경우를 대비하여 네트워크 유휴 상태까지 방어적으로 추가 대기
+                            logger.warning(f"      ⚠️ [Stuck 감지] 데이터 미갱신. 추가 대기 수행...", extra={'product_id': product_id})
+                            metrics.inc("crawl_stuck_pages_total", product=product_id)
+                            try:
+                                await page.wait_for_load_state("networkidle", timeout=self.timeouts['stuck_grace'])
+                            except PlaywrightTimeoutError:
+                                pass
+                        
                     else:
                         break
-                except Exception as e:
-                    # 페이지 이동 중 발생하는 예외를 개별 처리하여 안정성 확보
-                    print(f"   ⚠️ 페이지 이동 중 오류: {e}")
+                else:
                     break
-            
-            # 브라우저 리소스 해제를 보장하여 시스템 부하 방지
-            await browser.close()
-            return new_reviews_collected
\ No newline at end of file
+            except Exception as e:
+                # 페이지 이동 중 발생하는 예외를 개별 처리하여 안정성 확보
+                logger.warning(f"   ⚠️ 페이지 이동 중 오류: {e}", extra={'product_id': product_id})
+                break
+        
+        return new_reviews_collected
\ No newline at end of file
@@ -0,0 +1,92 @@
+import os
+import time
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class LockTimeout(Exception):
+    """지정한 시간 안에 파일 잠금을 얻지 못한 경우 발생함."""
+
+# POSIX 레코드 잠금은 프로세스 단위이며, 같은 파일의 fd를 하나라도 닫으면 그 프로세스의 잠금이 모두 풀림.
+# 따라서 같은 경로에 대해서는 프로세스 내 단일 FileLock 인스턴스를 공유해야 함 (FileLock.shared)
+_SHARED_LOCKS = {}
+_SHARED_LOCKS_GUARD = threading.Lock()
+
+class FileLock:
+    """
+    여러 프로세스(같은 호스트 또는 공유 볼륨을 사용하는 여러 호스트)가 하나의 저장소 파일을 안전하게 쓰기 위한 배타적 파일 잠금입니다.
+    POSIX 레코드 잠금(fcntl.lockf)을 사용하므로 NFSv4 등 잠금을 지원하는 공유 볼륨에서도 동작하며,
+    잠금을 쥔 프로세스가 비정상 종료되면 운영체제가 잠금을 자동으로 해제합니다.
+    같은 프로세스 안에서는 재진입이 가능하며(중첩 with 허용), 스레드 간에도 직렬화됩니다.
+    """
+    def __init__(self, path, timeout=60, poll_interval=0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    @classmethod
+    def shared(cls, path, timeout=60):
+        """경로별로 프로세스 내 단일 인스턴스를 반환함 (저장소 인스턴스가 여러 개여도 잠금이 서로 간섭하지 않음)."""
+        key = os.path.abspath(path)
+        with _SHARED_LOCKS_GUARD:
+            if key not in _SHARED_LOCKS:
+                _SHARED_LOCKS[key] = cls(path, timeout=timeout)
+            return _SHARED_LOCKS[key]
+
+    def _try_lock(self, fd):
+        try:
+            if fcntl:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth:
+            self._depth += 1
+            return self
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            deadline = time.monotonic() + self.timeout
+            while not self._try_lock(fd):
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeout(f"파일 잠금 획득 시간 초과: {self.path} ({self.timeout}초)")
+                time.sleep(self.poll_interval)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+        self._depth = 1
+        return self
+
+    def release(self):
+        self._depth -= 1
+        if not self._depth:
+            try:
+                if fcntl:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN)
+                else:
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
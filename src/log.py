@@ -0,0 +1,53 @@
+import sys
+import json
+import logging
+from datetime import datetime
+
+# logging.LogRecord의 기본 속성 — 이 외의 속성은 extra로 전달된 구조화 필드로 간주함
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+ROOT_LOGGER_NAME = "glowm"
+
+class JsonFormatter(logging.Formatter):
+    """로그 1건을 JSON 한 줄로 출력함. extra로 전달한 필드(product_id, stage 등)가 최상위 키로 포함됨."""
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S"),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage().strip(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def get_logger(name):
+    """모듈별 로거를 반환함 (예: get_logger("crawler") → glowm.crawler)."""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+def configure_logging(config=None):
+    """
+    settings.yaml의 logging 섹션으로 출력 형식을 설정함.
+    - format: "text"(기본값, 기존 콘솔 출력과 동일한 메시지) 또는 "json"(로그 수집기 연동용 구조화 로그)
+    - level: "INFO"(기본값), "DEBUG" 등
+    """
+    logging_config = (config or {}).get('logging', {}) or {}
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(str(logging_config.get('level', "INFO")).upper())
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    handler = logging.StreamHandler(sys.stdout)
+    if logging_config.get('format', "text") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(message)s"))
+    root.addHandler(handler)
+    root.propagate = False
+    return root
+
+# 설정 전에 출력되는 로그도 유실되지 않도록 기본 콘솔 출력으로 초기화함
+configure_logging()
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import functools
+import threading
+from datetime import datetime
+
+# 지연 시간 히스토그램의 기본 구간(초): 스토리지 조회(ms 단위)부터 페이지 대기/LLM 호출(수십 초)까지 포괄함
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class _NullTimer:
+    """계측이 비활성화된 경우 사용하는 빈 타이머 (객체 생성 없이 공유 인스턴스를 반환하여 오버헤드를 없앰)."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class Metrics:
+    """
+    단계별(수집/저장/분석/알림) 처리량과 지연 시간을 측정하는 경량 계측 레지스트리입니다.
+    카운터(Counter), 게이지(Gauge), 히스토그램(Histogram)을 상품/단계 라벨별로 집계하여
+    Prometheus 텍스트 파일(node_exporter textfile collector 형식)과 사이클별 JSON 요약으로 내보냅니다.
+    비활성화 상태에서는 모든 기록 메서드가 즉시 반환되어 운영 경로에 부담을 주지 않습니다.
+    """
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS, prefix="glowm"):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.counters = {}    # (name, labels) -> value
+        self.gauges = {}      # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> {'buckets': [...], 'sum': float, 'count': int}
+        self._cycle_base = None
+        self._cycle_started = None
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled: return
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled: return
+        with self.lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled: return
+        key = (name, _label_key(labels))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist['buckets'][i] += 1
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def timer(self, name, **labels):
+        """with 블록의 실행 시간(초)을 히스토그램으로 기록함. 동기/비동기 코드 모두에서 사용 가능함."""
+        if not self.enabled: return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def timed(self, name, **labels):
+        """
+        메서드 전체의 실행 시간을 기록하는 데코레이터. 비활성화 상태에서는 원본 함수를 바로 호출함.
+        (동기 함수 전용이며, 코루틴은 함수 내부에서 timer()를 사용함)
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Timer(self, name, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------------------------------------------------------
+    # 내보내기
+    # ------------------------------------------------------------------
+    def _format_labels(self, labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs: return ""
+        escaped = (f'{k}="{_escape_label(v)}"' for k, v in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 노출 형식(Exposition Format)으로 변환함. 카운터/히스토그램은 프로세스 기동 후 누적값임."""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+
+        declared = set()
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}_{name}"
+            declare(metric, "counter")
+            lines.append(f"{metric}{self._format_labels(labels)} {value}")
+        for (name, labels), value in gauges:
+            metric = f"{self.prefix}_{name}"
+            declare(metric, "gauge")
+            lines.append(f"{metric}{self._format_labels(labels)} {value}")
+        for (name, labels), hist in histograms:
+            metric = f"{self.prefix}_{name}"
+            declare(metric, "histogram")
+            for bound, count in zip(self.buckets, hist['buckets']):
+                lines.append(f"{metric}_bucket{self._format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{metric}_bucket{self._format_labels(labels, [('le', '+Inf')])} {hist['count']}")
+            lines.append(f"{metric}_sum{self._format_labels(labels)} {hist['sum']:.6f}")
+            lines.append(f"{metric}_count{self._format_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """수집기가 읽는 도중 잘린 파일을 보지 않도록 임시 파일에 기록 후 원자적으로 교체함."""
+        if not self.enabled: return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def start_cycle(self):
+        """사이클 시작 시점의 누적값을 기준점으로 저장하여, 사이클 요약에는 이번 사이클의 증가분만 집계되도록 함."""
+        if not self.enabled: return
+        with self.lock:
+            self._cycle_base = {
+                'counters': dict(self.counters),
+                'histograms': {key: (hist['sum'], hist['count']) for key, hist in self.histograms.items()},
+            }
+        self._cycle_started = time.perf_counter()
+
+    def cycle_summary(self):
+        """
+        이번 사이클의 지표를 JSON 직렬화 가능한 딕셔너리로 반환함.
+        히스토그램은 호출 수/합계/평균으로 요약하며, 라벨은 'name{k=v,...}' 형태의 키로 표현함.
+        """
+        base = self._cycle_base or {'counters': {}, 'histograms': {}}
+        with self.lock:
+            counters = {
+                self._summary_key(key): value - base['counters'].get(key, 0)
+                for key, value in self.counters.items()
+                if value - base['counters'].get(key, 0)
+            }
+            gauges = {self._summary_key(key): value for key, value in self.gauges.items()}
+            timings = {}
+            for key, hist in self.histograms.items():
+                base_sum, base_count = base['histograms'].get(key, (0.0, 0))
+                count = hist['count'] - base_count
+                if not count: continue
+                total = hist['sum'] - base_sum
+                timings[self._summary_key(key)] = {'count': count, 'total_seconds': round(total, 6), 'avg_seconds': round(total / count, 6)}
+        return {
+            'finished_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'wall_seconds': round(time.perf_counter() - self._cycle_started, 3) if self._cycle_started else None,
+            'counters': counters,
+            'gauges': gauges,
+            'timings': timings,
+        }
+
+    def _summary_key(self, key):
+        name, labels = key
+        if not labels: return name
+        return f"{name}{{{','.join(f'{k}={v}' for k, v in labels)}}}"
+
+    def throughput(self, summary, counter_name, timing_name, label="product"):
+        """사이클 요약에서 라벨별 '카운터 증가분 / 누적 소요 시간'(예: 상품별 pages/sec)을 계산함."""
+        totals = {}
+        for key, value in summary['counters'].items():
+            if key.startswith(f"{counter_name}{{") and f"{label}=" in key:
+                label_value = key.split(f"{label}=", 1)[1].split(",", 1)[0].rstrip("}")
+                totals[label_value] = totals.get(label_value, 0) + value
+        rates = {}
+        for label_value, total in totals.items():
+            timing = summary['timings'].get(f"{timing_name}{{{label}={label_value}}}")
+            if timing and timing['total_seconds'] > 0:
+                rates[label_value] = round(total / timing['total_seconds'], 3)
+        return rates
+
+    def write_cycle_summary(self, path, extra=None):
+        """사이클 요약 1건을 JSON Lines 파일에 추가 기록하고, 기록한 요약을 반환함."""
+        if not self.enabled: return None
+        summary = self.cycle_summary()
+        summary['pages_per_second'] = self.throughput(summary, "crawl_pages_total", "crawl_product_seconds")
+        if extra:
+            summary.update(extra)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, mode='a', encoding='utf-8') as f:
+            f.write(json.dumps(summary, ensure_ascii=False, default=str) + "\n")
+        return summary
+
+# 모든 모듈이 공유하는 전역 레지스트리 (기본값: 비활성화). scheduler가 settings.yaml의 metrics 섹션으로 활성화함
+metrics = Metrics()
+
+def configure_metrics(config=None):
+    """settings.yaml의 metrics 섹션을 전역 레지스트리에 반영하고 레지스트리를 반환함."""
+    metrics_config = (config or {}).get('metrics', {}) or {}
+    metrics.enabled = metrics_config.get('enabled', False)
+    if metrics_config.get('buckets'):
+        metrics.buckets = tuple(metrics_config['buckets'])
+    return metrics
@@ -1,30 +1,94 @@
 import requests
 import yaml
 import json
+import os
+import time
+import queue
+import itertools
+import threading
+from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+from src.rate_limiter import RateLimiter
+from src.metrics import metrics
+from src.log import get_logger
+
+logger = get_logger("notifier")
+
+# 전송 큐 종료 신호 (우선순위가 가장 낮아 남은 메시지를 모두 전송한 뒤 처리됨)
+_STOP = object()
+_STOP_PRIORITY = float('inf')
+# 다이제스트 메시지의 전송 우선순위 (개별 알림보다 뒤에 전송)
+_DIGEST_PRIORITY = 0
+
+# Slack 메시지 1건당 블록 수 상한(50)을 넘지 않도록 다이제스트 1건에 담을 최대 리뷰 수
+DIGEST_MAX_ITEMS_PER_MESSAGE = 40
 
 class SlackNotifier:
     """
     분석된 리뷰 결과를 실무자(CS팀)에게 전달하는 알림 엔진입니다.
     정보의 가독성과 시급성에 따른 시각적 차별화에 중점을 두어 설계되었습니다.
+    백그라운드 전송 큐를 통해 파이프라인을 차단하지 않고, 긴급하지 않은 알림은 상품별 다이제스트로 묶어 전송합니다.
     """
-    def __init__(self):
-        # 보안 및 유지보수를 위해 Webhook URL과 같은 민감 정보는 
+    def __init__(self, config=None, session=None):
+        # 보안 및 유지보수를 위해 Webhook URL과 같은 민감 정보는
         # 하드코딩하지 않고 외부 설정 파일(YAML)에서 주입받는 방식을 채택함
-        with open("config/settings.yaml", "r", encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-        self.webhook_url = config['slack']['webhook_url']
+        if config is None:
+            with open("config/settings.yaml", "r", encoding='utf-8') as f:
+                config = yaml.safe_load(f)
+        slack_config = config['slack']
+        self.webhook_url = slack_config['webhook_url']
+
+        # 메시지마다 새 커넥션을 여는 비용을 없애기 위해 Keep-Alive 커넥션 풀을 공유하는 세션을 사용함
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session = session
+
+        # [Rate Limit] Slack Incoming Webhook 권장 한도(초당 1건)를 Token Bucket으로 준수함
+        # 버스트 허용량을 1~2건으로 제한하여, 적체된 메시지가 한꺼번에 전송되며 429가 연쇄 발생하지 않도록 함
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=slack_config.get('messages_per_minute', 60),
+            request_burst=slack_config.get('burst', 1)
+        )
+        self.max_retries = slack_config.get('max_retries', 4)
+        self.dead_letter_path = slack_config.get('dead_letter_path', "data/slack_dead_letter.jsonl")
+
+        # [Digest Mode] 긴급도 낮은 알림(≤ digest_max_urgency)은 상품별로 모아 1건의 메시지로 전송하고,
+        # 긴급도 높은 알림(≥ immediate_min_urgency)은 다이제스트를 기다리지 않고 즉시 전송함
+        self.digest_enabled = slack_config.get('digest', True)
+        self.digest_max_urgency = slack_config.get('digest_max_urgency', 2)
+        self.immediate_min_urgency = slack_config.get('immediate_min_urgency', 4)
+        self.digest_interval_seconds = slack_config.get('digest_interval_seconds', 600)
+        # 종료/설정 교체 시 전송 큐가 비워지기를 기다리는 상한 (Slack 장애로 스케줄러가 멈추지 않도록 함)
+        self.close_timeout_seconds = slack_config.get('close_timeout_seconds', 30)
+
+        # 긴급도가 높은 알림이 일상 알림/다이제스트 적체 뒤에서 기다리지 않도록 (-긴급도, 적재 순번) 순으로 전송함
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._worker = None
+        # 종료 대기 시간 초과 시 워커에 중단을 알리는 플래그 — 큐 비우기(Dead-Letter)와 워커의 항목 수령을 같은 락으로 직렬화함
+        self._worker_lock = threading.Lock()
+        self._stopping = False
+        self._digests = {}          # product_name -> [analysis_result, ...]
+        self._digest_started = {}   # product_name -> 첫 항목 적재 시각
+        self._digest_lock = threading.Lock()
+        self.stats = {'sent': 0, 'failed': 0, 'dead_lettered': 0, 'digested': 0}
+        # 전송 워커(sent/failed/dead_lettered)와 호출 스레드(digested)가 함께 갱신하므로 락 안에서 증가시킴
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
 
     def get_urgency_display(self, score):
         """
         수치화된 긴급도를 실무자가 직관적으로 인지할 수 있도록 시각적 요소(Emoji)로 변환함.
         이는 비개발 조직과의 협업 시 데이터 해석의 오류를 줄이기 위한 '의사결정 지원' 로직임
         """
-        try:
-            score = int(score)
-        except:
-            # 예상치 못한 데이터 형식 입력 시 시스템 중단을 막기 위한 방어적 기본값 설정
-            score = 1
-            
+        score = self._urgency_score(score)
+
         if score <= 1:
             return "🟢 (낮음)"   # 일상적인 긍정/문의 리뷰
         elif score == 2:
@@ -36,20 +100,26 @@ class SlackNotifier:
         else:
             return "🚨 (매우 긴급)" # 즉각적인 대응이 필요한 심각한 이슈
 
-    def send_notification(self, analysis_result):
+    def _urgency_score(self, score):
+        try:
+            return int(score)
+        except (TypeError, ValueError):
+            # 예상치 못한 데이터 형식 입력 시 시스템 중단을 막기 위한 방어적 기본값 설정
+            return 1
+
+    def build_payload(self, analysis_result):
         """
-        LLM의 분석 결과물을 슬랙의 Block Kit 구조에 최적화하여 전송함.
+        LLM의 분석 결과물을 슬랙 메시지 구조에 최적화함.
         정보 계층 구조를 명확히 하여 담당자가 핵심 요약을 3초 내에 파악하도록 함
         """
-        
-        urgency_score = analysis_result.get('urgency', 1)
+        urgency_score = self._urgency_score(analysis_result.get('urgency', 1))
         urgency_display = self.get_urgency_display(urgency_score)
-        
+
         # 긴급도에 따른 헤더 아이콘 가변 설정을 통해 알림 채널 내에서의 주목도 차별화
         header_icon = "🚨" if urgency_score >= 4 else "📢"
 
         # 정보의 가독성을 극대화하기 위한 슬랙 메시지 레이아웃 구성
-        payload = {
+        return {
             "text": f"{header_icon} *새로운 고객 리뷰 분석 결과*\n"
                     f"• *요약:* {analysis_result.get('summary', '요약 없음')}\n"
                     f"• *카테고리:* {analysis_result.get('category', '미분류')}\n"
@@ -58,23 +128,242 @@ class SlackNotifier:
                     f"• *내용:* {analysis_result.get('raw_text', '내용 없음')}"
         }
 
+    def build_digest_payload(self, product_name, results):
+        """긴급도가 낮은 리뷰를 상품 단위로 묶은 Block Kit 다이제스트 메시지를 구성함."""
+        blocks = [
+            {"type": "header", "text": {"type": "plain_text", "text": f"📋 {product_name} 리뷰 다이제스트 ({len(results)}건)"}},
+            {"type": "context", "elements": [{"type": "mrkdwn", "text": "긴급도가 낮은 리뷰를 묶어서 전달합니다."}]},
+            {"type": "divider"},
+        ]
+        for result in results:
+            urgency_display = self.get_urgency_display(result.get('urgency', 1))
+            raw_text = str(result.get('raw_text', ''))
+            if len(raw_text) > 200:
+                raw_text = raw_text[:200] + "…"
+            blocks.append({
+                "type": "section",
+                "text": {
+                    "type": "mrkdwn",
+                    "text": f"{urgency_display} *{result.get('summary', '요약 없음')}* "
+                            f"({result.get('category', '미분류')}/{result.get('sentiment', '중립')})\n> {raw_text}"
+                }
+            })
+        # 블록을 렌더링하지 못하는 클라이언트(모바일 푸시 등)를 위한 대체 텍스트
+        return {"text": f"📋 {product_name} 리뷰 다이제스트 ({len(results)}건)", "blocks": blocks}
+
+    def _post(self, payload):
+        """
+        단일 메시지를 전송하고 (성공 여부, 서버가 지시한 재시도 대기 시간, 오류 내용, 재시도 무의미 여부)를 반환함.
+        외부 API 호출 시 발생할 수 있는 네트워크 예외 및 타임아웃에 대비한 예외 처리 포함.
+        """
         try:
-            # 외부 API 호출 시 발생할 수 있는 네트워크 예외 및 타임아웃에 대비한 예외 처리
-            response = requests.post(
-                self.webhook_url, 
-                data=json.dumps(payload),
-                headers={'Content-Type': 'application/json'},
-                timeout=10 # 무한 대기를 방지하여 시스템 자원 고갈 예방
-            )
-            
-            if response.status_code == 200:
-                print(f"✅ 슬랙 알림 전송 성공! ({urgency_display})")
-            else:
-                # HTTP 상태 코드에 따른 트러블슈팅 로그 남김
-                print(f"❌ 슬랙 알림 전송 실패: {response.status_code}")
+            with metrics.timer("slack_post_seconds"):
+                response = self.session.post(
+                    self.webhook_url,
+                    data=json.dumps(payload),
+                    headers={'Content-Type': 'application/json'},
+                    timeout=10 # 무한 대기를 방지하여 시스템 자원 고갈 예방
+                )
         except Exception as e:
-            # 네트워크 단절 등 예외 상황 발생 시 파이프라인 전체가 죽지 않도록 독립적 로깅 수행
-            print(f"❌ 슬랙 연동 중 오류 발생: {e}")
+            return False, None, str(e), False
+
+        if response.status_code == 200:
+            return True, None, None, False
+        retry_after = None
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get('Retry-After', 1))
+            except ValueError:
+                retry_after = 1.0
+        # 429 이외의 4xx(잘못된 페이로드, 폐기된 Webhook 등)는 재시도해도 결과가 같으므로 영구 실패로 처리함
+        permanent = 400 <= response.status_code < 500 and response.status_code != 429
+        return False, retry_after, f"HTTP {response.status_code}", permanent
+
+    def _deliver(self, payload):
+        """
+        Rate Limiter를 통과한 뒤 메시지를 전송하며, 429 응답은 Retry-After만큼 기다린 뒤 재시도하고
+        429 이외의 4xx는 즉시, 그 외 실패는 지수 백오프 재시도 후 유실 방지를 위해 Dead-Letter 파일에 기록함.
+        """
+        error = None
+        for attempt in range(self.max_retries):
+            with metrics.timer("slack_rate_limit_wait_seconds"):
+                self.rate_limiter.acquire()
+            ok, retry_after, error, permanent = self._post(payload)
+            if ok:
+                self._count('sent')
+                metrics.inc("slack_messages_total", outcome="sent")
+                return True
+            if permanent:
+                break
+            metrics.inc("slack_retries_total")
+            if retry_after is not None:
+                metrics.inc("slack_throttled_total")
+                # 한도 초과는 후속 메시지에도 해당하므로 공유 버킷에도 대기를 반영함
+                self.rate_limiter.penalize(retry_after)
+                time.sleep(retry_after)
+            else:
+                time.sleep(min(2 ** attempt, 30))
+
+        # 네트워크 단절 등 예외 상황 발생 시 파이프라인 전체가 죽지 않도록 독립적 로깅 수행
+        logger.error(f"❌ 슬랙 알림 전송 실패 ({error}). Dead-Letter에 기록합니다.", extra={'error': error})
+        self._count('failed')
+        metrics.inc("slack_messages_total", outcome="dead_lettered")
+        self._write_dead_letter(payload, error)
+        return False
+
+    def _write_dead_letter(self, payload, error):
+        os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+        with open(self.dead_letter_path, mode='a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'failed_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'error': error,
+                'payload': payload,
+            }, ensure_ascii=False) + "\n")
+        self._count('dead_lettered')
+
+    def send_notification(self, analysis_result):
+        """
+        분석 결과 1건을 즉시(동기) 전송함. 재시도/Dead-Letter 정책은 큐 전송과 동일하게 적용됨.
+        """
+        urgency_display = self.get_urgency_display(analysis_result.get('urgency', 1))
+        if self._deliver(self.build_payload(analysis_result)):
+            logger.info(f"✅ 슬랙 알림 전송 성공! ({urgency_display})")
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # 백그라운드 전송 큐
+    # ------------------------------------------------------------------
+    def start(self):
+        """
+        전송 전용 백그라운드 스레드를 기동하여 알림 전송이 수집/분석 파이프라인을 차단하지 않도록 함.
+        종료 대기 시간 초과로 중단을 지시받은 워커가 아직 전송 중이면, 새 워커를 띄우지 않고 중단 지시를 철회하여 그대로 재사용함
+        (같은 큐를 두 워커가 나눠 받지 않도록 함).
+        """
+        with self._worker_lock:
+            if self._worker and self._worker.is_alive():
+                self._stopping = False
+                return
+            self._stopping = False
+            self._worker = threading.Thread(target=self._run, name="slack-delivery", daemon=True)
+            self._worker.start()
+
+    def _should_exit(self, stop_received=False):
+        """
+        중단 지시 또는 종료 신호를 확인하고, 종료한다면 워커 참조를 락 안에서 해제함.
+        종료 신호 이후에 적재된 메시지가 있으면 계속 전송함 (적재와 같은 락으로 판단하므로 메시지가 고아로 남지 않음).
+        """
+        with self._worker_lock:
+            if not (self._stopping or (stop_received and self._queue.empty())):
+                return False
+            if self._worker is threading.current_thread():
+                self._worker = None
+            return True
+
+    def _run(self):
+        while True:
+            if self._should_exit():
+                break
+            try:
+                _, _, item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._queue.task_done()
+                if self._should_exit(stop_received=True):
+                    break
+                # 종료 신호 이후에 적재된 메시지를 먼저 전송하도록 종료 신호를 큐의 맨 뒤로 되돌림
+                self._put(_STOP, _STOP_PRIORITY)
+            elif item is not None:
+                metrics.set_gauge("slack_queue_depth", self._queue.qsize())
+                try:
+                    self._deliver(item)
+                finally:
+                    self._queue.task_done()
+            self._flush_due_digests()
+
+    def _put(self, payload, priority):
+        with self._worker_lock:
+            self._queue.put((priority, next(self._sequence), payload))
+
+    def enqueue(self, analysis_result):
+        """
+        분석 결과를 긴급도에 따라 라우팅함.
+        - 긴급도 ≥ immediate_min_urgency: 즉시 전송 큐에 적재 (적체된 일반 알림보다 먼저 전송됨)
+        - 긴급도 ≤ digest_max_urgency (다이제스트 모드): 상품별 다이제스트 버퍼에 적재
+        - 그 외: 개별 메시지로 전송 큐에 적재
+        """
+        urgency_score = self._urgency_score(analysis_result.get('urgency', 1))
+        if self.digest_enabled and urgency_score <= self.digest_max_urgency and urgency_score < self.immediate_min_urgency:
+            product_name = analysis_result.get('product_name', '기타 상품')
+            with self._digest_lock:
+                self._digests.setdefault(product_name, []).append(analysis_result)
+                self._digest_started.setdefault(product_name, time.monotonic())
+            self._count('digested')
+            metrics.inc("slack_digested_total")
+        else:
+            self._put(self.build_payload(analysis_result), -urgency_score)
+            metrics.set_gauge("slack_queue_depth", self._queue.qsize())
+        # 적재 후에 워커를 확인하여, 종료 중인 워커가 이 메시지를 보지 못하고 빠져나가더라도 새 워커가 전송하도록 함
+        self.start()
+
+    def _flush_due_digests(self):
+        """적재 후 digest_interval_seconds가 지난 상품의 다이제스트를 전송 큐로 넘김."""
+        now = time.monotonic()
+        with self._digest_lock:
+            due = [name for name, started in self._digest_started.items() if now - started >= self.digest_interval_seconds]
+        for product_name in due:
+            self.flush_digests(product_name)
+
+    def flush_digests(self, product_name=None):
+        """버퍼에 쌓인 다이제스트(특정 상품 또는 전체)를 Block Kit 메시지로 묶어 전송 큐에 적재함."""
+        with self._digest_lock:
+            names = [product_name] if product_name else list(self._digests)
+            pending = {name: self._digests.pop(name, []) for name in names}
+            for name in names:
+                self._digest_started.pop(name, None)
+        for name, results in pending.items():
+            for i in range(0, len(results), DIGEST_MAX_ITEMS_PER_MESSAGE):
+                self._put(self.build_digest_payload(name, results[i : i + DIGEST_MAX_ITEMS_PER_MESSAGE]), _DIGEST_PRIORITY)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def close(self, timeout=None):
+        """
+        남은 다이제스트를 모두 적재하고 전송 큐가 비워질 때까지 기다린 뒤 워커를 종료함.
+        timeout(초)을 생략하면 close_timeout_seconds까지만 기다리며, 시간 내 전송하지 못한 메시지는 Dead-Letter에 기록함.
+        """
+        worker = self._worker
+        if not worker or not worker.is_alive():
+            return
+        self.flush_digests()
+        self._put(_STOP, _STOP_PRIORITY)
+        worker.join(self.close_timeout_seconds if timeout is None else timeout)
+        if worker.is_alive():
+            self._dead_letter_pending("전송 큐 종료 대기 시간 초과")
+        # 워커 참조는 워커가 실제로 종료될 때 해제됨 (아직 전송 중인 워커를 두고 다음 enqueue()가 두 번째 워커를 띄우지 않도록 함)
+
+    def _dead_letter_pending(self, error):
+        """
+        워커에 중단을 지시하고 큐에 남은 미전송 메시지를 Dead-Letter로 옮김.
+        락 안에서 수행하므로 Dead-Letter로 옮긴 메시지를 워커가 다시 꺼내 전송하는 일이 없으며,
+        워커는 진행 중인 전송 1건만 마친 뒤 스스로 종료함.
+        """
+        pending = 0
+        with self._worker_lock:
+            self._stopping = True
+            while True:
+                try:
+                    _, _, item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    self._write_dead_letter(item, error)
+                    pending += 1
+                self._queue.task_done()
+        if pending:
+            logger.warning(f"⚠️ 슬랙 전송 지연으로 미전송 알림 {pending}건을 Dead-Letter에 기록했습니다.", extra={'pending': pending})
 
 if __name__ == "__main__":
     # 단위 테스트를 통해 모듈의 독립적인 작동 여부를 검증함
@@ -86,4 +375,4 @@ if __name__ == "__main__":
         "urgency": 1,
         "raw_text": "하얀색의 하드케이스가 눈이부실정도로 영롱하네요"
     }
-    notifier.send_notification(test_data)
\ No newline at end of file
+    notifier.send_notification(test_data)
@@ -0,0 +1,230 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from src.metrics import metrics
+from src.log import get_logger
+
+logger = get_logger("pipeline")
+
+# 단계 종료 신호
+_DONE = object()
+
+class ReviewPipeline:
+    """
+    수집(Crawler) → 저장(Storage) → 분석(Processor) → 알림(Notifier) 단계를 동시에 실행하는 파이프라인입니다.
+    각 단계는 크기가 제한된 큐(Bounded Queue)로 연결되어, 상품 B의 페이지를 수집하는 동안
+    상품 A의 LLM 분석과 슬랙 전송이 함께 진행되며, 후속 단계가 밀리면 앞 단계가 자동으로 대기(Backpressure)합니다.
+    """
+    def __init__(self, crawler, processor, notifier, storage, max_pages=100, first_run_mode=False,
+                 analyze_queue_size=8, notify_queue_size=200, analysis_workers=2, review_filter=None):
+        self.crawler = crawler
+        self.processor = processor
+        self.notifier = notifier
+        self.storage = storage
+        self.max_pages = max_pages
+        self.first_run_mode = first_run_mode
+        self.analyze_queue_size = analyze_queue_size
+        self.notify_queue_size = notify_queue_size
+        self.analysis_workers = analysis_workers
+        # 근사 중복(템플릿/복붙) 리뷰를 대표 1건만 분석하기 위한 사전 필터 (기본값: 크롤러와 동일한 필터 공유)
+        self.review_filter = review_filter if review_filter is not None else getattr(crawler, 'review_filter', None)
+
+        self.products = {}
+        self.muted = set()
+        self.stats = {}
+
+    async def _storage_call(self, method, *args):
+        """
+        저장소 메서드를 전용 단일 스레드에서 실행함.
+        CSV 전체 재작성(fsync), 프로세스 간 파일 잠금 대기, SQLite busy_timeout 대기가 이벤트 루프를 멈춰
+        동시에 진행 중인 페이지 수집/LLM 요청/알림 단계까지 정지시키지 않도록 함.
+        단일 스레드이므로 저장소 쓰기 순서는 호출 순서대로 유지됨.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._storage_executor, functools.partial(method, *args))
+
+    def _product_stats(self, product_id):
+        return self.stats.setdefault(product_id, {'collected': 0, 'analyzed': 0, 'deduplicated': 0, 'notified': 0, 'error': None})
+
+    async def run(self, products):
+        """
+        전체 상품에 대해 1회의 파이프라인 사이클을 실행하고 상품별 처리 통계를 반환함.
+        도중에 취소(종료 신호)되면 진행 중인 모든 단계를 정리(Cancel)한 뒤 예외를 다시 전파함.
+        """
+        self.products = {p['id']: p for p in products}
+        self.stats = {}
+        self._storage_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-storage")
+        try:
+            return await self._run(products)
+        finally:
+            # 진행 중인 저장소 쓰기가 끝날 때까지 기다려, 사이클 종료 후의 인덱스 영속화와 겹치지 않도록 함
+            self._storage_executor.shutdown(wait=True)
+
+    async def _run(self, products):
+
+        # [Smart Mute 로직] 현재 데이터베이스에 등록된 상품 목록을 조회하여 신규 상품 여부 판별
+        # 신규 상품 등록 시 수백 건의 과거 리뷰가 한꺼번에 유입되므로,
+        # 초기 구축(Initial Build) 시에만 자동으로 알림을 차단하는 지능형 뮤트 기능 적용
+        existing_products = await self._storage_call(self.storage.get_existing_product_ids)
+        self.muted = set()
+        for product in products:
+            self._product_stats(product['id'])
+            if self.first_run_mode or product['id'] not in existing_products:
+                self.muted.add(product['id'])
+            if product['id'] not in existing_products:
+                logger.info(f"   ✨ [New] {product['name']} ({product['id']}) 신규 상품 감지! 초기 DB 구축 모드로 가동합니다 (알림 OFF).",
+                            extra={'product_id': product['id']})
+
+        self.analyze_queue = asyncio.Queue(maxsize=self.analyze_queue_size)
+        self.notify_queue = asyncio.Queue(maxsize=self.notify_queue_size)
+
+        analyze_tasks = [asyncio.create_task(self._analyze_stage()) for _ in range(self.analysis_workers)]
+        notify_task = asyncio.create_task(self._notify_stage())
+        crawl_task = asyncio.create_task(self._crawl_stage(products))
+        tasks = [crawl_task] + analyze_tasks + [notify_task]
+        try:
+            # 수집 단계만 기다리면 후속 단계가 죽었을 때 크롤러가 가득 찬 큐 앞에서 영원히 대기하므로, 모든 단계를 함께 감시함
+            await self._supervise([crawl_task] + analyze_tasks, tasks)
+            await self.notify_queue.put(_DONE)
+            await self._supervise([notify_task], tasks)
+        finally:
+            # 정상 종료가 아닌 경우(취소/예외) 남아 있는 단계를 모두 정리하여 좀비 태스크를 방지함
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return self.stats
+
+    async def _supervise(self, waited, tasks):
+        """waited 단계가 모두 끝날 때까지 기다리되, tasks 중 하나라도 예외로 종료되면 즉시 그 예외를 전파함."""
+        pending = set(tasks)
+        while not all(task.done() for task in waited):
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+
+    async def _crawl_stage(self, products):
+        """공유 브라우저에서 전체 상품을 동시에 수집하며, 페이지 단위로 신규 리뷰를 저장 후 분석 큐에 전달함."""
+        crawl_results = await self.crawler.fetch_many(
+            products, max_pages=self.max_pages, storage=self.storage, on_page=self._on_page
+        )
+        for product_id, result in crawl_results.items():
+            if isinstance(result, Exception):
+                # 개별 상품의 오류가 전체 스케줄러 중단으로 번지지 않도록 예외 전파 차단
+                logger.error(f"   ❌ {self.products[product_id]['name']} 크롤링 도중 예외 발생: {result}",
+                             extra={'product_id': product_id, 'stage': "crawl"})
+                self._product_stats(product_id)['error'] = str(result)
+
+        # 수집이 끝났음을 분석 워커 수만큼 알려, 큐에 남은 묶음을 모두 처리한 뒤 종료하도록 함
+        for _ in range(self.analysis_workers):
+            await self.analyze_queue.put(_DONE)
+
+    async def _on_page(self, product_id, reviews):
+        # 데이터 무결성을 보장하기 위해 분석 전 원본 데이터를 선행 저장 (페이지 단위 일괄 쓰기)
+        # 다른 워커가 먼저 저장했거나 페이지 간에 중복된 리뷰는 제외하고, 실제 저장된 리뷰만 집계·분석하여 LLM 쿼터 중복 소모를 막음
+        reviews = await self._storage_call(self.storage.save_raw_reviews, product_id, reviews)
+        if not reviews:
+            return
+        self._product_stats(product_id)['collected'] += len(reviews)
+        # 분석 단계가 밀려 큐가 가득 차면 여기서 대기하여 크롤러의 진행 속도를 자동으로 조절함
+        with metrics.timer("pipeline_backpressure_seconds", queue="analyze"):
+            await self.analyze_queue.put((product_id, reviews))
+        metrics.set_gauge("pipeline_queue_depth", self.analyze_queue.qsize(), queue="analyze")
+
+    async def _analyze_stage(self):
+        """
+        분석 큐에서 페이지 묶음을 꺼내, 대기 중인 묶음까지 상품별로 합쳐(Micro-batching) 분석함.
+        페이지 단위로 잘게 호출하지 않고 토큰 예산 기반 배치를 최대한 채우기 위함.
+        """
+        while True:
+            item = await self.analyze_queue.get()
+            if item is _DONE:
+                return
+            grouped = {item[0]: list(item[1])}
+            finished = False
+            while not self.analyze_queue.empty():
+                extra = self.analyze_queue.get_nowait()
+                if extra is _DONE:
+                    finished = True
+                    break
+                grouped.setdefault(extra[0], []).extend(extra[1])
+
+            for product_id, reviews in grouped.items():
+                try:
+                    await self._analyze_product_reviews(product_id, reviews)
+                except Exception as e:
+                    # 분석/저장 오류가 워커를 종료시키면 큐가 비워지지 않아 수집 단계까지 멈추므로, 묶음 단위로 격리함
+                    # (분석 결과가 반영되지 않은 행은 미분석 상태로 남아 백로그 워커가 다시 처리함)
+                    logger.error(f"   ❌ [{product_id}] 분석 단계 예외 발생: {e}", extra={'product_id': product_id, 'stage': "analyze"})
+                    metrics.inc("pipeline_analyze_errors_total", product=product_id)
+                    self._product_stats(product_id)['error'] = str(e)
+            if finished:
+                return
+
+    async def _analyze_product_reviews(self, product_id, reviews):
+        product = self.products[product_id]
+        raw_text_map = {item['id']: item['content'] for item in reviews}
+        batch_input = [{'id': r_id, 'text': text} for r_id, text in raw_text_map.items()]
+
+        # [근사 중복 제거] 템플릿/복붙 리뷰는 대표 1건만 분석하고 나머지는 대표의 결과를 복사함
+        followers, reused = {}, {}
+        if self.review_filter is not None:
+            batch_input, followers, reused = self.review_filter.group_near_duplicates(product_id, batch_input)
+            deduplicated = len(reused) + sum(len(ids) for ids in followers.values())
+            self._product_stats(product_id)['deduplicated'] += deduplicated
+            metrics.inc("prefilter_near_duplicates_total", deduplicated, product=product_id)
+
+        analysis_results = []
+        if batch_input:
+            logger.info(f"   🧠 [{product_id}] Gemini AI 분석 중 ({len(batch_input)}건)...",
+                        extra={'product_id': product_id, 'stage': "analyze", 'reviews': len(batch_input)})
+            # 토큰 예산 기반 배치 + 누락 항목 재요청 + Rate Limiter가 내장된 프로세서를 통해 분석함
+            with metrics.timer("pipeline_analyze_seconds", product=product_id):
+                analysis_results = await self.processor.analyze_reviews_async(batch_input)
+        if self.review_filter is not None:
+            self.review_filter.remember_results(
+                product_id, [item['id'] for item in batch_input],
+                {result['id']: result for result in analysis_results if isinstance(result, dict) and result.get('id')}
+            )
+
+        expanded = []
+        for result in analysis_results:
+            if not isinstance(result, dict): continue
+            expanded.append(result)
+            for follower_id in followers.get(result.get('id'), ()):
+                expanded.append({**result, 'id': follower_id})
+        expanded.extend({**result, 'id': r_id} for r_id, result in reused.items())
+        if not expanded:
+            logger.warning(f"      ⚠️ [{product_id}] AI 분석 결과 수신 실패.", extra={'product_id': product_id, 'stage': "analyze"})
+            return
+
+        valid_results = {}
+        for result in expanded:
+            r_id = result.get('id')
+            if not r_id or r_id not in raw_text_map: continue
+            # 수집된 원본 텍스트와 매칭하여 최종 데이터 완성
+            result['product_name'] = product['name']
+            result['raw_text'] = raw_text_map[r_id]
+            valid_results[r_id] = result
+
+        # 묶음 단위로 DB 분석 결과 업데이트 및 상태 플래그 변경
+        await self._storage_call(self.storage.update_analysis_results, valid_results)
+        self._product_stats(product_id)['analyzed'] += len(valid_results)
+        metrics.inc("pipeline_analyzed_reviews_total", len(valid_results), product=product_id)
+
+        # [Smart Mute 적용] 실시간 모드일 때만 비개발 조직(CS팀)으로 알림 전송
+        if product_id not in self.muted:
+            for result in valid_results.values():
+                await self.notify_queue.put((product_id, result))
+            metrics.set_gauge("pipeline_queue_depth", self.notify_queue.qsize(), queue="notify")
+
+    async def _notify_stage(self):
+        """분석 결과를 슬랙 전송 큐로 넘김 (실제 전송/Rate Limit/재시도는 Notifier의 백그라운드 워커가 담당)."""
+        while True:
+            item = await self.notify_queue.get()
+            if item is _DONE:
+                return
+            product_id, result = item
+            self.notifier.enqueue(result)
+            self._product_stats(product_id)['notified'] += 1
@@ -1,35 +1,109 @@
-from google import genai
+import re
 import yaml
 import json
-import time
+import asyncio
+
+from src.rate_limiter import RateLimiter
+from src.analysis_cache import AnalysisCache
+from src.response_parser import RESPONSE_SCHEMA, parse_analysis_response, validate_record
+from src.metrics import metrics
+from src.log import get_logger
+
+logger = get_logger("processor")
+
+# 프롬프트(분석 가이드/출력 형식)를 수정할 때마다 버전을 올려 이전 프롬프트로 생성된 캐시가 재사용되지 않도록 함
+PROMPT_VERSION = "v2"
+
+# 배치 패킹 시 토큰 추정에 사용하는 상수 (리뷰 1건당 JSON 구조/ID 오버헤드, 분석 결과 1건의 출력 토큰)
+INPUT_TOKENS_PER_ITEM_OVERHEAD = 25
+OUTPUT_TOKENS_PER_REVIEW = 60
 
 class ReviewProcessor:
     """
     수집된 리뷰 데이터를 LLM(Gemini)을 통해 의미론적으로 분석하는 엔진입니다.
     Batch 처리를 통한 비용 최적화와 지수 백오프 기반의 장애 복구 로직이 적용되었습니다. [cite: 165, 166]
+    여러 배치를 동시에 요청하되, RPM/TPM 한도를 지키는 Token Bucket으로 호출량을 제어합니다.
     """
-    def __init__(self):
+    def __init__(self, config=None, client=None):
         # 유연한 모델 교체 및 보안 관리를 위해 설정을 외부화함 [cite: 85]
-        with open("config/settings.yaml", "r", encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
-        
-        # Google GenAI 최신 SDK(v1.0+) 클라이언트 초기화
-        self.client = genai.Client(api_key=self.config['gemini']['api_key'])
+        if config is None:
+            with open("config/settings.yaml", "r", encoding='utf-8') as f:
+                config = yaml.safe_load(f)
+        self.config = config
+        gemini_config = self.config['gemini']
+
+        # Google GenAI 최신 SDK(v1.0+) 클라이언트는 첫 분석 요청 시 생성함 (client 속성 참고)
+        # (테스트/벤치마크 환경에서는 동일한 인터페이스의 스텁 클라이언트를 주입할 수 있음)
+        self._client = client
         # 환경에 따라 다른 모델(Flash/Pro 등)을 적용할 수 있도록 설정값 주입
-        self.model_name = self.config['gemini']['model_name']
+        self.model_name = gemini_config['model_name']
+
+        # [Rate Limit] 요금제별 분당 요청 수(RPM)/토큰 수(TPM) 한도와 동시 요청 수를 설정으로 관리함
+        # 순간 허용량(burst)을 1분 한도 전체로 두면 기동 직후 RPM 한도만큼 요청이 몰려 429를 유발하므로 명시적으로 작게 설정함
+        # (토큰 버킷은 최대 배치 1건의 입력+출력 토큰을 담을 수 있는 크기를 기본값으로 사용)
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=gemini_config.get('requests_per_minute', 15),
+            tokens_per_minute=gemini_config.get('tokens_per_minute', 1000000),
+            request_burst=gemini_config.get('request_burst', 1),
+            token_burst=gemini_config.get(
+                'token_burst',
+                gemini_config.get('max_input_tokens_per_batch', 6000) + gemini_config.get('max_output_tokens_per_batch', 4000)
+            )
+        )
+        self.max_concurrency = gemini_config.get('max_concurrency', 4)
+        self._semaphore = None
+        self.max_retries = gemini_config.get('max_retries', 5)
+        self.base_wait_time = 2 # 초기 대기 시간 2초
+
+        # [적응형 배치] 고정 건수 대신 입력/출력 토큰 예산에 맞춰 배치를 구성함 (짧은 리뷰는 더 크게 묶음)
+        self.max_input_tokens_per_batch = gemini_config.get('max_input_tokens_per_batch', 6000)
+        self.max_output_tokens_per_batch = gemini_config.get('max_output_tokens_per_batch', 4000)
+        self.max_reviews_per_batch = gemini_config.get('max_reviews_per_batch', 60)
+        # 응답에서 누락/손상된 항목만 재요청하는 부분 복구 라운드 수
+        self.max_partial_retries = gemini_config.get('max_partial_retries', 3)
+        self.prompt_overhead_tokens = self.estimate_tokens(self._build_prompt([]))
+        # [Structured Output] 응답 스키마(enum/필수 필드)를 모델에 전달하여 형식이 보장된 JSON을 요청함
+        self.structured_output = gemini_config.get('structured_output', True)
 
-    def analyze_reviews_batch(self, reviews):
+        # [비용 최적화] 동일 본문의 재분석을 막는 디스크 캐시 (DB 초기화/상품 재등록/타 상품 중복 본문 대응)
+        cache_config = gemini_config.get('cache', {}) or {}
+        self.cache = None
+        if cache_config.get('enabled', True):
+            self.cache = AnalysisCache(
+                filepath=cache_config.get('path', "data/llm_cache.db"),
+                max_entries=cache_config.get('max_entries', 200000),
+                max_age_days=cache_config.get('max_age_days', 90),
+                evict_every=cache_config.get('evict_every', 100)
+            )
+
+    def close(self):
+        """분석 캐시의 SQLite 연결을 닫음. 교체·종료되는 프로세서에 대해 호출함."""
+        if self.cache is not None:
+            self.cache.close()
+
+    @property
+    def client(self):
         """
-        N개의 리뷰를 하나의 컨텍스트로 묶어 처리함으로써 API 호출 횟수와 토큰 비용을 최적화함. 
-        reviews: [{'id': '...', 'text': '...'}, ...] 형태의 리스트
+        GenAI 클라이언트를 최초 사용 시 생성함.
+        SDK 로딩(수백 ms)을 실제 분석 요청 시점으로 미뤄, 분석할 리뷰가 없는 사이클/CLI 실행은 SDK를 불러오지 않음.
         """
-        if not reviews:
-            return []
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=self.config['gemini']['api_key'])
+        return self._client
+
+    def estimate_tokens(self, text):
+        """
+        TPM 한도 계산을 위한 보수적인 토큰 수 추정치.
+        한글은 대략 1~2자당 1토큰으로 계산되므로 글자 수의 절반을 하한으로 사용함.
+        """
+        return max(1, len(text) // 2)
 
+    def _build_prompt(self, reviews):
         # LLM으로부터 구조화된 데이터(JSON)를 안정적으로 얻기 위한 프롬프트 엔지니어링 수행
-        prompt = f"""
+        return f"""
         다음은 고객 리뷰 데이터입니다. 각 리뷰를 분석하여 JSON 형식으로 반환하세요.
-        
+
         [분석 가이드]
         1. category: 배송, 제품품질, 가격, 서비스, 기타 중 하나
         2. sentiment: 긍정, 부정, 중립 중 하나
@@ -44,39 +118,211 @@ class ReviewProcessor:
             {{"id": "리뷰ID", "category": "배송", "sentiment": "부정", "urgency": 4, "summary": "배송이 너무 늦음"}},
             ...
         ]
-        
+
         반드시 JSON 리스트만 출력하세요. 마크다운 태그(```json)는 쓰지 마세요.
         """
 
-        # [Resilience] 외부 API의 일시적 장애(503) 및 Rate Limit에 대응하기 위한 재시도 설계 
-        max_retries = 5 
-        base_wait_time = 2 # 초기 대기 시간 2초
+    def _parse_response(self, response):
+        """
+        응답을 분석 결과 리스트로 변환하여 후속 모듈(storage/notifier)로 전달함.
+        잘리거나 일부가 손상된 응답에서도 완결된 레코드는 구제하고, 허용값 검증을 통과한 항목만 반환함.
+        """
+        return parse_analysis_response(response.text)
+
+    def _generation_config(self):
+        if not self.structured_output:
+            return None
+        return {"response_mime_type": "application/json", "response_schema": RESPONSE_SCHEMA}
+
+    def pack_batches(self, reviews, scale=1.0):
+        """
+        리뷰를 입력/출력 토큰 예산과 최대 건수 내에서 순서대로 채워 넣어 배치를 구성함 (Greedy Packing).
+        scale: 예산 축소 비율 — 재요청 라운드마다 배치를 작게 나누어 문제 항목을 격리하는 데 사용함.
+        단일 리뷰가 예산을 초과하더라도 단독 배치로 전송하여 누락되지 않도록 함.
+        """
+        max_input = (self.max_input_tokens_per_batch - self.prompt_overhead_tokens) * scale
+        max_output = self.max_output_tokens_per_batch * scale
+        max_items = max(1, int(self.max_reviews_per_batch * scale))
+
+        batches, current, input_tokens, output_tokens = [], [], 0, 0
+        for review in reviews:
+            item_input = self.estimate_tokens(review['text']) + INPUT_TOKENS_PER_ITEM_OVERHEAD
+            if current and (
+                input_tokens + item_input > max_input
+                or output_tokens + OUTPUT_TOKENS_PER_REVIEW > max_output
+                or len(current) >= max_items
+            ):
+                batches.append(current)
+                current, input_tokens, output_tokens = [], 0, 0
+            current.append(review)
+            input_tokens += item_input
+            output_tokens += OUTPUT_TOKENS_PER_REVIEW
+        if current:
+            batches.append(current)
+        return batches
 
-        for attempt in range(max_retries):
+    def _retry_after_seconds(self, error):
+        """
+        API 오류에 포함된 서버 측 재시도 힌트(Retry-After 헤더, RetryInfo.retryDelay)를 초 단위로 추출함.
+        힌트가 없으면 None을 반환하여 지수 백오프를 따르도록 함.
+        """
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        retry_after = headers.get('Retry-After') or headers.get('retry-after')
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        match = re.search(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", str(error))
+        if match:
+            return float(match.group(1))
+        return None
+
+    def _is_rate_limited(self, error):
+        return getattr(error, 'code', None) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+    async def analyze_reviews_batch_async(self, reviews):
+        """
+        단일 배치를 비동기로 분석함. Rate Limiter로 호출 시점을 조절하고,
+        실패 시 해당 요청만 독립적으로 백오프하므로 다른 배치의 진행을 막지 않음.
+        """
+        if not reviews:
+            return []
+
+        prompt = self._build_prompt(reviews)
+        estimated_tokens = self.estimate_tokens(prompt)
+        # Gemini의 TPM 한도는 입력과 출력 토큰을 합산하므로, 예상 출력 토큰까지 포함하여 예약함
+        reserved_tokens = estimated_tokens + OUTPUT_TOKENS_PER_REVIEW * len(reviews)
+
+        for attempt in range(self.max_retries):
+            with metrics.timer("llm_rate_limit_wait_seconds"):
+                await self.rate_limiter.acquire_async(reserved_tokens)
+            if attempt:
+                metrics.inc("llm_retries_total")
             try:
                 # 비정형 데이터를 정형 데이터로 변환하는 핵심 인지 로직 실행
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
-                )
-                
-                # LLM 응답 텍스트에 포함될 수 있는 불필요한 마크다운 태그 정제(Cleaning)
-                text = response.text.strip()
-                if text.startswith("```json"):
-                    text = text[7:]
-                if text.endswith("```"):
-                    text = text[:-3]
-                
-                # 정제된 텍스트를 파이썬 객체로 변환하여 후속 모듈(storage/notifier)로 전달
-                return json.loads(text)
+                with metrics.timer("llm_request_seconds"):
+                    response = await self.client.aio.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt,
+                        config=self._generation_config()
+                    )
+                metrics.inc("llm_requests_total", outcome="ok")
+                metrics.inc("llm_input_tokens_total", estimated_tokens)
+                usage = getattr(response, 'usage_metadata', None)
+                if getattr(usage, 'candidates_token_count', None):
+                    metrics.inc("llm_output_tokens_total", usage.candidates_token_count)
+                # 응답 형식 오류는 동일 요청을 반복해도 개선되지 않으므로 재시도하지 않고 구제 가능한 레코드만 반환함
+                # (누락 항목은 더 작은 배치로 재요청하는 부분 복구 로직(analyze_reviews_async)에 위임함)
+                results = self._parse_response(response)
+                if len(results) < len(reviews):
+                    logger.warning(f"      ⚠️ 응답 일부 누락/손상: {len(reviews)}건 중 {len(results)}건만 유효합니다.",
+                                   extra={'requested': len(reviews), 'valid': len(results)})
+                    metrics.inc("llm_incomplete_responses_total")
+                return results
 
             except Exception as e:
-                # [Exponential Backoff] 실패 시 대기 시간을 지수적으로 늘려(2s -> 4s -> 8s...) 
-                # 대상 서버의 부하를 방지하고 성공 확률을 높임 
-                wait_time = base_wait_time * (2 ** attempt)
-                print(f"      ⚠️ API 오류 발생 ({e})... {wait_time}초 후 재시도 ({attempt + 1}/{max_retries})")
-                time.sleep(wait_time)
-        
+                # [Exponential Backoff] 서버가 재시도 시점을 지시했다면 이를 우선 따르고,
+                # 없다면 대기 시간을 지수적으로 늘려(2s -> 4s -> 8s...) 대상 서버의 부하를 방지함
+                retry_after = self._retry_after_seconds(e)
+                wait_time = retry_after if retry_after is not None else self.base_wait_time * (2 ** attempt)
+                metrics.inc("llm_requests_total", outcome="error")
+                if self._is_rate_limited(e):
+                    # 한도 초과는 모든 동시 요청에 공통으로 해당하므로 공유 버킷에도 대기를 반영함
+                    self.rate_limiter.penalize(wait_time)
+                    metrics.inc("llm_rate_limited_total")
+                logger.warning(f"      ⚠️ API 오류 발생 ({e})... {wait_time}초 후 재시도 ({attempt + 1}/{self.max_retries})",
+                               extra={'attempt': attempt + 1, 'wait_seconds': wait_time})
+                await asyncio.sleep(wait_time)
+
         # 최대 재시도 횟수 초과 시, 시스템 전체 중단을 막기 위해 에러 로깅 후 해당 배치 건너뜀
-        print(f"      ❌ 최종 실패: {len(reviews)}건의 리뷰 분석을 건너뜁니다.")
-        return []
\ No newline at end of file
+        logger.error(f"      ❌ 최종 실패: {len(reviews)}건의 리뷰 분석을 건너뜁니다.", extra={'reviews': len(reviews)})
+        metrics.inc("llm_failed_batches_total")
+        return []
+
+    def _request_slots(self):
+        """
+        프로세서 단위로 공유하는 동시 요청 세마포어를 반환함.
+        파이프라인 분석 워커 여러 개와 백로그 작업이 같은 프로세서를 호출해도 진행 중인 Gemini 요청 수는 max_concurrency를 넘지 않음.
+        이벤트 루프에 바인딩되도록 최초 사용 시점(루프 실행 중)에 생성함.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _analyze_packed_async(self, batches):
+        """여러 배치를 동시에 요청함 (동시 요청 수는 호출자 수와 무관하게 프로세서 전체에서 max_concurrency로 제한)."""
+        async def run(batch):
+            async with self._request_slots():
+                return await self.analyze_reviews_batch_async(batch)
+
+        return await asyncio.gather(*(run(batch) for batch in batches))
+
+    async def _analyze_with_recovery_async(self, reviews):
+        """
+        토큰 예산으로 패킹한 배치를 동시에 요청한 뒤, 응답에 포함된 ID를 요청한 ID와 대조하여
+        누락되거나 손상된 항목만 점점 더 작은 배치로 재요청함. {review_id: result}를 반환함.
+        """
+        results = {}
+        pending = list(reviews)
+        scale = 1.0
+        for round_no in range(self.max_partial_retries + 1):
+            batches = self.pack_batches(pending, scale)
+            for batch, batch_results in zip(batches, await self._analyze_packed_async(batches)):
+                sent_ids = {review['id'] for review in batch}
+                for result in batch_results or []:
+                    record = validate_record(result)
+                    if record is not None and record['id'] in sent_ids:
+                        results[record['id']] = record
+
+            pending = [review for review in pending if review['id'] not in results]
+            if not pending:
+                break
+            if round_no < self.max_partial_retries:
+                logger.info(f"      🔁 누락/손상 항목 {len(pending)}건만 재요청합니다 ({round_no + 1}/{self.max_partial_retries})",
+                            extra={'pending': len(pending), 'round': round_no + 1})
+                metrics.inc("llm_partial_retry_items_total", len(pending))
+            scale /= 2
+
+        if pending:
+            logger.error(f"      ❌ 최종 누락: {len(pending)}건은 분석 미완료(N) 상태로 남습니다.", extra={'pending': len(pending)})
+            metrics.inc("llm_unanalyzed_reviews_total", len(pending))
+        return results
+
+    async def analyze_reviews_async(self, reviews):
+        """
+        리뷰 목록 전체를 분석하는 상위 진입점.
+        1) 캐시에 적중한 리뷰는 API 호출 없이 결과를 재사용하고, 동일 본문은 대표 1건만 요청함
+        2) 나머지는 토큰 예산 기반으로 패킹하여 동시에 요청하고, 누락 항목만 재요청함
+        반환값은 입력 순서를 유지한 분석 결과 리스트임 (최종 실패 항목은 제외).
+        """
+        if not reviews:
+            return []
+        if self.cache is None:
+            results = await self._analyze_with_recovery_async(reviews)
+            return [results[review['id']] for review in reviews if review['id'] in results]
+
+        key_of = {review['id']: self.cache.make_key(review['text'], self.model_name, PROMPT_VERSION) for review in reviews}
+        cached = await self.cache.get_many_async(key_of.values())
+
+        # 캐시 미스 리뷰 중 본문이 같은 리뷰는 대표 1건만 요청하고 결과를 공유함
+        misses = {}
+        for review in reviews:
+            key = key_of[review['id']]
+            if key not in cached and key not in misses:
+                misses[key] = {'id': review['id'], 'text': review['text']}
+
+        metrics.inc("llm_cache_hits_total", sum(1 for key in key_of.values() if key in cached))
+        metrics.inc("llm_cache_misses_total", len(misses))
+
+        fresh = {}
+        if misses:
+            logger.info(f"      💾 캐시/중복 재사용 {len(reviews) - len(misses)}건, API 요청 {len(misses)}건",
+                        extra={'reused': len(reviews) - len(misses), 'requested': len(misses)})
+            results = await self._analyze_with_recovery_async(list(misses.values()))
+            fresh = {key_of[r_id]: {k: v for k, v in result.items() if k != 'id'} for r_id, result in results.items()}
+            await self.cache.put_many_async(fresh)
+
+        merged = {**cached, **fresh}
+        return [{**merged[key_of[review['id']]], 'id': review['id']} for review in reviews if key_of[review['id']] in merged]
@@ -0,0 +1,153 @@
+import random
+from datetime import datetime, timedelta
+
+class ProductScheduler:
+    """
+    상품별 리뷰 유입 속도(Review Velocity)에 따라 수집 주기를 개별적으로 조정하는 우선순위 스케줄러입니다.
+    리뷰가 활발한 베스트셀러/신상품은 짧은 주기로, 리뷰가 끊긴 상품은 긴 주기로 수집하여
+    한정된 브라우저 수집 예산을 실제로 리뷰가 발생하는 곳에 집중합니다.
+    """
+    def __init__(self, min_interval_minutes=10, max_interval_minutes=360, initial_interval_minutes=30,
+                 target_new_reviews_per_crawl=5, stale_after_hours=72, jitter=0.1,
+                 max_products_per_cycle=None, smoothing=0.3, activity_window_hours=168, initial_burst_minutes=None):
+        self.min_interval = timedelta(minutes=min_interval_minutes)
+        self.max_interval = timedelta(minutes=max_interval_minutes)
+        # 이력이 없는 상품(신규 등록 등)은 기존 고정 주기로 시작하여 관측값이 쌓이면 점차 조정함
+        self.initial_interval = timedelta(minutes=initial_interval_minutes)
+        # 1회 수집 시 기대하는 신규 리뷰 수: 유입 속도가 2배가 되면 주기는 절반이 됨
+        self.target_new_reviews_per_crawl = target_new_reviews_per_crawl
+        self.stale_after = timedelta(hours=stale_after_hours)
+        self.jitter = jitter
+        # 한 사이클에서 동시에 수집할 최대 상품 수 (전역 수집 예산), None이면 제한 없음
+        self.max_products_per_cycle = max_products_per_cycle
+        # 지수 가중 이동 평균(EWMA) 계수: 클수록 최근 관측값에 민감하게 반응함
+        self.smoothing = smoothing
+        self.activity_window = timedelta(hours=activity_window_hours)
+        # 최초 수집(초기 구축/백로그) 시 한꺼번에 저장된 리뷰는 실제 유입이 아니므로 속도 추정에서 제외하는 구간
+        # (기본값은 백로그의 초기 구축분 판별 기준과 같은 '최소 수집 주기 × (1 - jitter)')
+        if initial_burst_minutes is None:
+            initial_burst_minutes = min_interval_minutes * (1 - jitter)
+        self.initial_burst = timedelta(minutes=initial_burst_minutes)
+
+        self.states = {}
+
+    def _state(self, product_id):
+        return self.states.setdefault(product_id, {
+            'rate': None,          # 시간당 신규 리뷰 수 (EWMA)
+            'error_rate': 0.0,     # 수집 실패 비율 (EWMA)
+            'last_crawled': None,
+            'last_change': None,   # 마지막으로 신규 리뷰가 발견된 시각
+            'next_due': None,
+            'interval': self.initial_interval,
+        })
+
+    def bootstrap(self, storage, products, now=None):
+        """
+        저장소의 수집 시각(date_collected)으로부터 상품별 최근 유입 속도와 마지막 변경 시각을 복원함.
+        재시작 직후에도 과거 이력을 반영한 주기로 수집하며, 모든 상품은 즉시 1회 수집 대상으로 등록됨.
+        """
+        now = now or datetime.now()
+        since = now - self.activity_window
+        activity = storage.get_product_activity(since, initial_window=self.initial_burst)
+        for product in products:
+            state = self._state(product['id'])
+            stats = activity.get(product['id'])
+            if stats:
+                state['rate'] = self._seed_rate(stats, since, now)
+                state['last_change'] = stats['last_collected']
+            state['interval'] = self._compute_interval(state, now)
+            # 서버 재시작 시 데이터 공백을 막기 위해 첫 사이클에는 전 상품을 수집 대상으로 둠
+            state['next_due'] = now
+
+    def _seed_rate(self, stats, since, now):
+        """
+        집계 기간 내 수집 건수로 시간당 유입 속도의 초기값을 추정함.
+        최초 수집이 집계 기간 안에 있으면 초기 구축분(과거 리뷰 일괄 저장)을 빼고 그 이후 기간만으로 속도를 계산하며,
+        초기 구축 이후 관측 기간이 없으면 None을 반환하여 기본 주기로 시작함.
+        """
+        first_collected = stats.get('first_collected')
+        if first_collected is None or first_collected < since:
+            return stats['recent_count'] / (self.activity_window.total_seconds() / 3600)
+        observed_hours = (now - (first_collected + self.initial_burst)).total_seconds() / 3600
+        if observed_hours <= 0:
+            return None
+        return max(stats['recent_count'] - stats.get('initial_count', 0), 0) / max(observed_hours, 1.0)
+
+    def _compute_interval(self, state, now):
+        """유입 속도 → 기본 주기 산출 후, 장기 무변동 상품은 늘리고 오류가 잦은 상품은 백오프함."""
+        if state['rate'] is None:
+            interval = self.initial_interval
+        elif state['rate'] <= 0:
+            interval = self.max_interval
+        else:
+            interval = timedelta(hours=self.target_new_reviews_per_crawl / state['rate'])
+
+        # 오랫동안 신규 리뷰가 없는 상품은 무변동 기간에 비례하여 주기를 늘림
+        if state['last_change'] and now - state['last_change'] > self.stale_after:
+            interval *= (now - state['last_change']) / self.stale_after
+
+        # 차단/장애가 반복되는 상품에 수집 예산을 낭비하지 않도록 오류율에 따라 주기를 최대 4배까지 늘림
+        interval *= 1 + 3 * state['error_rate']
+
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def record_result(self, product_id, new_count, error=None, now=None):
+        """1회 수집 결과(신규 리뷰 수/오류 여부)를 반영하여 다음 수집 예정 시각을 갱신함."""
+        now = now or datetime.now()
+        state = self._state(product_id)
+        alpha = self.smoothing
+
+        state['error_rate'] = (1 - alpha) * state['error_rate'] + alpha * (1.0 if error else 0.0)
+        # 실패한 수집은 유입량을 관측하지 못한 것이므로 속도 추정에 반영하지 않음
+        if not error and state['last_crawled']:
+            elapsed_hours = max((now - state['last_crawled']).total_seconds() / 3600, 1 / 60)
+            observed = new_count / elapsed_hours
+            state['rate'] = observed if state['rate'] is None else (1 - alpha) * state['rate'] + alpha * observed
+        if not error and new_count:
+            state['last_change'] = now
+        if not error:
+            state['last_crawled'] = now
+
+        interval = self._compute_interval(state, now)
+        state['interval'] = interval
+        # 다수 상품의 수집 시각이 한 시점에 몰리지 않도록 ±jitter 비율만큼 분산시킴
+        spread = interval.total_seconds() * self.jitter
+        state['next_due'] = now + interval + timedelta(seconds=random.uniform(-spread, spread))
+        return state['next_due']
+
+    def _priority(self, state, now):
+        """마지막 수집 이후 쌓였을 것으로 예상되는 리뷰 수가 많은 상품을 우선 수집함."""
+        # 재시작 직후에는 수집 시각 기록이 없으므로 마지막 변경 시각을 대신 기준으로 삼음
+        since = state['last_crawled'] or state['last_change']
+        if since is None or state['rate'] is None:
+            return float('inf')
+        return state['rate'] * (now - since).total_seconds() / 3600
+
+    def due_products(self, products, now=None):
+        """수집 예정 시각이 지난 상품을 우선순위 순으로 반환함 (전역 수집 예산 초과분은 다음 사이클로 이월)."""
+        now = now or datetime.now()
+        due = []
+        for product in products:
+            state = self._state(product['id'])
+            if state['next_due'] is None:
+                state['next_due'] = now
+            if state['next_due'] <= now:
+                due.append(product)
+        due.sort(key=lambda p: self._priority(self.states[p['id']], now), reverse=True)
+        if self.max_products_per_cycle:
+            due = due[:self.max_products_per_cycle]
+        return due
+
+    def next_wakeup(self, now=None, product_ids=None):
+        """
+        가장 먼저 수집 예정인 상품의 시각을 반환함 (상태가 없는 상품은 즉시 수집 대상이므로 now).
+        product_ids를 지정하면 해당 상품(워커가 담당하는 상품 등)만 고려함.
+        """
+        now = now or datetime.now()
+        if product_ids is None:
+            product_ids = list(self.states)
+        pending = []
+        for product_id in product_ids:
+            state = self.states.get(product_id)
+            pending.append(state['next_due'] if state and state['next_due'] is not None else now)
+        return min(pending) if pending else now
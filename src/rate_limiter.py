@@ -0,0 +1,82 @@
+import time
+import asyncio
+import threading
+
+class TokenBucket:
+    """
+    초당 일정량씩 토큰이 채워지는 버킷으로 요청량을 평탄화하는 고전적인 Rate Limiter입니다.
+    스레드 안전하게 구현되어 동기(스레드) 코드와 비동기(asyncio) 코드에서 모두 사용할 수 있습니다.
+    """
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_second = rate_per_minute / 60.0
+        # 버스트 허용량: 기본적으로 1분 한도 전체를 순간적으로 사용할 수 있도록 함
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def reserve(self, amount=1):
+        """
+        토큰을 예약하고, 예약분을 사용하기까지 기다려야 하는 시간(초)을 반환함.
+        잔량을 음수까지 차감하는 방식이므로 동시에 대기하는 요청들이 공정하게 순서대로 배분받음.
+        """
+        amount = min(float(amount), self.capacity)  # 단일 요청이 버킷 용량을 넘어 영원히 대기하는 상황 방지
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+    def penalize(self, seconds):
+        """서버가 Retry-After 등으로 대기를 지시한 경우, 해당 시간만큼 버킷을 비워 후속 요청도 함께 늦춤."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate_per_second)
+
+
+class RateLimiter:
+    """
+    분당 요청 수(RPM)와 분당 토큰 수(TPM) 한도를 동시에 만족시키는 복합 Rate Limiter입니다.
+    한도를 None으로 지정한 항목은 제한하지 않습니다.
+    request_burst/token_burst: 각 버킷의 순간 허용량 (None이면 1분 한도 전체를 한꺼번에 사용할 수 있음)
+    """
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, request_burst=None, token_burst=None):
+        self.request_bucket = TokenBucket(requests_per_minute, request_burst) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute, token_burst) if tokens_per_minute else None
+
+    def _reserve(self, tokens):
+        wait = 0.0
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket and tokens:
+            wait = max(wait, self.token_bucket.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens=0):
+        """동기 코드용: 한도 내로 들어올 때까지 현재 스레드를 대기시킴. 실제 대기한 시간(초)을 반환함."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=0):
+        """비동기 코드용: 이벤트 루프를 차단하지 않고 한도 내로 들어올 때까지 대기함."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def penalize(self, seconds):
+        """
+        서버가 대기를 지시한 경우 두 버킷을 모두 비움.
+        TPM 한도만 설정한 경우에도 429/Retry-After가 후속 요청을 늦추도록 토큰 버킷에도 같은 시간만큼 반영함.
+        """
+        for bucket in (self.request_bucket, self.token_bucket):
+            if bucket:
+                bucket.penalize(seconds)
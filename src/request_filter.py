@@ -0,0 +1,90 @@
+import re
+
+# 리뷰 텍스트 수집과 무관하지만 대역폭/메모리를 가장 많이 점유하는 리소스 유형
+# (stylesheet는 레이아웃 기반 지연 로딩 트리거에 영향을 줄 수 있어 기본 차단 대상에서 제외함)
+DEFAULT_BLOCK_RESOURCE_TYPES = ["image", "media", "font"]
+
+# 분석/광고/트래킹 스크립트 URL 패턴
+DEFAULT_BLOCK_URL_PATTERNS = [
+    r"google-analytics\.com", r"googletagmanager\.com", r"doubleclick\.net",
+    r"googlesyndication\.com", r"adservice\.google", r"connect\.facebook\.net",
+    r"facebook\.com/tr", r"hotjar\.com", r"clarity\.ms", r"criteo\.(com|net)",
+    r"t1\.daumcdn\.net/kas", r"analytics\.tiktok\.com", r"wcs\.naver\.net",
+]
+
+# 차단한 요청은 응답이 오지 않아 실제 크기를 알 수 없으므로, 절감량은 '차단 건수 × 유형별 가정 크기'로 계산한 추정치임 (bytes)
+# 같은 유형이 허용된 응답(URL 패턴으로만 차단되는 script 등, 또는 allow_url_patterns로 풀린 이미지)이 관측되면 그 평균 크기를 쓰고,
+# 기본 차단 유형(image/media/font)은 대개 관측되지 않으므로 아래 가정값이 그대로 쓰임 (실측이 아닌 대략적인 규모 확인용)
+DEFAULT_SIZE_ESTIMATES = {
+    "image": 60_000, "media": 500_000, "font": 40_000,
+    "script": 30_000, "stylesheet": 20_000, "other": 5_000,
+}
+
+class RequestFilter:
+    """
+    브라우저 컨텍스트 단위로 요청을 가로채 리뷰 수집에 불필요한 리소스를 차단하는 라우팅 레이어입니다.
+    리소스 유형과 URL 패턴으로 차단하되, 상품별 허용 목록(Allow-list)으로 예외를 지정할 수 있으며,
+    절감된 요청 수와 추정 바이트 수(유형별 가정 크기 기반의 추정치)를 집계하여 효과를 대략적으로 확인할 수 있도록 합니다.
+    """
+    def __init__(self, block_resource_types=None, block_url_patterns=None, enabled=True):
+        self.enabled = enabled
+        self.block_resource_types = set(DEFAULT_BLOCK_RESOURCE_TYPES if block_resource_types is None else block_resource_types)
+        patterns = DEFAULT_BLOCK_URL_PATTERNS if block_url_patterns is None else block_url_patterns
+        self.block_url_regex = re.compile("|".join(patterns)) if patterns else None
+
+        self.blocked_requests = 0
+        self.allowed_requests = 0
+        self.blocked_by_type = {}
+        self.estimated_bytes_saved = 0
+        self._observed_sizes = {}  # resource_type -> (총 바이트, 응답 수)
+
+    def should_block(self, url, resource_type, allow_regex=None):
+        if allow_regex and allow_regex.search(url):
+            return False
+        if resource_type in self.block_resource_types:
+            return True
+        return bool(self.block_url_regex and self.block_url_regex.search(url))
+
+    def _estimate_size(self, resource_type):
+        total, count = self._observed_sizes.get(resource_type, (0, 0))
+        if count:
+            return total // count
+        return DEFAULT_SIZE_ESTIMATES.get(resource_type, DEFAULT_SIZE_ESTIMATES["other"])
+
+    async def attach(self, context, allow_url_patterns=None):
+        """
+        컨텍스트의 모든 요청에 라우팅 핸들러를 등록함.
+        allow_url_patterns: 특정 상품에서만 차단을 해제할 URL 정규식 리스트 (예: 리뷰 이미지 CDN)
+        """
+        if not self.enabled: return
+        allow_regex = re.compile("|".join(allow_url_patterns)) if allow_url_patterns else None
+
+        async def handle_route(route):
+            request = route.request
+            if self.should_block(request.url, request.resource_type, allow_regex):
+                self.blocked_requests += 1
+                self.blocked_by_type[request.resource_type] = self.blocked_by_type.get(request.resource_type, 0) + 1
+                self.estimated_bytes_saved += self._estimate_size(request.resource_type)
+                await route.abort()
+            else:
+                self.allowed_requests += 1
+                await route.continue_()
+
+        def on_response(response):
+            # 허용된 응답의 실제 크기를 관측하여 같은 유형의 차단 절감량 추정에 사용함 (차단된 유형은 관측되지 않음)
+            length = response.headers.get("content-length")
+            if length and length.isdigit():
+                resource_type = response.request.resource_type
+                total, count = self._observed_sizes.get(resource_type, (0, 0))
+                self._observed_sizes[resource_type] = (total + int(length), count + 1)
+
+        await context.route("**/*", handle_route)
+        context.on("response", on_response)
+
+    def stats(self):
+        return {
+            'blocked_requests': self.blocked_requests,
+            'allowed_requests': self.allowed_requests,
+            'blocked_by_type': dict(self.blocked_by_type),
+            'estimated_bytes_saved': self.estimated_bytes_saved,
+        }
@@ -0,0 +1,107 @@
+import json
+
+# 프롬프트의 [분석 가이드]와 동일한 허용값 — 응답 검증과 Structured Output 스키마의 단일 기준(Single Source of Truth)
+CATEGORIES = ["배송", "제품품질", "가격", "서비스", "기타"]
+SENTIMENTS = ["긍정", "부정", "중립"]
+URGENCY_RANGE = (1, 5)
+
+# Gemini Structured Output(response_schema)에 전달하는 응답 스키마 (OpenAPI 부분집합 형식)
+RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "STRING"},
+            "category": {"type": "STRING", "enum": CATEGORIES},
+            "sentiment": {"type": "STRING", "enum": SENTIMENTS},
+            "urgency": {"type": "INTEGER"},
+            "summary": {"type": "STRING"},
+        },
+        "required": ["id", "category", "sentiment", "urgency", "summary"],
+    },
+}
+
+def strip_code_fence(text):
+    """LLM 응답 텍스트에 포함될 수 있는 불필요한 마크다운 태그 정제(Cleaning)"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+def iter_json_objects(text):
+    """
+    손상되거나 중간에 잘린 JSON 배열에서 완결된 최상위 {...} 객체 문자열만 순서대로 추출함.
+    문자열 리터럴 내부의 중괄호와 이스케이프 문자를 구분하여, 본문에 괄호가 포함된 리뷰도 안전하게 처리함.
+    """
+    depth = 0
+    start = None
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield text[start : i + 1]
+
+def validate_record(record):
+    """
+    분석 결과 1건의 필드를 검증/정규화함. 허용값을 벗어난 항목은 None을 반환하여 재요청 대상으로 분류함.
+    urgency는 "4", 4.0처럼 형식만 다른 값을 정수로 보정함.
+    """
+    if not isinstance(record, dict) or not record.get('id'):
+        return None
+    category = str(record.get('category', '')).strip()
+    sentiment = str(record.get('sentiment', '')).strip()
+    if category not in CATEGORIES or sentiment not in SENTIMENTS:
+        return None
+    try:
+        urgency = int(float(record.get('urgency')))
+    except (TypeError, ValueError):
+        return None
+    if not URGENCY_RANGE[0] <= urgency <= URGENCY_RANGE[1]:
+        return None
+    summary = record.get('summary')
+    if not isinstance(summary, str):
+        return None
+    return {**record, 'id': str(record['id']), 'category': category, 'sentiment': sentiment, 'urgency': urgency, 'summary': summary.strip()}
+
+def parse_analysis_response(text):
+    """
+    LLM 응답을 분석 결과 리스트로 변환함.
+    정상 JSON이면 그대로 파싱하고(Fast Path), 손상/잘림이 있으면 완결된 레코드만 구제(Salvage)하여,
+    한 항목의 오류 때문에 배치 전체를 버리고 재요청하는 상황을 방지함. 검증을 통과한 레코드만 반환함.
+    """
+    text = strip_code_fence(text or "")
+    try:
+        parsed = json.loads(text)
+        records = parsed if isinstance(parsed, list) else [parsed]
+    except json.JSONDecodeError:
+        records = []
+        for chunk in iter_json_objects(text):
+            try:
+                records.append(json.loads(chunk))
+            except json.JSONDecodeError:
+                continue
+
+    valid = []
+    for record in records:
+        record = validate_record(record)
+        if record is not None:
+            valid.append(record)
+    return valid
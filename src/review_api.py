@@ -0,0 +1,227 @@
+import re
+import html
+import json
+import hashlib
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 리뷰 위젯이 호출하는 API 응답에서 리뷰 레코드를 식별하기 위한 필드 후보군
+# (위젯 공급사마다 필드명이 다르므로 대표적인 명명 규칙을 폭넓게 수용함)
+TEXT_KEYS = ('content', 'body', 'text', 'review', 'message', 'comment', 'contents')
+ID_KEYS = ('id', 'review_id', 'reviewId', 'review_no', 'reviewNo', 'uuid', 'no')
+DATE_KEYS = ('created_at', 'createdAt', 'created', 'date', 'reg_date', 'regDate', 'written_at')
+RATING_KEYS = ('rating', 'score', 'star', 'stars', 'grade')
+AUTHOR_KEYS = ('author', 'user_name', 'userName', 'nickname', 'writer', 'user_id', 'userId')
+
+# 페이지 번호 방식 / 오프셋 방식 페이지네이션 파라미터 후보군
+PAGE_PARAMS = ('page', 'pageNo', 'page_no', 'pageNumber', 'page_number', 'p')
+OFFSET_PARAMS = ('offset', 'start', 'from', 'skip')
+
+def _first_value(record, keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+def _is_review_record(item):
+    return isinstance(item, dict) and isinstance(_first_value(item, TEXT_KEYS), str)
+
+def find_review_list(payload, path=(), depth=0):
+    """
+    JSON 응답 내부를 재귀 탐색하여 리뷰 레코드 리스트가 위치한 경로(path)를 찾아 반환함.
+    다음 페이지 응답에서도 동일 경로로 바로 접근할 수 있도록 경로 튜플 형태로 반환하며, 없으면 None.
+    """
+    if depth > 5:
+        return None
+    if isinstance(payload, list):
+        if payload and any(_is_review_record(item) for item in payload):
+            return path
+        return None
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            found = find_review_list(value, path + (key,), depth + 1)
+            if found is not None:
+                return found
+    return None
+
+def get_by_path(payload, path):
+    """find_review_list로 찾은 경로를 따라 리뷰 리스트를 꺼냄. 구조가 달라졌다면 빈 리스트를 반환함."""
+    for key in path:
+        if not isinstance(payload, dict) or key not in payload:
+            return []
+        payload = payload[key]
+    return payload if isinstance(payload, list) else []
+
+def normalize_record(record):
+    """
+    공급사별로 상이한 API 레코드를 크롤러의 표준 레코드 형식으로 변환함.
+    upstream_id는 플랫폼이 부여한 안정적인 리뷰 ID로, 본문 수정과 무관하게 중복 판별에 사용됨.
+    """
+    text = _first_value(record, TEXT_KEYS)
+    if not isinstance(text, str):
+        text = ''
+    upstream_id = _first_value(record, ID_KEYS)
+    author = _first_value(record, AUTHOR_KEYS)
+    if isinstance(author, dict):
+        author = _first_value(author, ('name', 'nickname', 'id'))
+    return {
+        'content': re.sub(r'<[^>]+>', ' ', text).strip(), # HTML 태그가 섞여 오는 경우를 대비한 정제
+        'upstream_id': str(upstream_id) if upstream_id is not None else '',
+        'date': str(_first_value(record, DATE_KEYS) or ''),
+        'rating': str(_first_value(record, RATING_KEYS) or ''),
+        'author': str(author) if author else '',
+        'raw': json.dumps(record, ensure_ascii=False, sort_keys=True),
+    }
+
+def normalize_date(value):
+    """
+    수집 경로마다 표기가 다른 작성일을 'YYYYMMDD'로 통일함 (판별 불가 시 빈 문자열).
+    DOM 표기('26.01.05', '2026. 1. 5'), API 표기('2026-01-05T09:00:00Z'), Unix 타임스탬프(초/밀리초)를 지원함.
+    시간대가 있는 값(타임스탬프, 오프셋/Z가 붙은 ISO 표기)은 화면에 표시되는 날짜와 같도록 로컬 시간대의 날짜로 변환함.
+    """
+    value = str(value or '').strip()
+    if re.fullmatch(r'\d{10}|\d{13}', value):
+        return datetime.fromtimestamp(int(value[:10])).strftime("%Y%m%d")
+    if re.search(r'\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|[+-]\d{2}:?\d{2})$', value):
+        try:
+            parsed = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+        except ValueError:
+            parsed = None
+        if parsed is not None and parsed.tzinfo is not None:
+            return parsed.astimezone().strftime("%Y%m%d")
+    match = re.search(r'(\d{2,4})[.\-/]\s?(\d{1,2})[.\-/]\s?(\d{1,2})', value)
+    if not match:
+        return ''
+    year, month, day = match.groups()
+    if len(year) == 2:
+        year = f"20{year}"
+    return f"{int(year):04d}{int(month):02d}{int(day):02d}"
+
+def normalize_rating(value):
+    """별점 표기('5', '5점', '4.5', '★★★★★')를 숫자 문자열로 통일함 (판별 불가 시 빈 문자열)."""
+    value = str(value or '')
+    match = re.search(r'\d+(?:\.\d+)?', value)
+    if match:
+        return f"{float(match.group()):g}"
+    stars = value.count('★')
+    return str(stars) if stars else ''
+
+def review_key(product_id, content, author_hash='', date='', rating=''):
+    """
+    본문 기반 리뷰 ID의 원천 문자열을 반환함.
+    dom/network 두 수집 경로에서 모두 얻을 수 있는 값(정규화한 본문, 작성자 해시, 작성일, 별점)만 사용하므로,
+    수집 모드를 바꾸거나 network 모드가 DOM으로 폴백해도 같은 리뷰는 같은 ID가 되어 증분 중단 조건이 유지됨.
+    """
+    text = unicodedata.normalize("NFKC", html.unescape(content or ''))
+    text = re.sub(r'\s+', ' ', text).strip()
+    return f"{product_id}_{author_hash}_{normalize_date(date)}_{normalize_rating(rating)}_{text}"
+
+def upstream_key(product_id, upstream_id):
+    """플랫폼이 부여한 리뷰 ID 기반의 원천 문자열 (기존 network 모드의 ID 규칙과 동일하여 이력과 그대로 호환됨)."""
+    return f"{product_id}_api_{upstream_id}"
+
+def content_key(product_id, record):
+    """표준 레코드(content/author_hash/date/rating)의 본문 기반 키. 순번이 붙지 않은 원천 문자열임."""
+    return review_key(
+        product_id, record['content'], record.get('author_hash', ''), record.get('date', ''), record.get('rating', '')
+    )
+
+class ContentKeyIndex:
+    """
+    상품 1회 수집 동안 본문 기반 키(content_key)별 저장 개수와 신규 순번을 관리합니다.
+    플랫폼 리뷰 ID가 없는 리뷰는 '본문 키_순번'을 ID 원천으로 사용하며, 같은 키로 저장된 리뷰는 항상 _0부터 연속된 순번을 차지합니다.
+    최신순 수집에서 앞쪽부터 순번을 세면 새로 올라온 같은 문구의 리뷰("좋아요")가 저장된 리뷰의 _0을 가로채므로,
+    신규 리뷰에는 수집 시작 시점의 저장 개수 다음 순번부터 부여합니다.
+    exists: 원천 문자열을 받아 해당 ID의 저장 여부를 반환하는 함수
+    """
+    def __init__(self, exists):
+        self.exists = exists
+        self._stored = {}
+        self._assigned = Counter()
+
+    def stored_count(self, key):
+        """수집 시작 시점에 같은 키로 저장되어 있던 리뷰 수 (키별 최초 조회 시 1회만 탐색하여 고정함)."""
+        if key not in self._stored:
+            count = 0
+            while self.exists(f"{key}_{count}"):
+                count += 1
+            self._stored[key] = count
+        return self._stored[key]
+
+    def assign(self, key):
+        """신규 리뷰에 부여할 순번 포함 원천 문자열 (저장된 리뷰의 순번과 겹치지 않음)."""
+        occurrence = self.stored_count(key) + self._assigned[key]
+        self._assigned[key] += 1
+        return f"{key}_{occurrence}"
+
+def id_entry(product_id, record, legacy_source=''):
+    """리뷰 1건의 ID 판별 정보 (본문 기반 키, 플랫폼 리뷰 ID 원천, 공통 ID 규칙 도입 이전의 레거시 원천)."""
+    return {
+        'record': record,
+        'content_key': content_key(product_id, record),
+        'upstream': upstream_key(product_id, record['upstream_id']) if record.get('upstream_id') else '',
+        'legacy': legacy_source,
+    }
+
+def find_stop_index(entries, content_keys, is_stored):
+    """
+    최신순 페이지(id_entry 리스트)에서 이미 저장된 리뷰가 시작되는 위치(증분 중단 지점)를 반환함 (없으면 len(entries)).
+    - 플랫폼 리뷰 ID 또는 레거시 ID가 저장되어 있으면 그 리뷰부터 저장 구간으로 확정함
+    - 본문 기반 키만 일치하는 리뷰는 같은 문구의 신규 리뷰일 수도 있으므로, 그 위치부터 페이지 끝까지의 키별 등장 횟수가
+      수집 시작 시점의 저장 개수 이내일 때만 저장 구간의 시작으로 인정함
+      (저장된 '좋아요' 앞에 같은 날 새 '좋아요'가 올라오면 등장 횟수가 저장 개수를 넘으므로 신규로 수집됨)
+    is_stored: 원천 문자열을 받아 해당 ID의 저장 여부를 반환하는 함수
+    """
+    confirmed = [
+        bool(entry['upstream'] and is_stored(entry['upstream'])) or bool(entry['legacy'] and is_stored(entry['legacy']))
+        for entry in entries
+    ]
+    for index, entry in enumerate(entries):
+        if confirmed[index]:
+            return index
+        if not content_keys.stored_count(entry['content_key']):
+            continue
+        remaining = Counter(
+            later['content_key'] for later, known in zip(entries[index:], confirmed[index:]) if not known
+        )
+        if all(count <= content_keys.stored_count(key) for key, count in remaining.items()):
+            return index
+    return len(entries)
+
+def page_fingerprint(raw_records):
+    """
+    첫 페이지 리뷰 목록의 ID 구성을 해시한 지문(Fingerprint)을 반환함.
+    최신순 목록의 첫 페이지는 신규 리뷰가 등록될 때만 바뀌므로, 지문이 같으면 수집할 리뷰가 없다고 판단할 수 있음.
+    """
+    keys = []
+    for raw in raw_records:
+        if not isinstance(raw, dict): continue
+        record = normalize_record(raw)
+        keys.append(record['upstream_id'] or record['raw'])
+    return hashlib.blake2b("\n".join(keys).encode('utf-8'), digest_size=16).hexdigest()
+
+def next_page_url(url, page_size):
+    """
+    캡처한 API URL의 페이지네이션 파라미터를 한 단계 전진시킨 URL을 반환함.
+    페이지 번호 방식(page=2 → 3)과 오프셋 방식(offset=20 → 40)을 지원함.
+    """
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    keys = [key for key, _ in params]
+
+    for name in PAGE_PARAMS:
+        if name in keys:
+            params = [(k, str(int(v) + 1) if k == name and v.isdigit() else v) for k, v in params]
+            return urlunsplit(parts._replace(query=urlencode(params)))
+
+    for name in OFFSET_PARAMS:
+        if name in keys:
+            params = [(k, str(int(v) + page_size) if k == name and v.isdigit() else v) for k, v in params]
+            return urlunsplit(parts._replace(query=urlencode(params)))
+
+    # 첫 페이지 요청에 페이지 파라미터가 생략된 경우, 가장 일반적인 page=2 방식으로 시도함
+    params.append(('page', '2'))
+    return urlunsplit(parts._replace(query=urlencode(params)))
@@ -0,0 +1,203 @@
+import re
+import hashlib
+import unicodedata
+from collections import OrderedDict
+
+# 체험단/광고성 리뷰를 식별하는 기본 금칙어 (settings.yaml의 review_filter.blacklist_keywords로 교체 가능)
+DEFAULT_BLACKLIST_KEYWORDS = ["의료기기", "개인차", "제공받아"]
+
+SIMHASH_BITS = 64
+
+def exact_fingerprint(normalized):
+    """정규화된 본문 자체의 64비트 해시 (짧은 리뷰는 근사 중복 대신 완전 일치로만 묶기 위해 사용)."""
+    return int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def normalize_text(text):
+    """유니코드 정규화 후 문장부호/이모지/공백을 제거하여 '배송 빨라요!!'와 '배송빨라요'를 같은 형태로 만듦."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return re.sub(r"[\W_]+", "", text)
+
+def simhash(text, shingle_size=3):
+    """
+    글자 단위 n-gram(Shingle)의 해시를 비트별로 가중 합산하는 64비트 SimHash.
+    본문이 조금만 다르면 해밍 거리가 작은 지문이 생성되어, 템플릿형/복붙형 리뷰를 근사 중복으로 판별할 수 있음.
+    """
+    normalized = normalize_text(text)
+    if len(normalized) <= shingle_size:
+        shingles = [normalized]
+    else:
+        shingles = [normalized[i : i + shingle_size] for i in range(len(normalized) - shingle_size + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+class SimHashIndex:
+    """
+    SimHash 지문의 근사 중복 조회 인덱스입니다.
+    64비트를 (max_distance + 1)개 구간(Band)으로 나누면, 해밍 거리 max_distance 이내의 지문은
+    비둘기집 원리에 의해 최소 1개 구간이 완전히 일치하므로 전체 비교 없이 후보만 검사합니다.
+    오래 사용되지 않은 지문부터 제거(LRU)하여 메모리 사용량을 max_entries로 제한합니다.
+    """
+    def __init__(self, max_distance=3, max_entries=5000):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.band_count = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.band_count
+        self.entries = OrderedDict()  # fingerprint -> 대표 리뷰 정보
+        self.bands = [{} for _ in range(self.band_count)]
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (i * self.band_bits)) & mask for i in range(self.band_count)]
+
+    def find(self, fingerprint):
+        """해밍 거리 max_distance 이내의 대표 지문이 있으면 (지문, 대표 정보)를, 없으면 None을 반환함."""
+        for i, key in enumerate(self._band_keys(fingerprint)):
+            for candidate in self.bands[i].get(key, ()):
+                if bin(candidate ^ fingerprint).count("1") <= self.max_distance:
+                    self.entries.move_to_end(candidate)
+                    return candidate, self.entries[candidate]
+        return None
+
+    def add(self, fingerprint, entry):
+        if fingerprint in self.entries:
+            self.entries[fingerprint] = entry
+            self.entries.move_to_end(fingerprint)
+            return
+        self.entries[fingerprint] = entry
+        for i, key in enumerate(self._band_keys(fingerprint)):
+            self.bands[i].setdefault(key, set()).add(fingerprint)
+        while len(self.entries) > self.max_entries:
+            evicted, _ = self.entries.popitem(last=False)
+            for i, key in enumerate(self._band_keys(evicted)):
+                bucket = self.bands[i].get(key)
+                if bucket:
+                    bucket.discard(evicted)
+                    if not bucket:
+                        del self.bands[i][key]
+
+    def __len__(self):
+        return len(self.entries)
+
+class ReviewFilter:
+    """
+    LLM 분석 전에 적용하는 사전 필터 단계입니다.
+    1) 금칙어: 설정에서 불러온 키워드 목록을 하나의 정규식으로 컴파일하여 리뷰당 1회 탐색으로 판별
+    2) 근사 중복: 상품별 SimHash 인덱스로 템플릿/복붙 리뷰를 묶고, 대표 리뷰의 분석 결과를 재사용하여 API 호출을 생략
+       ('좋아요'/'안 좋아요'처럼 몇 글자 차이로 의미가 뒤집히는 짧은 리뷰는 정규화 후 완전히 같은 본문끼리만 묶음)
+    """
+    def __init__(self, blacklist_keywords=None, min_length=5, near_duplicate=True,
+                 max_distance=3, max_entries_per_product=5000, near_duplicate_min_length=20):
+        keywords = DEFAULT_BLACKLIST_KEYWORDS if blacklist_keywords is None else blacklist_keywords
+        keywords = [keyword for keyword in keywords if keyword]
+        # 긴 키워드를 먼저 배치하여 접두어가 겹치는 키워드도 의도대로 매칭되도록 함
+        self.blacklist_pattern = re.compile(
+            "|".join(re.escape(keyword) for keyword in sorted(set(keywords), key=len, reverse=True))
+        ) if keywords else None
+        self.min_length = min_length
+
+        self.near_duplicate = near_duplicate
+        self.max_distance = max_distance
+        self.max_entries_per_product = max_entries_per_product
+        # 정규화 후 글자 수가 이 값 미만인 리뷰는 SimHash 근사 비교에서 제외하고 완전 일치 인덱스로만 조회함
+        self.near_duplicate_min_length = near_duplicate_min_length
+        self.indexes = {}
+        self.exact_indexes = {}
+        # 분석 결과를 기다리는 대표 리뷰: {product_id: {리뷰 ID: 인덱스 항목}}
+        self._pending = {}
+
+        self.stats = {'keyword_filtered': 0, 'too_short': 0, 'near_duplicates': 0, 'representatives': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """settings.yaml의 review_filter 섹션으로 필터를 생성함."""
+        filter_config = (config or {}).get('review_filter', {}) or {}
+        near_dup_config = filter_config.get('near_duplicate', {}) or {}
+        return cls(
+            blacklist_keywords=filter_config.get('blacklist_keywords'),
+            min_length=filter_config.get('min_length', 5),
+            near_duplicate=near_dup_config.get('enabled', True),
+            max_distance=near_dup_config.get('max_distance', 3),
+            max_entries_per_product=near_dup_config.get('max_entries_per_product', 5000),
+            near_duplicate_min_length=near_dup_config.get('min_length', 20),
+        )
+
+    def is_valid(self, text):
+        """광고/체험단 금칙어가 포함되었거나 너무 짧은 리뷰를 걸러냄."""
+        if self.blacklist_pattern is not None and self.blacklist_pattern.search(text):
+            self.stats['keyword_filtered'] += 1
+            return False
+        if len(text.strip()) < self.min_length:
+            self.stats['too_short'] += 1
+            return False
+        return True
+
+    def _index(self, product_id, exact=False):
+        """상품별 근사 중복 인덱스를 반환함. exact=True면 해밍 거리 0(완전 일치)으로만 조회하는 짧은 리뷰용 인덱스."""
+        indexes = self.exact_indexes if exact else self.indexes
+        if product_id not in indexes:
+            indexes[product_id] = SimHashIndex(0 if exact else self.max_distance, self.max_entries_per_product)
+        return indexes[product_id]
+
+    def group_near_duplicates(self, product_id, reviews):
+        """
+        리뷰 목록을 근사 중복 기준으로 묶음. reviews: [{'id', 'text'}, ...]
+        반환값: (to_analyze, followers, reused)
+          - to_analyze: LLM에 요청할 대표 리뷰 목록
+          - followers: {대표 리뷰 ID: [같은 그룹 리뷰 ID, ...]} — 대표의 분석 결과를 복사받을 리뷰
+          - reused: {리뷰 ID: 분석 결과} — 이전 사이클에서 분석된 대표와 근사 중복이라 즉시 결과를 재사용하는 리뷰
+        """
+        if not self.near_duplicate:
+            return list(reviews), {}, {}
+
+        pending = self._pending.setdefault(product_id, {})
+        to_analyze, followers, reused = [], {}, {}
+        for review in reviews:
+            normalized = normalize_text(review['text'])
+            if len(normalized) < self.near_duplicate_min_length:
+                index, fingerprint = self._index(product_id, exact=True), exact_fingerprint(normalized)
+            else:
+                index, fingerprint = self._index(product_id), simhash(review['text'])
+            match = index.find(fingerprint)
+            if match is not None:
+                entry = match[1]
+                if entry['result'] is not None:
+                    reused[review['id']] = entry['result']
+                    self.stats['near_duplicates'] += 1
+                    continue
+                if entry['id'] in followers:
+                    followers[entry['id']].append(review['id'])
+                    self.stats['near_duplicates'] += 1
+                    continue
+                # 대표 리뷰의 분석이 실패했거나 다른 묶음에서 진행 중이면, 현재 리뷰를 새 대표로 지정하여 직접 분석함
+                pending.pop(entry['id'], None)
+                entry['id'] = review['id']
+            else:
+                entry = {'id': review['id'], 'result': None}
+                index.add(fingerprint, entry)
+            pending[review['id']] = entry
+            to_analyze.append(review)
+            followers[review['id']] = []
+            self.stats['representatives'] += 1
+        return to_analyze, followers, reused
+
+    def remember_results(self, product_id, representative_ids, results):
+        """
+        대표 리뷰의 분석 결과를 인덱스에 기록하여 이후 유입되는 근사 중복 리뷰에 재사용함.
+        분석에 실패한 대표는 결과 없이 대기 목록에서만 제거되어, 다음 근사 중복 리뷰가 새 대표로 분석됨.
+        """
+        pending = self._pending.get(product_id, {})
+        for review_id in representative_ids:
+            entry = pending.pop(review_id, None)
+            result = results.get(review_id)
+            if entry is not None and result is not None and entry['id'] == review_id:
+                entry['result'] = {k: v for k, v in result.items() if k in ('category', 'sentiment', 'urgency', 'summary')}
@@ -0,0 +1,358 @@
+import csv
+import os
+import json
+import math
+import hashlib
+
+class BloomFilter:
+    """
+    리뷰 ID의 '존재하지 않음'을 O(1)로 확정하기 위한 확률적 자료구조입니다.
+    False Positive는 허용하되 False Negative는 발생하지 않으므로,
+    '없다'는 응답만으로 CSV 전체 로딩을 생략할 수 있는 1차 관문 역할을 수행함.
+    """
+    def __init__(self, capacity=100000, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        # 목표 오탐률을 만족하는 최적 비트 수(m)와 해시 함수 개수(k)를 산출함
+        self.num_bits = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double Hashing 기법으로 한 번의 해시 계산에서 k개의 비트 위치를 파생시켜 연산 비용을 줄임
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def is_saturated(self):
+        """설계 용량을 초과하면 오탐률이 급격히 상승하므로 재구축 시점을 알려줌."""
+        return self.count > self.capacity
+
+    def save(self, path, signature, rows=None):
+        """
+        원본 CSV의 시그니처(mtime/size/inode) 및 반영한 행 수와 함께 사이드카 파일로 영속화함.
+        임시 파일에 기록 후 원자적으로 교체하여, 저장 중 중단되어도 손상된 파일이 남지 않도록 함.
+        """
+        header = {
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'num_bits': self.num_bits,
+            'num_hashes': self.num_hashes,
+            'count': self.count,
+            'signature': list(signature) if signature else None,
+            'rows': rows,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, mode='wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b"\n")
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """사이드카 파일을 복원하여 (BloomFilter, signature, rows) 튜플을 반환함. 손상 시 None."""
+        try:
+            with open(path, mode='rb') as f:
+                header = json.loads(f.readline().decode('utf-8'))
+                bits = f.read()
+        except (OSError, ValueError):
+            return None
+
+        bloom = cls.__new__(cls)
+        bloom.capacity = header['capacity']
+        bloom.error_rate = header['error_rate']
+        bloom.num_bits = header['num_bits']
+        bloom.num_hashes = header['num_hashes']
+        bloom.count = header['count']
+        bloom.bits = bytearray(bits)
+        if len(bloom.bits) != (bloom.num_bits + 7) // 8:
+            return None
+        signature = tuple(header['signature']) if header.get('signature') else None
+        return bloom, signature, header.get('rows')
+
+
+def iter_records(f, offset=0):
+    """
+    바이너리 모드로 연 CSV 파일 f의 offset 바이트 위치부터 완결된 CSV 레코드를 (행, 행의 끝 바이트 위치)로 순차 반환함.
+    offset이 0이면 첫 레코드는 헤더임. 쓰기 도중이라 잘린 마지막 행(줄바꿈 없음, 따옴표 안에서 끝남)과
+    손상된 행 이후는 반환하지 않으므로, 반환된 마지막 위치부터 다음에 이어 읽을 수 있음.
+    """
+    f.seek(offset)
+    position = offset
+    exhausted = False
+
+    def lines():
+        nonlocal position, exhausted
+        encoding = 'utf-8-sig' if offset == 0 else 'utf-8'
+        for line in f:
+            if not line.endswith(b"\n"):
+                break # 기록 중인 행
+            position += len(line)
+            yield line.decode(encoding)
+            encoding = 'utf-8'
+        exhausted = True
+
+    reader = csv.reader(lines())
+    try:
+        for row in reader:
+            # csv.reader는 행이 완결되는 순간까지만 읽으므로, 이 시점의 position이 해당 행의 끝 위치임
+            # (입력이 끝난 뒤에 나온 행은 따옴표 안에서 잘린 불완전한 행임)
+            if exhausted:
+                return
+            yield row, position
+    except (csv.Error, UnicodeDecodeError):
+        return # 손상된 행 이후는 다음 조회 때 이어서 읽음
+
+
+class ReviewIdIndex:
+    """
+    CSV 저장소의 리뷰 ID를 메모리 해시 인덱스로 유지하여 중복 검사를 O(1)로 수행하는 모듈입니다.
+    저장소 인스턴스당 1회만 로딩하고, 쓰기 시점마다 증분 반영함.
+    - 다른 프로세스(워커)가 파일 끝에 행을 추가한 경우: 늘어난 구간만 읽어 따라잡음
+    - 다른 워커가 분석 결과 반영을 위해 파일을 재작성(교체)한 경우: 재작성은 행의 순서와 ID를 보존하므로,
+      재작성 측이 남긴 스탬프(행 번호 → 바이트 위치 체크포인트)로 이미 반영한 행 이후부터만 읽어 따라잡음
+    - 파일이 줄어들거나, 스탬프 없이 교체(외부 편집)되었거나, 크기 변화 없이 수정된 경우에만 전체를 재구축함
+    """
+    # 재작성 스탬프에 바이트 위치를 기록하는 행 간격 (따라잡기 시 건너뛰며 읽는 행 수의 상한)
+    CHECKPOINT_ROWS = 1000
+
+    def __init__(self, filepath, id_column=1, bloom_path=None, bloom_error_rate=0.01, stamp_path=None):
+        self.filepath = filepath
+        self.id_column = id_column
+        self.bloom_path = bloom_path
+        self.bloom_error_rate = bloom_error_rate
+        self.stamp_path = stamp_path or f"{filepath}.rewrite.json"
+
+        self._ids = None          # 전체 ID 집합 (필요한 시점에 지연 로딩)
+        self._bloom = None        # 사이드카에서 복원했거나 재구축한 Bloom Filter
+        self._signature = None    # 인덱스가 끝까지 반영하고 있는 CSV의 (mtime_ns, size, inode)
+        self._rows = None         # 인덱스가 반영한 데이터 행 수 (헤더 제외, 재작성 후 따라잡기의 기준점)
+        self._bloom_dirty = False
+
+        if self.bloom_path:
+            self._load_bloom_sidecar()
+
+    @staticmethod
+    def _stat_signature(stat):
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _current_signature(self):
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return self._stat_signature(stat)
+
+    @staticmethod
+    def _is_append(previous, current):
+        """같은 파일(inode)이 커지기만 한 경우인지 판별함 (증분 따라잡기 가능 여부)."""
+        return (previous is not None and current is not None and len(previous) == 3
+                and previous[2] == current[2] and previous[1] < current[1])
+
+    def _load_bloom_sidecar(self):
+        """
+        사이드카가 현재 CSV와 동일한 시점의 스냅샷이거나, 이후 행 추가/재작성만 있었던 스냅샷일 때 신뢰하여 사용함.
+        후자의 경우 다음 조회 시 바뀐 구간만 읽어 따라잡음.
+        """
+        loaded = BloomFilter.load(self.bloom_path)
+        if not loaded:
+            return
+        bloom, signature, rows = loaded
+        current = self._current_signature()
+        if not signature or current is None:
+            return
+        replaced = len(signature) == 3 and signature[2] != current[2]
+        if signature == current or self._is_append(signature, current) or (replaced and self._rewrite_checkpoint(rows, current)):
+            self._bloom = bloom
+            self._signature = signature
+            self._rows = rows
+
+    def _scan(self, offset, on_id, skip_rows=0):
+        """
+        offset 바이트 위치부터 파일 끝까지의 완결된 행을 읽어 ID마다 on_id를 호출함 (처음 skip_rows개 행은 건너뜀).
+        쓰기 도중이라 마지막 행이 불완전하면 그 직전 행까지만 반영함.
+        (읽은 행 수, 마지막 완결 행의 끝 바이트 위치, 읽은 파일의 os.stat) 튜플을 반환함.
+        """
+        rows = 0
+        end = offset
+        with open(self.filepath, mode='rb') as f:
+            records = iter_records(f, offset)
+            if offset == 0:
+                for _, end in records:
+                    break # 헤더 스킵
+            for row, end in records:
+                if rows >= skip_rows and len(row) > self.id_column:
+                    on_id(row[self.id_column])
+                rows += 1
+            stat = os.fstat(f.fileno())
+        return rows, end, stat
+
+    def _rebuild(self):
+        """CSV를 1회 스트리밍 스캔하여 ID 집합과 Bloom Filter를 동시에 재구축함."""
+        ids = set()
+        rows, end, signature = 0, 0, None
+        if os.path.exists(self.filepath):
+            rows, end, stat = self._scan(0, ids.add)
+            signature = (stat.st_mtime_ns, end, stat.st_ino)
+        self._ids = ids
+        self._rows = rows
+        self._signature = signature
+        if self.bloom_path:
+            self._rebuild_bloom()
+
+    def _rebuild_bloom(self):
+        # 향후 유입량을 고려해 현재 건수의 2배를 설계 용량으로 잡아 잦은 재구축을 방지함
+        capacity = max(len(self._ids) * 2, 100000)
+        bloom = BloomFilter(capacity=capacity, error_rate=self.bloom_error_rate)
+        for review_id in self._ids:
+            bloom.add(review_id)
+        self._bloom = bloom
+        self._bloom_dirty = True
+
+    def _catch_up(self, offset, skip_rows=0, base_rows=None):
+        """
+        offset 이후(재작성 체크포인트에서 시작하는 경우 skip_rows개 행 이후)에 추가된 행의 ID만 인덱스에 반영함.
+        구간 시작이 행 경계가 아니면 실패(False)로 처리하여 재구축에 맡김.
+        """
+        try:
+            if offset > 0:
+                with open(self.filepath, mode='rb') as f:
+                    f.seek(offset - 1)
+                    if f.read(1) != b"\n":
+                        return False
+            rows, end, stat = self._scan(offset, lambda review_id: self.add(review_id, sync=False), skip_rows)
+        except OSError:
+            return False
+        self._signature = (stat.st_mtime_ns, end, stat.st_ino)
+        base_rows = self._rows if base_rows is None else base_rows
+        self._rows = None if base_rows is None else base_rows + rows
+        self._check_saturation()
+        return True
+
+    def locate_row(self, rows):
+        """
+        현재 파일이 ID 보존 재작성으로 만들어졌다면, rows번째 데이터 행 이전의 가장 가까운 체크포인트를
+        (행 번호, 바이트 위치)로 반환함. 스탬프가 없거나 맞지 않으면 None.
+        """
+        return self._rewrite_checkpoint(rows, self._current_signature())
+
+    def _rewrite_checkpoint(self, rows, current):
+        """
+        현재 파일이 ID를 보존하는 재작성으로 만들어졌고, 기존에 rows개 행까지 반영한 인덱스가 이어서 읽을 수 있으면
+        (체크포인트 행 번호, 바이트 위치)를 반환함. 아니면 None.
+        """
+        if rows is None or current is None:
+            return None
+        try:
+            with open(self.stamp_path, mode='r', encoding='utf-8') as f:
+                stamp = json.load(f)
+            signature, stamp_rows, checkpoints = stamp['signature'], stamp['rows'], stamp['checkpoints']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        # 스탬프 이후 추가(append)만 있었던 같은 파일이어야 하며, 재작성 시점보다 많은 행을 반영했다면 외부 편집으로 간주함
+        if signature[2] != current[2] or signature[1] > current[1] or rows > stamp_rows:
+            return None
+        candidates = [checkpoint for checkpoint in checkpoints if checkpoint[0] <= rows]
+        return tuple(max(candidates)) if candidates else None
+
+    def _ensure_fresh(self):
+        """
+        다른 프로세스의 추가 쓰기와 ID 보존 재작성은 바뀐 구간만 읽어 반영하고,
+        외부 편집(엑셀 수정, 수동 삭제, 파일 교체 등)으로 인덱스가 낡았다면 폐기함.
+        """
+        current = self._current_signature()
+        if self._signature == current:
+            return
+        if self._ids is not None or self._bloom is not None:
+            if self._is_append(self._signature, current):
+                if self._catch_up(self._signature[1]):
+                    return
+            elif self._signature is not None and current is not None and self._signature[2] != current[2]:
+                checkpoint = self._rewrite_checkpoint(self._rows, current)
+                if checkpoint and self._catch_up(checkpoint[1], self._rows - checkpoint[0], checkpoint[0]):
+                    return
+        self.invalidate()
+
+    def refresh(self):
+        """인덱스를 현재 파일 내용에 맞춤. 파일을 재작성하기 전에 호출하여 그 사이 다른 프로세스가 추가한 ID를 놓치지 않도록 함."""
+        self._ensure_fresh()
+
+    def contains(self, review_id):
+        self._ensure_fresh()
+        # Bloom Filter가 '없음'을 확정하면 전체 ID 집합을 로딩하지 않고 즉시 반환함
+        if self._bloom is not None and review_id not in self._bloom:
+            return False
+        if self._ids is None:
+            self._rebuild()
+        return review_id in self._ids
+
+    def add(self, review_id, sync=True):
+        """
+        저장소가 직접 수행한 쓰기(행 1개 추가)를 인덱스에 반영함.
+        반드시 파일 쓰기 완료 직후 호출하여 자체 쓰기를 외부 편집으로 오인하지 않도록 함.
+        """
+        if self._ids is not None:
+            self._ids.add(review_id)
+        if self._bloom is not None:
+            self._bloom.add(review_id)
+            self._bloom_dirty = True
+        if sync:
+            if self._rows is not None:
+                self._rows += 1
+            self.mark_synced()
+            self._check_saturation()
+
+    def _check_saturation(self):
+        if self._bloom is not None and self._bloom.is_saturated():
+            if self._ids is None:
+                self._rebuild()
+            else:
+                self._rebuild_bloom()
+
+    def mark_synced(self):
+        """내용 변경 없이 파일이 재작성된 경우 현재 시그니처를 인덱스 기준점으로 갱신함."""
+        if self._ids is not None or self._bloom is not None:
+            self._signature = self._current_signature()
+
+    def record_rewrite(self, tmp_path, rows, checkpoints):
+        """
+        ID와 행 순서를 보존하는 재작성 결과(tmp_path)를 원본과 교체하기 직전에 호출하여 스탬프를 남김.
+        다른 워커의 인덱스는 스탬프의 체크포인트로 이미 반영한 행 이후부터만 읽어 따라잡음 (전체 재구축 방지).
+        checkpoints: [(데이터 행 번호, 해당 행의 시작 바이트 위치), ...]
+        """
+        stamp = {
+            'signature': list(self._stat_signature(os.stat(tmp_path))),
+            'rows': rows,
+            'checkpoints': [list(checkpoint) for checkpoint in checkpoints],
+        }
+        stamp_tmp = f"{self.stamp_path}.tmp"
+        with open(stamp_tmp, mode='w', encoding='utf-8') as f:
+            json.dump(stamp, f)
+        os.replace(stamp_tmp, self.stamp_path)
+
+    def invalidate(self):
+        """인덱스를 폐기하여 다음 조회 시 CSV에서 재구축하도록 함."""
+        self._ids = None
+        self._bloom = None
+        self._signature = None
+        self._rows = None
+
+    def flush(self):
+        """변경된 Bloom Filter를 사이드카 파일로 영속화하여 다음 기동 시 재사용함."""
+        if not self.bloom_path or self._bloom is None or not self._bloom_dirty:
+            return
+        self._ensure_fresh()
+        if self._bloom is None:
+            return
+        self._bloom.save(self.bloom_path, self._signature, self._rows)
+        self._bloom_dirty = False
@@ -0,0 +1,198 @@
+import os
+import asyncio
+
+import yaml
+
+from src.log import configure_logging, get_logger
+from src.metrics import configure_metrics
+
+logger = get_logger("runtime")
+
+# 구성 요소 → 해당 설정 섹션이 바뀌면 다시 만들어야 하는 섹션 목록
+_COMPONENT_SECTIONS = {
+    'processor': ('gemini',),
+    'notifier': ('slack',),
+    'storage': ('storage',),
+    'review_filter': ('review_filter',),
+    'change_probe': ('crawler',),
+}
+
+class RuntimeContext:
+    """
+    장기 실행 스케줄러의 공용 실행 환경입니다.
+    - settings.yaml을 1회만 읽고, 파일이 수정되면 다시 읽어 바뀐 섹션에 의존하는 구성 요소만 재생성함 (Hot Reload)
+    - GenAI 클라이언트(ReviewProcessor), Slack HTTP 세션/전송 큐(SlackNotifier), 저장소 인덱스, LLM 사전 필터를
+      사이클 간에 재사용하여 매 사이클의 초기화 비용(설정 파싱, 클라이언트 생성, 인덱스 로딩)을 없앰
+    - playwright/google-genai/requests 등 무거운 SDK는 해당 구성 요소를 처음 사용할 때 로딩함
+    - 모든 사이클을 하나의 이벤트 루프에서 실행하여 루프에 묶이는 비동기 클라이언트를 안전하게 재사용함
+    """
+    def __init__(self, config_path="config/settings.yaml"):
+        self.config_path = config_path
+        self.config = {}
+        self._mtime = None
+        self._components = {}
+        self.loop = None
+        self.load()
+
+    def load(self):
+        """설정 파일을 읽어 로깅/계측 설정까지 반영하고, 이전 설정을 반환함."""
+        mtime = os.stat(self.config_path).st_mtime_ns
+        with open(self.config_path, "r", encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+        previous, self.config, self._mtime = self.config, config, mtime
+        # 콘솔(text) 또는 구조화(json) 로그 출력 형식과 단계별 계측(metrics 섹션, 기본 비활성화)을 설정함
+        configure_logging(config)
+        configure_metrics(config)
+        return previous
+
+    def section(self, name):
+        return self.config.get(name, {}) or {}
+
+    @property
+    def products(self):
+        return self.config.get('products', []) or []
+
+    def reload_if_changed(self):
+        """
+        설정 파일이 수정되었으면 다시 읽고, 변경된 섹션 이름의 집합을 반환함 (변경 없으면 빈 집합).
+        변경된 섹션에 의존하는 구성 요소는 폐기되어 다음 사용 시 새 설정으로 생성됨.
+        저장 도중의 불완전한 파일 등으로 읽기에 실패하면 기존 설정을 유지함.
+        """
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return set()
+        if mtime == self._mtime:
+            return set()
+        try:
+            previous = self.load()
+        except (OSError, yaml.YAMLError) as e:
+            logger.error(f"❌ 설정 파일 다시 읽기 실패 ({e}). 기존 설정을 유지합니다.")
+            self._mtime = mtime
+            return set()
+
+        changed = {key for key in set(previous) | set(self.config) if previous.get(key) != self.config.get(key)}
+        for name, sections in _COMPONENT_SECTIONS.items():
+            if changed.intersection(sections):
+                self._discard(name)
+        if changed:
+            logger.info(f"🔄 [Runtime] 설정 변경 감지: {', '.join(sorted(changed))} 섹션을 다시 적용합니다.")
+        return changed
+
+    # ------------------------------------------------------------------
+    # 재사용 구성 요소 (최초 사용 시 생성)
+    # ------------------------------------------------------------------
+    def _get(self, name, factory):
+        if name not in self._components:
+            self._components[name] = factory()
+        return self._components[name]
+
+    def _discard(self, name):
+        component = self._components.pop(name, None)
+        if component is None: return
+        if name == 'notifier':
+            # 남은 알림/다이제스트를 전송한 뒤 교체함 (Slack 장애 시에도 close_timeout_seconds 이후 미전송분을 Dead-Letter로 넘기고 반환)
+            component.close()
+        elif name == 'storage':
+            component.flush_index()
+            if hasattr(component, 'close'):
+                component.close()
+        elif name == 'processor':
+            # 분석 캐시의 SQLite 연결을 닫아 설정을 다시 읽을 때마다 연결이 누적되지 않도록 함
+            component.close()
+
+    @property
+    def storage(self):
+        def build():
+            from src.storage import create_storage
+            return create_storage(self.config)
+        return self._get('storage', build)
+
+    @property
+    def processor(self):
+        def build():
+            from src.processor import ReviewProcessor
+            return ReviewProcessor(self.config)
+        return self._get('processor', build)
+
+    @property
+    def notifier(self):
+        def build():
+            from src.notifier import SlackNotifier
+            notifier = SlackNotifier(self.config)
+            # 알림 전송 전용 백그라운드 큐 기동 (슬랙 전송 지연이 수집/분석을 차단하지 않도록 분리)
+            notifier.start()
+            return notifier
+        return self._get('notifier', build)
+
+    @property
+    def review_filter(self):
+        # 근사 중복 인덱스가 사이클 간에 유지되어, 이전 사이클에서 분석한 템플릿 리뷰의 결과도 재사용됨
+        def build():
+            from src.review_filter import ReviewFilter
+            return ReviewFilter.from_config(self.config)
+        return self._get('review_filter', build)
+
+    @property
+    def change_probe(self):
+        def build():
+            probe_config = self.section('crawler').get('change_probe', {}) or {}
+            if not probe_config.get('enabled', True):
+                return None
+            from src.change_probe import ChangeProbe
+            return ChangeProbe(
+                timeout_seconds=probe_config.get('timeout_seconds', 5),
+                full_crawl_every_hours=probe_config.get('full_crawl_every_hours', 24),
+                max_consecutive_unchanged=probe_config.get('max_consecutive_unchanged', 12)
+            )
+        return self._get('change_probe', build)
+
+    def crawler(self):
+        """
+        사이클용 크롤러를 생성함. 브라우저는 사이클 동안만 기동되며(유휴 시간의 Chromium 메모리 점유 방지),
+        LLM 사전 필터와 변경 감지 프로브는 재사용 구성 요소를 공유함.
+        """
+        from src.crawler import GlowmCrawler
+        from src.request_filter import RequestFilter
+        crawler_config = self.section('crawler')
+        blocking_config = crawler_config.get('resource_blocking', {}) or {}
+        return GlowmCrawler(
+            max_concurrency=crawler_config.get('max_concurrency', 4),
+            per_host_concurrency=crawler_config.get('per_host_concurrency', 2),
+            timeouts=crawler_config.get('timeouts'),
+            mode=crawler_config.get('mode', 'dom'),
+            api_url_pattern=crawler_config.get('api_url_pattern', r"review"),
+            # 리뷰와 무관한 리소스(이미지/폰트/광고 스크립트) 차단 — 상품별 예외는 products[].allow_url_patterns
+            request_filter=RequestFilter(
+                enabled=blocking_config.get('enabled', True),
+                block_resource_types=blocking_config.get('block_resource_types'),
+                block_url_patterns=blocking_config.get('block_url_patterns')
+            ),
+            # 금칙어(단일 컴파일 정규식) + 상품별 근사 중복 인덱스로 구성된 LLM 사전 필터 (review_filter 섹션)
+            review_filter=self.review_filter,
+            change_probe=self.change_probe
+        )
+
+    # ------------------------------------------------------------------
+    # 이벤트 루프 / 종료
+    # ------------------------------------------------------------------
+    def run(self, coro):
+        """코루틴을 공용 이벤트 루프에서 실행함 (asyncio.run처럼 매번 루프를 새로 만들지 않음)."""
+        if self.loop is None or self.loop.is_closed():
+            self.loop = asyncio.new_event_loop()
+        return self.loop.run_until_complete(coro)
+
+    def close(self):
+        """남은 알림 전송과 인덱스 영속화를 마치고, 이벤트 루프에 남은 작업을 정리함."""
+        for name in list(self._components):
+            self._discard(name)
+        if self.loop is not None and not self.loop.is_closed():
+            # 종료 신호로 중단된 사이클의 잔여 태스크를 취소하여 정리(finally) 블록이 실행되도록 함
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+        self.loop = None
@@ -0,0 +1,377 @@
+import csv
+import os
+import json
+import sqlite3
+import hashlib
+import itertools
+import threading
+from datetime import datetime
+
+from src.metrics import metrics
+from src.aggregates import ReviewAggregates
+from src.log import get_logger
+
+logger = get_logger("storage")
+
+# 분석 완료(Y) 리뷰를 상품 × 카테고리 × 감성 × 긴급도 × 수집일로 집계하는 쿼리 (집계 테이블 재구축용)
+_AGGREGATE_SELECT = (
+    "SELECT product_id, COALESCE(category, ''), COALESCE(sentiment, ''), COALESCE(CAST(urgency AS INTEGER), 0), "
+    "COALESCE(substr(date_collected, 1, 10), ''), COUNT(*) "
+    "FROM reviews WHERE is_analyzed = 'Y' GROUP BY 1, 2, 3, 4, 5"
+)
+
+# 마이그레이션 시 한 번의 executemany로 삽입하는 행 수 (메모리 사용량을 배치 1개 분량으로 제한함)
+MIGRATION_BATCH_SIZE = 1000
+# 내보내기 기본 경로 — 이관 원본(reviews_db.csv)을 덮어쓰지 않도록 별도 파일을 사용함
+DEFAULT_EXPORT_PATH = "data/reviews_export.csv"
+
+# CSV 저장소와 동일한 컬럼 순서를 유지하여 마이그레이션/내보내기 시 스키마 변환이 필요 없도록 함
+COLUMNS = ['product_id', 'id', 'date_collected', 'category', 'sentiment', 'urgency', 'summary', 'full_text', 'is_analyzed']
+
+class SQLiteReviewStorage:
+    """
+    ReviewStorage와 동일한 인터페이스를 제공하는 SQLite 기반 저장소 엔진입니다.
+    WAL 모드와 인덱스(id, product_id, is_analyzed)를 활용하여 DB 크기와 무관하게
+    조회/쓰기 비용을 밀리초 단위로 유지하며, CS팀의 엑셀 업무를 위해 CSV 내보내기를 지원합니다.
+    """
+    def __init__(self, filepath="data/reviews.db", migrate_from="data/reviews_db.csv", busy_timeout_seconds=30):
+        self.filepath = filepath
+        self.migrate_from = migrate_from
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        # 스케줄러의 파이프라인 스레드에서도 공유할 수 있도록 단일 커넥션을 Lock으로 직렬화함
+        # 여러 워커 프로세스가 같은 DB를 쓰는 경우, 다른 프로세스의 쓰기 트랜잭션이 끝날 때까지 busy_timeout만큼 대기함
+        self.conn = sqlite3.connect(self.filepath, check_same_thread=False, timeout=busy_timeout_seconds)
+        self.lock = threading.Lock()
+        self._initialize_db()
+
+        # 최초 기동 시 기존 CSV DB가 존재한다면 1회에 한해 자동으로 이관함
+        if migrate_from and os.path.exists(migrate_from) and self._is_empty():
+            migrated = self.migrate_from_csv(migrate_from)
+            logger.info(f"📦 [Storage] CSV → SQLite 마이그레이션 완료: {migrated}건 ({migrate_from})")
+
+    def _initialize_db(self):
+        """
+        WAL 모드를 활성화하여 읽기와 쓰기가 서로를 차단하지 않도록 하고,
+        자주 사용되는 조회 조건(product_id, is_analyzed)에 인덱스를 생성함.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # WAL 모드에서는 NORMAL 동기화로도 크래시 시 DB 손상이 발생하지 않음
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS reviews (
+                    product_id TEXT NOT NULL,
+                    id TEXT PRIMARY KEY,
+                    date_collected TEXT,
+                    category TEXT DEFAULT '',
+                    sentiment TEXT DEFAULT '',
+                    urgency TEXT DEFAULT '',
+                    summary TEXT DEFAULT '',
+                    full_text TEXT,
+                    is_analyzed TEXT DEFAULT 'N'
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_product_id ON reviews(product_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_is_analyzed ON reviews(is_analyzed)")
+            # 대시보드 질의가 리뷰 전체가 아닌 그룹 수에 비례하도록, 분석 결과 반영과 같은 트랜잭션에서 갱신되는 집계 테이블
+            has_aggregates = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'review_aggregates'"
+            ).fetchone()
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_aggregates (
+                    product_id TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    sentiment TEXT NOT NULL,
+                    urgency INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (product_id, category, sentiment, urgency, day)
+                )
+            """)
+            # 전체 수집 전 '변경 없음' 프로브에 사용하는 상품별 지문 (JSON 문자열)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS product_fingerprints (product_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL)"
+            )
+            if not has_aggregates:
+                # 집계 기능 도입 이전에 생성된 DB는 최초 1회 기존 분석 결과로 집계를 채움
+                self._rebuild_aggregates()
+
+    def _rebuild_aggregates(self):
+        """집계 테이블을 reviews 테이블로부터 재구축함 (호출 측에서 Lock과 트랜잭션을 잡아야 함)."""
+        self.conn.execute("DELETE FROM review_aggregates")
+        self.conn.execute(f"INSERT INTO review_aggregates {_AGGREGATE_SELECT}")
+
+    def _is_empty(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM reviews LIMIT 1").fetchone() is None
+
+    def generate_id(self, unique_source):
+        """CSV 저장소와 동일한 MD5 Composite Key를 생성하여 백엔드 교체 시에도 ID 호환성을 유지함."""
+        return hashlib.md5(unique_source.encode('utf-8')).hexdigest()
+
+    @metrics.timed("storage_op_seconds", op="is_review_exist", backend="sqlite")
+    def is_review_exist(self, review_id):
+        """Primary Key 인덱스를 통해 O(log n)으로 중복 여부를 판별함."""
+        with self.lock:
+            row = self.conn.execute("SELECT 1 FROM reviews WHERE id = ?", (review_id,)).fetchone()
+        return row is not None
+
+    def flush_index(self):
+        """SQLite는 자체 인덱스를 유지하므로 별도의 영속화가 필요 없음 (인터페이스 호환용)."""
+        pass
+
+    @metrics.timed("storage_op_seconds", op="get_existing_product_ids", backend="sqlite")
+    def get_existing_product_ids(self):
+        """product_id 인덱스만 탐색하여 전체 테이블 스캔 없이 상품 목록을 반환함."""
+        with self.lock:
+            rows = self.conn.execute("SELECT DISTINCT product_id FROM reviews").fetchall()
+        return {row[0] for row in rows}
+
+    def get_fingerprint(self, product_id):
+        """상품의 변경 감지 지문을 반환함 (전체 수집에 성공한 적이 없으면 None)."""
+        with self.lock:
+            row = self.conn.execute("SELECT fingerprint FROM product_fingerprints WHERE product_id = ?", (product_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_fingerprint(self, product_id, fingerprint):
+        """전체 수집에 성공한 상품의 최신 지문을 기록함."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO product_fingerprints (product_id, fingerprint) VALUES (?, ?) "
+                "ON CONFLICT(product_id) DO UPDATE SET fingerprint = excluded.fingerprint",
+                (product_id, json.dumps(fingerprint, ensure_ascii=False))
+            )
+
+    def get_product_activity(self, since, initial_window=None):
+        """
+        상품별 최근 유입 건수와 최초/마지막 수집 시각을 product_id 인덱스 기반 GROUP BY로 집계함.
+        initial_window(timedelta)를 지정하면 최초 수집 후 해당 기간 내 저장된 초기 구축분 건수(initial_count)도 집계함.
+        """
+        since_str = since.strftime("%Y-%m-%d %H:%M:%S")
+        initial_seconds = int(initial_window.total_seconds()) if initial_window is not None else -1
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT r.product_id, SUM(CASE WHEN r.date_collected >= ? THEN 1 ELSE 0 END), "
+                "MIN(r.date_collected), MAX(r.date_collected), "
+                "SUM(CASE WHEN r.date_collected <= datetime(f.first_collected, ? || ' seconds') THEN 1 ELSE 0 END) "
+                "FROM reviews r JOIN (SELECT product_id, MIN(date_collected) AS first_collected FROM reviews GROUP BY product_id) f "
+                "ON r.product_id = f.product_id GROUP BY r.product_id",
+                (since_str, f"{initial_seconds:+d}")
+            ).fetchall()
+        return {
+            product_id: {
+                'recent_count': recent_count or 0,
+                'first_collected': datetime.strptime(first_collected, "%Y-%m-%d %H:%M:%S") if first_collected else None,
+                'last_collected': datetime.strptime(last_collected, "%Y-%m-%d %H:%M:%S") if last_collected else None,
+                'initial_count': (initial_count or 0) if initial_window is not None else 0,
+            }
+            for product_id, recent_count, first_collected, last_collected, initial_count in rows
+        }
+
+    @metrics.timed("storage_op_seconds", op="get_aggregates", backend="sqlite")
+    def get_aggregates(self):
+        """집계 테이블을 메모리로 읽어 CSV 백엔드와 동일한 질의/내보내기 API(ReviewAggregates)로 반환함."""
+        aggregates = ReviewAggregates()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT product_id, category, sentiment, urgency, day, count FROM review_aggregates"
+            ).fetchall()
+        aggregates.counts = {tuple(row[:-1]): row[-1] for row in rows}
+        return aggregates
+
+    def iter_unanalyzed(self, chunk_size=500):
+        """
+        분석 미완료(N) 리뷰를 rowid 기준 Keyset Pagination으로 chunk_size씩 반환함.
+        청크 조회 시에만 Lock을 잡으므로 순회 중에도 결과 반영(update_analysis_results)이 가능함.
+        """
+        last_rowid = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT rowid, product_id, id, date_collected, full_text FROM reviews "
+                    "WHERE is_analyzed = 'N' AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, chunk_size)
+                ).fetchall()
+            if not rows: return
+            last_rowid = rows[-1][0]
+            yield [
+                {'product_id': product_id, 'id': review_id, 'date_collected': date_collected, 'content': full_text}
+                for _, product_id, review_id, date_collected, full_text in rows
+            ]
+
+    def save_raw_review(self, product_id, review_id, text):
+        """새로운 리뷰를 '분석 미완료(N)' 상태로 저장함."""
+        return bool(self.save_raw_reviews(product_id, [{'id': review_id, 'content': text}]))
+
+    @metrics.timed("storage_op_seconds", op="save_raw_reviews", backend="sqlite")
+    def save_raw_reviews(self, product_id, reviews):
+        """
+        리뷰 목록을 단일 트랜잭션으로 일괄 저장함.
+        이미 존재하는 ID와 배치 내부의 중복 ID는 건너뛰며, 실제 저장된 리뷰 목록(reviews의 부분 리스트)을 반환함.
+        """
+        collected_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if not reviews: return []
+        with self.lock, self.conn:
+            # 기존 ID 조회와 삽입 사이에 다른 워커가 같은 리뷰를 저장하지 않도록 쓰기 잠금을 먼저 확보함
+            self.conn.execute("BEGIN IMMEDIATE")
+            ids = list({item['id'] for item in reviews})
+            existing = set()
+            # SQLite 바인딩 변수 개수 상한(구버전 999)을 넘지 않도록 나누어 조회함
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                existing.update(row[0] for row in self.conn.execute(
+                    f"SELECT id FROM reviews WHERE id IN ({','.join('?' * len(batch))})", batch
+                ))
+            inserted = []
+            for item in reviews:
+                if item['id'] in existing: continue
+                existing.add(item['id'])
+                inserted.append(item)
+            self.conn.executemany(
+                "INSERT INTO reviews (product_id, id, date_collected, full_text, is_analyzed) "
+                "VALUES (?, ?, ?, ?, 'N') ON CONFLICT(id) DO NOTHING",
+                [(product_id, item['id'], collected_at, item['content']) for item in inserted]
+            )
+            return inserted
+
+    def update_analysis_result(self, review_id, analysis_data):
+        """AI 분석 결과를 반영하고 '분석 완료(Y)' 상태로 전환함."""
+        return self.update_analysis_results({review_id: analysis_data}) > 0
+
+    @metrics.timed("storage_op_seconds", op="update_analysis_results", backend="sqlite")
+    def update_analysis_results(self, results):
+        """
+        LLM 배치 전체의 분석 결과와 집계 테이블 증감분을 단일 트랜잭션으로 반영함.
+        트랜잭션 도중 오류가 발생하면 전체가 롤백되어 부분 반영 상태가 남지 않음. 반영된 건수를 반환함.
+        """
+        params = [
+            (
+                data.get('category', ''),
+                data.get('sentiment', ''),
+                str(data.get('urgency', '')),
+                data.get('summary', ''),
+                review_id,
+            )
+            for review_id, data in results.items()
+        ]
+        if not params: return 0
+        with self.lock, self.conn:
+            # 기존 값 조회(집계 차감)와 갱신 사이에 다른 워커 프로세스가 끼어들지 않도록 쓰기 잠금을 먼저 확보함
+            self.conn.execute("BEGIN IMMEDIATE")
+            # 집계 증감분: 재분석으로 덮어쓰는 행은 기존 결과를 차감하고 새 결과를 더함
+            deltas = {}
+            for review_id, data in results.items():
+                row = self.conn.execute(
+                    "SELECT product_id, date_collected, category, sentiment, urgency, is_analyzed FROM reviews WHERE id = ?",
+                    (review_id,)
+                ).fetchone()
+                if row is None: continue
+                product_id, date_collected, category, sentiment, urgency, is_analyzed = row
+                if is_analyzed == 'Y':
+                    old_key = ReviewAggregates.group_key(product_id, date_collected, category, sentiment, urgency)
+                    deltas[old_key] = deltas.get(old_key, 0) - 1
+                new_key = ReviewAggregates.group_key(product_id, date_collected, data.get('category', ''),
+                                                     data.get('sentiment', ''), data.get('urgency', ''))
+                deltas[new_key] = deltas.get(new_key, 0) + 1
+
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "UPDATE reviews SET category = ?, sentiment = ?, urgency = ?, summary = ?, is_analyzed = 'Y' "
+                "WHERE id = ?",
+                params
+            )
+            updated = self.conn.total_changes - before
+
+            self.conn.executemany(
+                "INSERT INTO review_aggregates (product_id, category, sentiment, urgency, day, count) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(product_id, category, sentiment, urgency, day) DO UPDATE SET count = count + excluded.count",
+                [key + (delta,) for key, delta in deltas.items() if delta]
+            )
+            self.conn.execute("DELETE FROM review_aggregates WHERE count <= 0")
+            return updated
+
+    def migrate_from_csv(self, csv_path):
+        """
+        기존 CSV DB를 스트리밍으로 읽어 SQLite로 이관함 (One-shot Migration).
+        동일 ID가 이미 존재하면 CSV의 값으로 덮어쓰므로(Upsert) 재실행해도 안전함.
+        """
+        migrated = 0
+        with open(csv_path, mode='r', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            next(reader, None) # 헤더 스킵
+            rows = (row[:len(COLUMNS)] for row in reader if len(row) >= len(COLUMNS))
+            with self.lock, self.conn:
+                # 행마다 execute를 호출하지 않고 MIGRATION_BATCH_SIZE 단위의 executemany로 일괄 삽입함
+                while True:
+                    batch = list(itertools.islice(rows, MIGRATION_BATCH_SIZE))
+                    if not batch: break
+                    self.conn.executemany(
+                        f"INSERT INTO reviews ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+                        "ON CONFLICT(id) DO UPDATE SET "
+                        "category = excluded.category, sentiment = excluded.sentiment, urgency = excluded.urgency, "
+                        "summary = excluded.summary, full_text = excluded.full_text, is_analyzed = excluded.is_analyzed",
+                        batch
+                    )
+                    migrated += len(batch)
+                # Upsert로 기존 분석 결과가 덮어써졌을 수 있으므로 집계는 이관 결과 기준으로 재구축함
+                self._rebuild_aggregates()
+        return migrated
+
+    def export_csv(self, csv_path=DEFAULT_EXPORT_PATH, overwrite_source=False):
+        """
+        CS팀의 엑셀 기반 업무 흐름을 유지하기 위해 기존 CSV와 동일한 형식(utf-8-sig)으로 내보냄.
+        커서를 스트리밍으로 순회하며 임시 파일에 기록 후 원자적으로 교체함.
+        이관 원본 CSV(migrate_from)로는 overwrite_source=True인 경우에만 내보냄 (원본 유실 방지).
+        """
+        if not overwrite_source and is_same_path(csv_path, self.migrate_from):
+            raise ValueError(f"내보내기 경로가 이관 원본 CSV와 같습니다: {csv_path} (덮어쓰려면 overwrite_source=True)")
+        os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+        tmp_path = f"{csv_path}.tmp"
+        exported = 0
+        with self.lock, open(tmp_path, mode='w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for row in self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM reviews ORDER BY rowid"):
+                writer.writerow(row)
+                exported += 1
+        os.replace(tmp_path, csv_path)
+        return exported
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def is_same_path(path, other):
+    return bool(path and other) and os.path.abspath(path) == os.path.abspath(other)
+
+if __name__ == "__main__":
+    # 운영 중 수동 이관/내보내기를 위한 간단한 CLI
+    # 사용법: python -m src.sqlite_storage migrate [csv_path]
+    #         python -m src.sqlite_storage export [csv_path (기본값: data/reviews_export.csv)] [--overwrite-source]
+    import sys
+    import yaml
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    command = args[0] if args else "export"
+    storage_config = {}
+    if os.path.exists("config/settings.yaml"):
+        with open("config/settings.yaml", "r", encoding='utf-8') as f:
+            storage_config = (yaml.safe_load(f) or {}).get('storage', {}) or {}
+    source_path = storage_config.get('csv_path', "data/reviews_db.csv")
+    # 수동 실행 시에는 자동 이관을 생략하고, 원본 경로는 내보내기 덮어쓰기 방지에만 사용함
+    storage = SQLiteReviewStorage(storage_config.get('sqlite_path', "data/reviews.db"), migrate_from=None)
+    storage.migrate_from = source_path
+    try:
+        if command == "migrate":
+            csv_path = args[1] if len(args) > 1 else source_path
+            logger.info(f"✅ 마이그레이션 완료: {storage.migrate_from_csv(csv_path)}건")
+        else:
+            csv_path = args[1] if len(args) > 1 else DEFAULT_EXPORT_PATH
+            try:
+                exported = storage.export_csv(csv_path, overwrite_source="--overwrite-source" in sys.argv)
+            except ValueError as e:
+                logger.error(f"❌ {e}. 원본을 덮어쓰려면 --overwrite-source를 지정하세요.")
+                sys.exit(1)
+            logger.info(f"✅ CSV 내보내기 완료: {exported}건 → {csv_path}")
+    finally:
+        storage.close()
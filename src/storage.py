@@ -1,17 +1,84 @@
 import csv
 import os
+import json
 import hashlib
+import functools
+import threading
 from datetime import datetime
 
+from src.review_index import ReviewIdIndex, iter_records
+from src.aggregates import ReviewAggregates
+from src.metrics import metrics
+from src.file_lock import FileLock
+
+def _locked(method):
+    """
+    저장소 파일을 변경하는 메서드를 프로세스 간 배타적 잠금 안에서 실행함.
+    여러 워커 프로세스가 같은 CSV에 추가(append)와 전체 재작성(rewrite)을 동시에 수행해 행이 유실되는 것을 방지함.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class FingerprintStore:
+    """
+    상품별 변경 감지 지문(리뷰 API URL, 첫 페이지 지문, ETag/Last-Modified)을 보관하는 JSON 사이드카입니다.
+    기록 시 임시 파일에 쓴 뒤 원자적으로 교체하여, 중단되어도 손상된 파일이 남지 않도록 함.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._fingerprints = None
+
+    def _load(self):
+        if self._fingerprints is None:
+            try:
+                with open(self.path, mode='r', encoding='utf-8') as f:
+                    self._fingerprints = json.load(f)
+            except (OSError, ValueError):
+                self._fingerprints = {}
+        return self._fingerprints
+
+    def get(self, product_id):
+        return self._load().get(product_id)
+
+    def set(self, product_id, fingerprint):
+        # 다른 워커가 기록한 지문을 덮어쓰지 않도록 기록 직전에 최신 파일을 다시 읽음 (호출 측에서 잠금을 보장)
+        self._fingerprints = None
+        fingerprints = self._load()
+        fingerprints[product_id] = fingerprint
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            json.dump(fingerprints, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
 class ReviewStorage:
     """
     수집된 리뷰와 AI 분석 결과를 로컬 저장소(CSV)에 관리하는 데이터 레이어입니다.
     파일 기반 시스템임에도 불구하고 데이터 중복 차단 및 상태 추적을 통해 DB 수준의 무결성을 유지하도록 설계되었습니다[cite: 7, 78].
     """
-    def __init__(self, filepath="data/reviews_db.csv"):
+    def __init__(self, filepath="data/reviews_db.csv", use_bloom_filter=True, use_aggregates=True):
         self.filepath = filepath
+        # 여러 워커 프로세스가 같은 저장소를 공유할 때 쓰기를 직렬화하는 파일 잠금 (사이드카 기록도 포함)
+        self.lock = FileLock.shared(f"{filepath}.lock")
         # 시스템 기동 시 스키마 정의 및 디렉토리 구조 자동 생성 보장
-        self._initialize_csv()
+        with self.lock:
+            self._initialize_csv()
+        # 매 조회마다 CSV를 선형 탐색하지 않도록 인스턴스당 1회 로딩되는 ID 해시 인덱스를 유지함
+        # Bloom Filter 사이드카는 신규 상품 백필처럼 '없음' 응답이 대부분인 경우 전체 로딩을 생략시켜 줌
+        bloom_path = f"{os.path.splitext(filepath)[0]}.bloom" if use_bloom_filter else None
+        # 인덱스 조회는 크롤러의 이벤트 루프에서 호출되므로 프로세스 간 파일 잠금 대신 메모리 인덱스만 보호하는 프로세스 내 락을 사용함
+        # (파일 변경과 인덱스 반영 사이에 조회가 끼어들어 새 행을 이중 집계하지 않도록, 쓰기 측도 해당 구간을 이 락으로 감쌈)
+        self._index_lock = threading.RLock()
+        self.id_index = ReviewIdIndex(
+            filepath, id_column=1, bloom_path=bloom_path, stamp_path=f"{os.path.splitext(filepath)[0]}.rewrite.json"
+        )
+        # 상품 × 카테고리 × 감성 × 긴급도 × 수집일 집계 사이드카 (분석 결과 반영 시 증분 갱신)
+        self.aggregates = ReviewAggregates.load(f"{os.path.splitext(filepath)[0]}.aggregates.json") if use_aggregates else None
+        # 전체 수집 전 '변경 없음' 프로브에 사용하는 상품별 지문 사이드카
+        self.fingerprints = FingerprintStore(f"{os.path.splitext(filepath)[0]}.fingerprints.json")
 
     def _initialize_csv(self):
         """
@@ -32,20 +99,65 @@ class ReviewStorage:
         """
         return hashlib.md5(unique_source.encode('utf-8')).hexdigest()
 
+    @metrics.timed("storage_op_seconds", op="is_review_exist", backend="csv")
     def is_review_exist(self, review_id):
         """
         수집된 리뷰의 중복 여부를 ID 기반으로 검색하여 데이터 오염을 방지함[cite: 78, 80].
-        선형 탐색 기반이나, 로컬 환경에서의 빠른 검색 속도를 유지하도록 최적화된 파일 I/O를 수행함.
+        메모리 해시 인덱스를 조회하므로 DB 크기와 무관하게 O(1)로 응답하며,
+        외부에서 CSV가 수정된 경우 인덱스가 이를 감지하여 자동으로 재구축됨.
+        크롤러(이벤트 루프)와 파이프라인의 저장 스레드가 동시에 호출하므로 인덱스 락 안에서 조회함
+        (다른 프로세스를 기다리는 파일 잠금은 잡지 않으므로 저장 스레드의 재작성/fsync 동안 이벤트 루프가 멈추지 않음).
         """
-        if not os.path.exists(self.filepath): return False   
-        with open(self.filepath, mode='r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            next(reader, None) # 헤더 스킵
-            for row in reader:
-                # 데이터 유효성 검증 후 ID 일치 여부 판별
-                if len(row) > 1 and row[1] == review_id: return True
-        return False
+        if not os.path.exists(self.filepath): return False
+        with self._index_lock:
+            return self.id_index.contains(review_id)
 
+    @_locked
+    def flush_index(self):
+        """
+        메모리 인덱스의 Bloom Filter와 집계 테이블을 사이드카 파일로 저장함.
+        사이클 종료 시점에 호출하여 다음 기동 시 CSV 전체 스캔 없이 인덱스/집계를 복원하도록 함.
+        """
+        with self._index_lock:
+            self.id_index.flush()
+        if self.aggregates is not None and self.aggregates.signature == self._file_signature():
+            self.aggregates.save()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _rebuild_aggregates(self, aggregates):
+        """CSV를 1회 스트리밍 스캔하여 분석 완료(Y) 리뷰의 집계를 재구축함 (사이드카 부재/외부 편집 시)."""
+        aggregates.reset()
+        signature = self._file_signature()
+        if signature:
+            with open(self.filepath, mode='r', encoding='utf-8-sig') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for row in reader:
+                    if len(row) > 8 and row[8] == 'Y':
+                        aggregates.add(row[0], row[2], row[3], row[4], row[5])
+        aggregates.mark_synced(signature)
+
+    @metrics.timed("storage_op_seconds", op="get_aggregates", backend="csv")
+    @_locked
+    def get_aggregates(self):
+        """
+        최신 상태의 집계 테이블(ReviewAggregates)을 반환함.
+        사이드카가 현재 CSV와 같은 시점이면 그대로 사용하므로 비용은 그룹 수에 비례하며,
+        외부 편집 등으로 시그니처가 어긋난 경우에만 CSV를 1회 재스캔함.
+        """
+        aggregates = self.aggregates if self.aggregates is not None else ReviewAggregates()
+        if aggregates.signature is None or aggregates.signature != self._file_signature():
+            self._rebuild_aggregates(aggregates)
+            aggregates.save()
+        return aggregates
+
+    @metrics.timed("storage_op_seconds", op="get_existing_product_ids", backend="csv")
     def get_existing_product_ids(self):
         """
         이미 데이터베이스에 존재하는 상품 ID 목록을 반환하여, 
@@ -61,47 +173,236 @@ class ReviewStorage:
                     product_ids.add(row[0]) # product_id 컬럼 활용
         return product_ids
 
+    def get_fingerprint(self, product_id):
+        """상품의 변경 감지 지문을 반환함 (전체 수집에 성공한 적이 없으면 None)."""
+        return self.fingerprints.get(product_id)
+
+    @_locked
+    def set_fingerprint(self, product_id, fingerprint):
+        """전체 수집에 성공한 상품의 최신 지문을 기록함."""
+        self.fingerprints.set(product_id, fingerprint)
+
+    def get_product_activity(self, since, initial_window=None):
+        """
+        상품별 리뷰 유입 현황을 집계함 (적응형 수집 주기 계산, 백로그의 초기 구축분 판별용).
+        since(datetime) 이후 수집된 리뷰 건수와 최초/가장 최근 수집 시각을 {product_id: {...}} 형태로 반환함.
+        initial_window(timedelta)를 지정하면 최초 수집 시각부터 해당 기간 내에 저장된 초기 구축분 건수(initial_count)도 함께 집계함.
+        """
+        activity = {}
+        if not os.path.exists(self.filepath): return activity
+        since_str = since.strftime("%Y-%m-%d %H:%M:%S")
+        with open(self.filepath, mode='r', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if len(row) < 3: continue
+                stats = activity.setdefault(row[0], {'recent_count': 0, 'first_collected': None, 'last_collected': None,
+                                                     'initial': {}, 'initial_until': None})
+                # 'YYYY-MM-DD HH:MM:SS' 형식은 문자열 비교만으로 시간 순서 비교가 가능함
+                if row[2] >= since_str:
+                    stats['recent_count'] += 1
+                if stats['first_collected'] is None or row[2] < stats['first_collected']:
+                    stats['first_collected'] = row[2]
+                    if initial_window is not None:
+                        # 최초 수집 시각이 앞당겨지면 초기 구간도 앞당겨지므로, 새 구간을 벗어난 시각별 건수는 버림
+                        until = datetime.strptime(row[2], "%Y-%m-%d %H:%M:%S") + initial_window
+                        stats['initial_until'] = until.strftime("%Y-%m-%d %H:%M:%S")
+                        stats['initial'] = {t: n for t, n in stats['initial'].items() if t <= stats['initial_until']}
+                if stats['initial_until'] is not None and row[2] <= stats['initial_until']:
+                    stats['initial'][row[2]] = stats['initial'].get(row[2], 0) + 1
+                if stats['last_collected'] is None or row[2] > stats['last_collected']:
+                    stats['last_collected'] = row[2]
+        for stats in activity.values():
+            for key in ('first_collected', 'last_collected'):
+                stats[key] = datetime.strptime(stats[key], "%Y-%m-%d %H:%M:%S") if stats[key] else None
+            stats['initial_count'] = sum(stats.pop('initial').values())
+            del stats['initial_until']
+        return activity
+
+    def iter_unanalyzed(self, chunk_size=500):
+        """
+        분석 미완료(N) 상태의 리뷰를 chunk_size 단위의 리스트로 순차 반환하는 제너레이터.
+        CSV를 한 줄씩 스트리밍하므로 DB 크기와 무관하게 메모리 사용량은 청크 1개 분량으로 제한됨.
+        청크마다 파일을 다시 열고 닫으므로(청크를 반환하는 동안 열린 핸들 없음), 순회 도중 update_analysis_results가
+        원본을 교체해도 안전함. 교체된 경우 재작성 스탬프의 체크포인트에서 이어 읽음 (재작성은 행 순서를 보존함).
+        """
+        rows = 0            # 지금까지 읽은 데이터 행 수
+        position = None     # 다음에 읽을 바이트 위치 (None이면 헤더부터)
+        inode = None
+        while True:
+            if not os.path.exists(self.filepath): return
+            chunk = []
+            with open(self.filepath, mode='rb') as f:
+                current_inode = os.fstat(f.fileno()).st_ino
+                skip = 0
+                if position is not None and current_inode != inode:
+                    # 다른 파일로 교체됨: 스탬프의 체크포인트(없으면 처음)부터 이미 읽은 행을 건너뛰며 이어 읽음
+                    checkpoint = self.id_index.locate_row(rows)
+                    checkpoint_rows, position = checkpoint if checkpoint else (0, None)
+                    skip = rows - checkpoint_rows
+                records = iter_records(f, position or 0)
+                if position is None:
+                    for _, position in records:
+                        break # 헤더 스킵
+                for row, end in records:
+                    position = end
+                    if skip:
+                        skip -= 1
+                        continue
+                    rows += 1
+                    if len(row) < 9 or row[8] != 'N': continue
+                    chunk.append({'product_id': row[0], 'id': row[1], 'date_collected': row[2], 'content': row[7]})
+                    if len(chunk) >= chunk_size:
+                        break
+                inode = current_inode
+            if not chunk: return
+            yield chunk
+            if len(chunk) < chunk_size: return
+
     def save_raw_review(self, product_id, review_id, text):
         """
         새로운 리뷰 수집 시 초기 로우 데이터를 '분석 미완료(N)' 상태로 저장함.
         데이터 흐름의 추적성을 위해 수집 시점(Timestamp)을 함께 기록함[cite: 85, 141].
         """
-        if self.is_review_exist(review_id): return False
-        with open(self.filepath, mode='a', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
+        return bool(self.save_raw_reviews(product_id, [{'id': review_id, 'content': text}]))
+
+    @metrics.timed("storage_op_seconds", op="save_raw_reviews", backend="csv")
+    @_locked
+    def save_raw_reviews(self, product_id, reviews):
+        """
+        크롤러가 반환한 리뷰 목록을 단 한 번의 파일 오픈으로 일괄 저장함.
+        reviews: [{'id': '...', 'content': '...'}, ...] 형태의 리스트
+        이미 저장된 ID와 배치 내부의 중복 ID는 건너뛰며, 실제 저장된 리뷰 목록(reviews의 부분 리스트)을 반환함.
+        """
+        collected_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        new_rows = []
+        inserted = []
+        seen = set()
+        for item in reviews:
+            review_id = item['id']
+            if review_id in seen or self.is_review_exist(review_id): continue
+            seen.add(review_id)
             # 순서: product_id, id, date, cat, sent, urg, summ, text, is_analyzed
-            writer.writerow([product_id, review_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), '', '', '', '', text, 'N'])
-        return True
+            new_rows.append([product_id, review_id, collected_at, '', '', '', '', item['content'], 'N'])
+            inserted.append(item)
+
+        if not new_rows: return []
+        # 미분석(N) 행의 추가는 집계에 영향이 없으므로, 쓰기 전 집계가 최신이었다면 시그니처만 이어받음
+        aggregates_synced = self.aggregates is not None and self.aggregates.signature == self._file_signature()
+        with self._index_lock:
+            with open(self.filepath, mode='a', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerows(new_rows)
+            # 파일 쓰기 직후 인덱스에 반영하여 자체 쓰기를 외부 편집으로 오인하지 않도록 함
+            for row in new_rows:
+                self.id_index.add(row[1])
+        if aggregates_synced:
+            self.aggregates.mark_synced(self._file_signature())
+        return inserted
 
     def update_analysis_result(self, review_id, analysis_data):
         """
         AI 분석 결과를 기존 로우 데이터에 업데이트하고 '분석 완료(Y)' 상태로 전환함.
-        Atomic한 파일 쓰기를 위해 임시 리스트에 로드 후 전체를 다시 쓰는 방식을 채택함[cite: 102].
         """
-        rows = []
-        updated = False
-        if not os.path.exists(self.filepath): return False
-        
-        with open(self.filepath, mode='r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            header = next(reader, None)
-            if header: rows.append(header)
-            
-            for row in reader:
-                # 목표 데이터 탐색 및 인덱스 기반의 안정적인 필드 업데이트
-                if len(row) > 1 and row[1] == review_id:
-                    row[3] = analysis_data.get('category', '')
-                    row[4] = analysis_data.get('sentiment', '')
-                    row[5] = analysis_data.get('urgency', '')
-                    row[6] = analysis_data.get('summary', '')
-                    row[8] = 'Y' # 상태 플래그 전환
-                    updated = True
-                rows.append(row)
-        
-        # 데이터 정합성 보장을 위해 업데이트가 발생한 경우에만 물리적인 파일 쓰기 수행
-        if updated:
-            with open(self.filepath, mode='w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f)
-                writer.writerows(rows)
-            return True
-        return False
\ No newline at end of file
+        return self.update_analysis_results({review_id: analysis_data}) > 0
+
+    @metrics.timed("storage_op_seconds", op="update_analysis_results", backend="csv")
+    @_locked
+    def update_analysis_results(self, results):
+        """
+        LLM 배치 전체의 분석 결과를 단 1회의 스트리밍 패스로 반영함.
+        results: {review_id: analysis_data, ...} 형태의 딕셔너리
+        전체를 메모리에 올리지 않고 임시 파일에 한 줄씩 기록한 뒤 원자적으로 교체(Atomic Rename)하므로,
+        쓰기 도중 프로세스가 중단되어도 기존 DB가 잘리거나 손상되지 않음. 반영된 건수를 반환함.
+        """
+        if not results or not os.path.exists(self.filepath): return 0
+        # 재작성 후에는 기준 시그니처만 갱신하므로, 그 전에 다른 워커가 추가한 ID를 인덱스에 먼저 반영함
+        with self._index_lock:
+            self.id_index.refresh()
+
+        updated = 0
+        tmp_path = f"{self.filepath}.tmp"
+        # 집계가 최신이면 변경된 행만 증분 반영하고, 낡았다면 어차피 수행하는 전체 재작성 패스에서 함께 재구축함
+        aggregates = self.aggregates
+        rebuild_aggregates = aggregates is not None and aggregates.signature != self._file_signature()
+        if aggregates is not None:
+            # 재작성이 중간에 실패해도 어긋난 집계가 사용되지 않도록, 교체 완료 전까지는 무효 상태로 둠
+            if rebuild_aggregates:
+                aggregates.reset()
+            aggregates.signature = None
+        try:
+            with open(self.filepath, mode='r', encoding='utf-8-sig') as src, \
+                 open(tmp_path, mode='w', newline='', encoding='utf-8-sig') as dst:
+                reader = csv.reader(src)
+                writer = csv.writer(dst)
+                header = next(reader, None)
+                if header: writer.writerow(header)
+
+                # 재작성은 행 순서와 ID를 보존하므로, 다른 워커의 인덱스가 이어 읽을 수 있도록 행 번호별 바이트 위치를 기록함
+                checkpoints = []
+                rows = 0
+                for row in reader:
+                    if rows % self.id_index.CHECKPOINT_ROWS == 0:
+                        checkpoints.append((rows, dst.tell()))
+                    rows += 1
+                    # 목표 데이터 탐색 및 인덱스 기반의 안정적인 필드 업데이트
+                    analysis_data = results.get(row[1]) if len(row) > 8 else None
+                    if analysis_data is not None:
+                        # 재분석으로 덮어쓰는 경우 기존 분석 결과의 집계를 먼저 차감함
+                        if aggregates is not None and not rebuild_aggregates and row[8] == 'Y':
+                            aggregates.add(row[0], row[2], row[3], row[4], row[5], delta=-1)
+                        row[3] = analysis_data.get('category', '')
+                        row[4] = analysis_data.get('sentiment', '')
+                        row[5] = analysis_data.get('urgency', '')
+                        row[6] = analysis_data.get('summary', '')
+                        row[8] = 'Y' # 상태 플래그 전환
+                        updated += 1
+                        if aggregates is not None and not rebuild_aggregates:
+                            aggregates.add(row[0], row[2], row[3], row[4], row[5])
+                    if rebuild_aggregates and len(row) > 8 and row[8] == 'Y':
+                        aggregates.add(row[0], row[2], row[3], row[4], row[5])
+                    writer.writerow(row)
+
+                # 교체 전에 디스크 기록을 확정하여 전원 차단 시에도 빈 파일로 교체되는 상황을 방지함
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            # 데이터 정합성 보장을 위해 업데이트가 발생한 경우에만 원본을 교체함
+            # 임시 파일 작성/fsync는 인덱스 락 밖에서 수행하고, 교체와 인덱스 반영 구간만 잠금
+            if updated:
+                with self._index_lock:
+                    self.id_index.record_rewrite(tmp_path, rows, checkpoints)
+                    os.replace(tmp_path, self.filepath)
+                    # ID 구성은 변하지 않았으므로 재구축 없이 인덱스의 기준 시그니처만 갱신함
+                    self.id_index.mark_synced()
+            if aggregates is not None:
+                # 집계 사이드카는 그룹 수만큼만 기록하므로 CSV 재작성 대비 비용이 무시할 수준임
+                aggregates.mark_synced(self._file_signature())
+                aggregates.save()
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return updated
+
+def create_storage(config=None):
+    """
+    설정 파일의 storage 섹션에 따라 저장소 백엔드를 선택하는 팩토리 함수.
+    backend: "csv"(기본값) 또는 "sqlite" — 두 백엔드는 동일한 인터페이스를 제공함.
+    """
+    storage_config = (config or {}).get('storage', {}) or {}
+    backend = storage_config.get('backend', 'csv')
+    csv_path = storage_config.get('csv_path', "data/reviews_db.csv")
+
+    if backend == 'sqlite':
+        # SQLite 백엔드를 사용하지 않는 환경에서는 불필요한 모듈 로딩을 생략함
+        from src.sqlite_storage import SQLiteReviewStorage
+        return SQLiteReviewStorage(
+            filepath=storage_config.get('sqlite_path', "data/reviews.db"),
+            migrate_from=csv_path,
+            busy_timeout_seconds=storage_config.get('busy_timeout_seconds', 30)
+        )
+    return ReviewStorage(
+        csv_path,
+        use_bloom_filter=storage_config.get('bloom_filter', True),
+        use_aggregates=storage_config.get('aggregates', True)
+    )
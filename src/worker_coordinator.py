@@ -0,0 +1,225 @@
+import os
+import json
+import bisect
+import socket
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+from src.file_lock import FileLock
+from src.log import get_logger
+
+logger = get_logger("worker")
+
+# 상품 분배 방식
+SHARD_MODES = ("hash", "lease")
+# 상품이 아닌 공용 작업(백로그 재처리 등)을 한 워커만 실행하도록 잠그는 리스 키 접두사
+SINGLETON_PREFIX = "__"
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class ConsistentHashRing:
+    """
+    워커 목록 위에 상품을 분배하는 Consistent Hashing 링입니다.
+    워커 1개가 추가/이탈해도 전체 상품 중 약 1/N만 담당 워커가 바뀌므로,
+    워커별로 쌓인 상태(수집 주기, 근사 중복 인덱스 등)가 대부분 그대로 유지됩니다.
+    """
+    def __init__(self, workers, replicas=64):
+        self._ring = sorted((_hash(f"{worker}#{i}"), worker) for worker in workers for i in range(replicas))
+        self._keys = [key for key, _ in self._ring]
+
+    def owner(self, item):
+        if not self._ring: return None
+        index = bisect.bisect(self._keys, _hash(item)) % len(self._ring)
+        return self._ring[index][1]
+
+class WorkerCoordinator:
+    """
+    여러 scheduler.py 프로세스(같은 호스트 또는 공유 볼륨을 사용하는 여러 호스트)가 상품을 나누어 수집하도록 조율합니다.
+    - 멤버십: 각 워커는 heartbeat_seconds마다 members.json에 생존 신호를 기록하며, lease_ttl_seconds 동안 신호가 없으면 이탈로 간주함
+    - 분배: hash 모드는 생존 워커로 구성한 Consistent Hashing 링으로 담당 상품을 정하고,
+            lease 모드는 모든 워커가 수집 예정 상품을 선착순으로 가져감
+    - 배타성: 두 모드 모두 상품 수집 전 leases.json에서 리스를 획득하며, 수집 중에는 백그라운드 스레드가 리스를 갱신함.
+             워커가 죽으면 리스가 만료되어 다른 워커가 인수(Takeover)함
+    - 공유 스케줄: 리스 해제 시 다음 수집 예정 시각을 함께 기록하여, 다른 워커가 방금 수집된 상품을 중복 수집하지 않도록 함
+    모든 상태 파일은 FileLock으로 보호되는 읽기-수정-쓰기 후 원자적 교체로 갱신됩니다.
+    """
+    def __init__(self, state_dir="data/workers", worker_id=None, mode="hash", lease_ttl_seconds=900,
+                 heartbeat_seconds=30, replicas=64):
+        if mode not in SHARD_MODES:
+            raise ValueError(f"지원하지 않는 워커 분배 방식입니다: {mode} (허용값: {', '.join(SHARD_MODES)})")
+        self.state_dir = state_dir
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.mode = mode
+        self.lease_ttl = timedelta(seconds=lease_ttl_seconds)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.replicas = replicas
+
+        self.lock = FileLock.shared(os.path.join(state_dir, "coordination.lock"))
+        self.members_path = os.path.join(state_dir, "members.json")
+        self.leases_path = os.path.join(state_dir, "leases.json")
+        self.held = set()
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # 상태 파일 입출력
+    # ------------------------------------------------------------------
+    def _read(self, path):
+        try:
+            with open(path, mode='r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{self.worker_id}.tmp"
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _ts(value):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+
+    @staticmethod
+    def _parse(value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            return None
+
+    # ------------------------------------------------------------------
+    # 멤버십
+    # ------------------------------------------------------------------
+    def heartbeat(self, now=None):
+        """생존 신호를 기록하고, 보유 중인 리스의 만료 시각을 연장함."""
+        now = now or datetime.now()
+        with self.lock:
+            members = self._read(self.members_path)
+            members[self.worker_id] = self._ts(now)
+            self._write(self.members_path, members)
+            with self._held_lock:
+                held = set(self.held)
+            if held:
+                leases = self._read(self.leases_path)
+                for key in held:
+                    lease = leases.get(key)
+                    if lease and lease.get('owner') == self.worker_id:
+                        lease['expires_at'] = self._ts(now + self.lease_ttl)
+                    else:
+                        # 만료 후 다른 워커가 인수한 리스는 더 이상 보유하지 않은 것으로 처리함
+                        with self._held_lock:
+                            self.held.discard(key)
+                self._write(self.leases_path, leases)
+
+    def live_workers(self, now=None):
+        now = now or datetime.now()
+        members = self._read(self.members_path)
+        live = {worker for worker, seen in members.items()
+                if (self._parse(seen) or datetime.min) >= now - self.lease_ttl}
+        live.add(self.worker_id)
+        return sorted(live)
+
+    def assigned(self, products, now=None):
+        """이 워커가 수집을 시도할 상품 목록 (hash 모드: 링에서 담당하는 상품 / lease 모드: 전체)."""
+        if self.mode == "lease":
+            return list(products)
+        ring = ConsistentHashRing(self.live_workers(now), replicas=self.replicas)
+        return [p for p in products if ring.owner(p['id']) == self.worker_id]
+
+    # ------------------------------------------------------------------
+    # 리스
+    # ------------------------------------------------------------------
+    def acquire(self, keys, now=None):
+        """
+        리스가 없거나 만료된 항목의 리스를 획득하고 획득한 키 목록을 반환함.
+        다른 워커가 기록한 다음 수집 예정 시각(next_due)이 아직 오지 않은 항목은 건너뜀.
+        """
+        now = now or datetime.now()
+        acquired = []
+        with self.lock:
+            leases = self._read(self.leases_path)
+            for key in keys:
+                lease = leases.get(key) or {}
+                owner = lease.get('owner')
+                expires_at = self._parse(lease.get('expires_at'))
+                if owner and owner != self.worker_id and expires_at and expires_at > now:
+                    continue
+                next_due = self._parse(lease.get('next_due'))
+                if not owner and next_due and next_due > now:
+                    continue
+                if owner and owner != self.worker_id:
+                    logger.warning(f"   ♻️ [Worker] {owner}의 만료된 리스를 인수합니다: {key}",
+                                   extra={'worker_id': self.worker_id, 'lease_key': key, 'previous_owner': owner})
+                leases[key] = {**lease, 'owner': self.worker_id, 'expires_at': self._ts(now + self.lease_ttl)}
+                acquired.append(key)
+            if acquired:
+                self._write(self.leases_path, leases)
+        with self._held_lock:
+            self.held.update(acquired)
+        return acquired
+
+    def release(self, next_due=None, keys=None):
+        """
+        리스를 반납함. next_due({key: datetime})를 전달하면 다음 수집 예정 시각을 공유 스케줄로 남김.
+        keys를 생략하면 next_due에 포함된 키를 반납함.
+        """
+        next_due = next_due or {}
+        keys = list(keys if keys is not None else next_due)
+        with self.lock:
+            leases = self._read(self.leases_path)
+            for key in keys:
+                lease = leases.get(key)
+                if not lease or lease.get('owner') != self.worker_id: continue
+                lease.pop('owner', None)
+                lease.pop('expires_at', None)
+                if next_due.get(key):
+                    lease['next_due'] = self._ts(next_due[key])
+            self._write(self.leases_path, leases)
+        with self._held_lock:
+            self.held.difference_update(keys)
+
+    def acquire_singleton(self, name, now=None):
+        """백로그 재처리처럼 전체 워커 중 하나만 실행해야 하는 작업의 리스를 획득함."""
+        return bool(self.acquire([f"{SINGLETON_PREFIX}{name}"], now))
+
+    def release_singleton(self, name, next_due=None):
+        key = f"{SINGLETON_PREFIX}{name}"
+        self.release({key: next_due} if next_due else None, keys=[key])
+
+    # ------------------------------------------------------------------
+    # 백그라운드 생존 신호
+    # ------------------------------------------------------------------
+    def start(self):
+        """수집이 리스 만료 시간보다 오래 걸려도 리스를 잃지 않도록 생존 신호/리스 갱신 스레드를 기동함."""
+        if self._thread: return
+        self.heartbeat()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"worker-heartbeat-{self.worker_id}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.warning(f"   ⚠️ [Worker] 생존 신호 기록 실패: {e}", extra={'worker_id': self.worker_id})
+
+    def stop(self):
+        """정상 종료 시 보유 리스를 반납하고 멤버 목록에서 제외하여, 다른 워커가 만료를 기다리지 않고 즉시 인수하도록 함."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.heartbeat_seconds)
+            self._thread = None
+        with self._held_lock:
+            held = list(self.held)
+        if held:
+            self.release(keys=held)
+        with self.lock:
+            members = self._read(self.members_path)
+            members.pop(self.worker_id, None)
+            self._write(self.members_path, members)
@@ -0,0 +1,73 @@
+import csv
+
+import pytest
+
+from src.aggregates import ReviewAggregates
+from src.storage import ReviewStorage
+
+
+def analysis(category, sentiment, urgency):
+    return {'category': category, 'sentiment': sentiment, 'urgency': urgency, 'summary': "요약"}
+
+
+def make_storage(backend, tmp_path):
+    if backend == "sqlite":
+        from src.sqlite_storage import SQLiteReviewStorage
+        return SQLiteReviewStorage(str(tmp_path / "reviews.db"), migrate_from=None)
+    return ReviewStorage(str(tmp_path / "reviews_db.csv"))
+
+
+def rebuilt(storage):
+    if isinstance(storage, ReviewStorage):
+        aggregates = ReviewAggregates()
+        storage._rebuild_aggregates(aggregates)
+        return aggregates.counts
+    with storage.lock, storage.conn:
+        storage._rebuild_aggregates()
+    return storage.get_aggregates().counts
+
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_incremental_updates_match_full_rebuild(tmp_path, backend):
+    storage = make_storage(backend, tmp_path)
+    storage.save_raw_reviews('p1', [{'id': f"a{i}", 'content': f"리뷰 {i}"} for i in range(6)])
+    storage.save_raw_reviews('p2', [{'id': f"b{i}", 'content': f"리뷰 {i}"} for i in range(4)])
+    storage.get_aggregates()
+
+    storage.update_analysis_results({'a0': analysis("배송", "Negative", 5), 'a1': analysis("배송", "Negative", 4),
+                                     'b0': analysis("품질", "Positive", 1)})
+    # 재분석으로 기존 결과를 덮어쓰는 경우 (이전 그룹 차감 + 새 그룹 가산)
+    storage.update_analysis_results({'a0': analysis("교환", "Neutral", 3), 'a2': analysis("배송", "Negative", 4)})
+    storage.save_raw_reviews('p1', [{'id': "a9", 'content': "추가 리뷰"}])
+    storage.update_analysis_results({'a9': analysis("배송", "Negative", 4), 'b1': analysis("품질", "Positive", "1")})
+
+    incremental = storage.get_aggregates().counts
+    assert incremental == rebuilt(storage)
+    assert sum(incremental.values()) == 6
+
+
+def test_csv_export_needs_no_optional_dependency(tmp_path):
+    aggregates = ReviewAggregates()
+    aggregates.add('p1', "2026-01-05 10:00:00", "배송", "Negative", 5)
+    aggregates.add('p1', "2026-01-05 11:00:00", "배송", "Negative", 5)
+    path = tmp_path / "review_aggregates.csv"
+
+    assert aggregates.export(str(path)) == 1
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [['product_id', 'category', 'sentiment', 'urgency', 'day', 'count'],
+                    ['p1', "배송", "Negative", '5', "2026-01-05", '2']]
+
+
+def test_parquet_export_without_pyarrow_raises_clear_error(tmp_path, monkeypatch):
+    import builtins
+    real_import = builtins.__import__
+
+    def without_pyarrow(name, *args, **kwargs):
+        if name.startswith("pyarrow"):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', without_pyarrow)
+    with pytest.raises(ImportError, match="pyarrow"):
+        ReviewAggregates().export(str(tmp_path / "review_aggregates.parquet"))
@@ -0,0 +1,73 @@
+import os
+import asyncio
+import sqlite3
+
+import pytest
+
+import src.processor as processor_module
+from src.analysis_cache import AnalysisCache
+from src.processor import ReviewProcessor
+from src.runtime import RuntimeContext
+from benchmarks.fixtures import StubGeminiClient
+
+
+def make_processor(tmp_path, **cache):
+    config = {'gemini': {'api_key': "test", 'model_name': "stub-model", 'requests_per_minute': None,
+                         'cache': {'path': str(tmp_path / "llm_cache.db"), **cache}}}
+    return ReviewProcessor(config=config, client=StubGeminiClient(latency=0))
+
+
+def test_cache_hit_skips_api_and_prompt_version_invalidates(tmp_path, monkeypatch):
+    processor = make_processor(tmp_path)
+    reviews = [{'id': 'r1', 'text': "배송이 빨라요"}, {'id': 'r2', 'text': "포장이  꼼꼼해요"}]
+
+    first = asyncio.run(processor.analyze_reviews_async(reviews))
+    assert processor._client.reviews_analyzed == 2
+
+    # 다른 상품/ID라도 본문(공백 정규화 포함)이 같으면 API 호출 없이 캐시 결과를 재사용함
+    again = [{'id': 'x1', 'text': "배송이 빨라요"}, {'id': 'x2', 'text': "포장이 꼼꼼해요"}]
+    second = asyncio.run(processor.analyze_reviews_async(again))
+    assert processor._client.reviews_analyzed == 2
+    assert [r['id'] for r in second] == ['x1', 'x2']
+    assert [r['summary'] for r in second] == [r['summary'] for r in first]
+    assert processor.cache.stats()['hits'] == 2
+
+    monkeypatch.setattr(processor_module, "PROMPT_VERSION", "next")
+    asyncio.run(processor.analyze_reviews_async(again))
+    assert processor._client.reviews_analyzed == 4
+
+
+def test_eviction_runs_periodically_and_keeps_recent_entries(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "llm_cache.db"), max_entries=3, max_age_days=None, evict_every=10)
+    evictions = []
+    original = cache.evict
+    cache.evict = lambda: (evictions.append(cache._count), original())[1]
+
+    cache.put_many({'a': {'v': 1}})
+    cache.put_many({'b': {'v': 2}})
+    assert evictions == []  # 한도 이하이고 주기에도 도달하지 않았으므로 정리하지 않음
+
+    cache.get_many(['a'])  # 'a'를 최근 사용 항목으로 만들어 'b'가 먼저 밀려나게 함
+    cache.put_many({'c': {'v': 3}, 'd': {'v': 4}})
+    assert evictions == [4]
+    assert set(cache.get_many(['a', 'b', 'c', 'd'])) == {'a', 'c', 'd'}
+    assert cache._count == 3
+
+
+def test_gemini_reload_closes_the_replaced_cache(tmp_path):
+    config_path = tmp_path / "settings.yaml"
+    write = lambda model: config_path.write_text(
+        f"gemini:\n  api_key: test\n  model_name: {model}\n  cache:\n    path: {tmp_path / 'llm_cache.db'}\n", encoding='utf-8'
+    )
+    write("model-a")
+    runtime = RuntimeContext(str(config_path))
+    old_processor = runtime.processor
+
+    write("model-b")
+    os.utime(config_path, ns=(0, os.stat(config_path).st_mtime_ns + 1_000_000_000))
+    assert runtime.reload_if_changed() == {'gemini'}
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        old_processor.cache.conn.execute("SELECT 1")
+    assert runtime.processor is not old_processor and runtime.processor.model_name == "model-b"
+    runtime.close()
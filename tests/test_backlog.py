@@ -0,0 +1,56 @@
+import asyncio
+import csv
+from datetime import datetime, timedelta
+
+from src.backlog import BacklogWorker
+from src.storage import ReviewStorage
+
+
+class FakeProcessor:
+    async def analyze_reviews_async(self, batch):
+        return [{'id': review['id'], 'category': "배송", 'sentiment': "Negative", 'urgency': 5, 'summary': "지연"}
+                for review in batch]
+
+
+class RecordingNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def enqueue(self, result):
+        self.sent.append(result['id'])
+
+
+def write_rows(storage, rows):
+    with open(storage.filepath, mode='a', newline='', encoding='utf-8-sig') as f:
+        csv.writer(f).writerows(rows)
+
+
+def test_chunks_survive_rewrites_between_chunks(tmp_path):
+    """청크마다 결과를 반영(파일 교체)해도 남은 청크를 빠짐없이, 중복 없이 이어 읽어야 함."""
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    collected = (datetime(2026, 1, 1) - timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+    write_rows(storage, [['p1', f"r{i}", collected, '', '', '', '', f"리뷰 {i}\n여러 줄", 'N'] for i in range(7)])
+
+    worker = BacklogWorker(FakeProcessor(), storage, chunk_size=2, min_age_minutes=0)
+    stats = asyncio.run(worker.run(now=datetime(2026, 1, 1)))
+
+    assert stats['scanned'] == 7 and stats['analyzed'] == 7
+    assert list(storage.iter_unanalyzed()) == []
+
+
+def test_recent_rows_are_deferred_and_backfill_is_muted(tmp_path):
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    now = datetime(2026, 10, 16, 12, 0, 0)
+    at = lambda minutes: (now - timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
+    write_rows(storage, [
+        ['new', 'b1', at(600), '', '', '', '', "초기 구축분", 'N'],
+        ['old', 'o0', at(6000), '', '', '', '', "첫 수집", 'Y'],
+        ['old', 'o1', at(120), '', '', '', '', "재분석 대상", 'N'],
+        ['old', 'o2', at(5), '', '', '', '', "파이프라인 분석 중", 'N'],
+    ])
+    notifier = RecordingNotifier()
+    worker = BacklogWorker(FakeProcessor(), storage, notifier, stale_after_hours=1000, min_age_minutes=30)
+    stats = asyncio.run(worker.run(now=now))
+
+    assert stats['deferred'] == 1 and stats['muted'] == 1
+    assert notifier.sent == ['o1']
@@ -0,0 +1,87 @@
+import os
+import sys
+import asyncio
+import subprocess
+from types import SimpleNamespace
+
+from src.change_probe import ChangeProbe, build_fingerprint, UNCHANGED, CHANGED, UNKNOWN
+
+RECORDS = [{'id': 1, 'content': "배송 빨라요"}, {'id': 2, 'content': "포장 꼼꼼"}]
+
+
+class FakeSession:
+    """
+    요청 헤더를 기록하고 지정한 응답(상태 코드, JSON 본문)을 순서대로 돌려주는 requests.Session 스텁.
+    연결 오류는 requests.ConnectionError의 상위 클래스인 내장 ConnectionError로 흉내 내어 requests 없이도 실행됨.
+    """
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(headers)
+        status, payload = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(status, Exception):
+            raise status
+        return SimpleNamespace(status_code=status, ok=200 <= status < 400, json=lambda: payload)
+
+
+BROWSER_HEADERS = {'User-Agent': "Mozilla/5.0 (X11) Chrome/120", 'Cookie': "consent=yes; sid=abc",
+                   'Accept-Language': "ko-KR", 'X-Requested-With': "XMLHttpRequest"}
+
+
+def fingerprint():
+    return build_fingerprint(
+        "https://shop.example/api/reviews?page=1", ('data', 'reviews'), RECORDS, etag='"v1"',
+        request_headers=BROWSER_HEADERS
+    )
+
+
+def test_probe_reuses_browser_user_agent_and_cookies():
+    session = FakeSession((304, None))
+    probe = ChangeProbe(session=session)
+    probe.remember_session('p1', BROWSER_HEADERS)
+
+    assert asyncio.run(probe.probe('p1', fingerprint())) == UNCHANGED
+    headers = session.requests[0]
+    assert headers['user-agent'] == "Mozilla/5.0 (X11) Chrome/120"
+    assert headers['cookie'] == "consent=yes; sid=abc"
+    assert headers['If-None-Match'] == '"v1"'
+    assert 'User-Agent' not in headers and 'x-requested-with' not in headers
+
+
+def test_cookies_are_never_persisted_with_the_fingerprint(tmp_path):
+    from src.storage import ReviewStorage
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    storage.set_fingerprint('p1', fingerprint())
+    with open(storage.fingerprints.path, encoding='utf-8') as f:
+        assert "sid=abc" not in f.read()
+    assert fingerprint()['headers'] == {'user-agent': "Mozilla/5.0 (X11) Chrome/120", 'accept-language': "ko-KR"}
+
+    # 이전 버전이 지문에 저장한 쿠키는 재사용하지 않고, 새 프로브 인스턴스(재기동)는 쿠키 없이 요청함
+    legacy = {**fingerprint(), 'headers': {**fingerprint()['headers'], 'cookie': "sid=old"}}
+    session = FakeSession((304, None))
+    assert asyncio.run(ChangeProbe(session=session).probe('p1', legacy)) == UNCHANGED
+    assert 'cookie' not in session.requests[0]
+
+
+def test_probe_compares_first_page_and_handles_failures():
+    payload = lambda records: {'data': {'reviews': records}}
+    session = FakeSession((200, payload(RECORDS)), (200, payload([{'id': 3, 'content': "신규"}] + RECORDS)),
+                          (200, payload([])), (503, None), (ConnectionError("reset"), None))
+    probe = ChangeProbe(session=session)
+    statuses = [asyncio.run(probe.probe('p1', fingerprint())) for _ in range(5)]
+    assert statuses == [UNCHANGED, CHANGED, UNKNOWN, UNKNOWN, UNKNOWN]
+
+
+def test_consecutive_unchanged_falls_back_to_full_crawl():
+    probe = ChangeProbe(session=FakeSession((304, None)), max_consecutive_unchanged=3)
+    statuses = [asyncio.run(probe.probe('p1', fingerprint())) for _ in range(8)]
+    assert statuses == [UNCHANGED] * 3 + [UNKNOWN] + [UNCHANGED] * 3 + [UNKNOWN]
+
+
+def test_requests_is_imported_lazily():
+    code = "import sys; import src.change_probe; print('requests' in sys.modules)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+
+import pytest
+
+from src import review_api
+from src.storage import ReviewStorage
+from benchmarks.fixtures import FixtureSite
+
+
+def test_review_key_matches_across_modes():
+    """같은 리뷰를 DOM 표기와 API 표기로 받았을 때 동일한 ID 원천 문자열이 생성되어야 함."""
+    author_hash = hashlib.md5("user5".encode('utf-8')).hexdigest()
+    dom_key = review_api.review_key("p1", "배송 빨라요\n  좋아요", author_hash, "26.01.05", "5점")
+    api_record = review_api.normalize_record({
+        'id': 5, 'content': "<p>배송 빨라요 좋아요</p>", 'created_at': "2026-01-05T09:00:00", 'author': "user5", 'rating': 5,
+    })
+    api_key = review_api.review_key("p1", api_record['content'], author_hash, api_record['date'], api_record['rating'])
+    assert dom_key == api_key
+
+
+def _content_keys(storage):
+    return review_api.ContentKeyIndex(lambda source: storage.is_review_exist(storage.generate_id(source)))
+
+
+def _crawl_page(storage, product_id, records):
+    """크롤러의 페이지 처리와 같은 순서로 중단 지점을 찾고, 신규 리뷰에 ID를 부여하여 반환함."""
+    content_keys = _content_keys(storage)
+    entries = [review_api.id_entry(product_id, record) for record in records]
+    stop = review_api.find_stop_index(entries, content_keys, content_keys.exists)
+    return [
+        {'id': storage.generate_id(entry['upstream'] or content_keys.assign(entry['content_key'])),
+         'content': entry['record']['content']}
+        for entry in entries[:stop]
+    ]
+
+
+def _record(content, upstream_id='', date="26.01.05"):
+    return {'content': content, 'date': date, 'rating': "5점", 'author_hash': '', 'upstream_id': upstream_id}
+
+
+def test_upstream_id_is_primary_and_content_key_recognises_other_mode(tmp_path):
+    """DOM 모드(본문 기반 ID)로 저장된 리뷰를 network 모드가 플랫폼 ID로 다시 만나도 저장된 리뷰로 인식해야 함."""
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    stored = _crawl_page(storage, "p1", [_record("좋아요"), _record("배송 빨라요")])
+    storage.save_raw_reviews("p1", stored)
+
+    record = review_api.normalize_record({'id': 77, 'content': "좋아요", 'created_at': "2026-01-05", 'rating': 5})
+    entry = review_api.id_entry("p1", {**record, 'author_hash': ''})
+    assert entry['upstream'] == review_api.upstream_key("p1", "77")
+    assert _crawl_page(storage, "p1", [{**record, 'author_hash': ''}, _record("배송 빨라요", "78")]) == []
+
+
+def test_identical_short_reviews_on_same_day_are_all_saved(tmp_path):
+    """작성자/플랫폼 ID 없이 같은 날 같은 문구로 작성된 서로 다른 리뷰가 하나로 합쳐져 유실되지 않아야 함."""
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    reviews = _crawl_page(storage, "p1", [_record("좋아요") for _ in range(3)])
+    assert len(storage.save_raw_reviews("p1", reviews)) == 3
+
+
+@pytest.mark.parametrize("upstream_ids", [False, True])
+def test_duplicate_text_review_prepended_to_stored_page_is_collected(tmp_path, upstream_ids):
+    """저장된 '좋아요' 앞에 같은 날 새 '좋아요'가 올라오면, 저장된 리뷰의 ID를 가로채거나 수집을 멈추지 않고 신규로 저장해야 함."""
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    first = _crawl_page(storage, "p1", [_record("좋아요"), _record("배송 빨라요")])
+    assert len(storage.save_raw_reviews("p1", first)) == 2
+
+    # 두 번째 사이클: 이전 수집분은 DOM 모드(본문 기반 ID)로 저장되어 있고, 새 리뷰가 목록 맨 앞에 추가됨
+    fresh = _record("좋아요", "901" if upstream_ids else '')
+    second = _crawl_page(storage, "p1", [fresh, _record("좋아요"), _record("배송 빨라요")])
+    assert len(second) == 1
+    assert second[0]['id'] not in {review['id'] for review in first}
+    assert len(storage.save_raw_reviews("p1", second)) == 1
+
+    # 세 번째 사이클: 신규 리뷰가 없으면 첫 리뷰에서 바로 중단됨
+    third = [_record("좋아요", "901" if upstream_ids else ''), _record("좋아요"), _record("배송 빨라요")]
+    assert _crawl_page(storage, "p1", third) == []
+
+@pytest.mark.parametrize("first_mode, second_mode", [("network", "dom"), ("dom", "network")])
+def test_mode_switch_collects_no_new_rows(tmp_path, first_mode, second_mode):
+    """한 모드로 수집한 상품을 다른 모드로 다시 수집하면 신규 리뷰가 0건이어야 함 (이력 재수집·재알림 방지)."""
+    pytest.importorskip("playwright")
+    from src.crawler import GlowmCrawler
+
+    site = FixtureSite(products=1, pages=3, page_size=5, render_delay_ms=0, duplicate_ratio=0.0).start()
+    try:
+        storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+        product = site.products[0]
+
+        def crawl(mode):
+            crawler = GlowmCrawler(max_concurrency=1, mode=mode)
+            return asyncio.run(crawler.fetch_many([product], max_pages=10, storage=storage))[product['id']]
+
+        first = crawl(first_mode)
+        assert not isinstance(first, Exception)
+        assert first and storage.save_raw_reviews(product['id'], first) == first
+
+        second = crawl(second_mode)
+        assert not isinstance(second, Exception)
+        assert second == []
+        assert storage.save_raw_reviews(product['id'], second) == []
+    finally:
+        site.stop()
+
+
+@pytest.fixture
+def seoul_tz(monkeypatch):
+    import time
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset이 없는 플랫폼")
+    monkeypatch.setenv("TZ", "Asia/Seoul")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_dates_with_timezone_use_the_local_calendar_day(seoul_tz):
+    """같은 시각을 Z/오프셋 ISO 표기와 Unix 타임스탬프로 받아도 로컬(KST) 날짜가 같아야 같은 ID가 생성됨."""
+    epoch = int(datetime(2026, 1, 5, 23, 30, tzinfo=timezone.utc).timestamp())
+    assert review_api.normalize_date("2026-01-05T23:30:00Z") == "20260106"
+    assert review_api.normalize_date("2026-01-05T23:30:00.000+00:00") == "20260106"
+    assert review_api.normalize_date(str(epoch)) == "20260106"
+    assert review_api.normalize_date(str(epoch * 1000)) == "20260106"
+    assert review_api.normalize_date("2026-01-06T08:30:00+09:00") == "20260106"
+    # 시간대 정보가 없는 표기는 적힌 날짜 그대로 사용함
+    assert review_api.normalize_date("2026-01-05T23:30:00") == "20260105"
+    assert review_api.normalize_date("26.01.06") == "20260106"
+
+
+class _FakeContext:
+    async def route(self, pattern, handler):
+        pass
+
+    def on(self, event, callback):
+        pass
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        pass
+
+
+class _FakeBrowser:
+    """상품마다 생성/종료되는 컨텍스트 수를 세는 가짜 브라우저 (실제 Chromium 없이 동시성 제어만 검증)."""
+    def __init__(self):
+        self.contexts = 0
+
+    async def new_context(self, **kwargs):
+        self.contexts += 1
+        return _FakeContext()
+
+
+def test_fetch_many_respects_limits_and_isolates_failures():
+    """전역/호스트별 동시 수집 한도를 넘지 않고, 한 상품의 실패가 다른 상품의 수집을 취소하지 않아야 함."""
+    pytest.importorskip("playwright")
+    from src.crawler import GlowmCrawler
+
+    crawler = GlowmCrawler(max_concurrency=3, per_host_concurrency=2)
+    products = [
+        {'id': f"{host}-{i}", 'url': f"https://{host}.example.com/p/{i}"}
+        for host in ("a", "b", "c") for i in range(3)
+    ]
+    active = {'total': 0, 'max_total': 0, 'hosts': {}, 'max_hosts': {}}
+
+    async def fake_crawl(page, url, product_id, max_pages, storage, on_page=None):
+        host = url.split("/")[2]
+        active['total'] += 1
+        active['hosts'][host] = active['hosts'].get(host, 0) + 1
+        active['max_total'] = max(active['max_total'], active['total'])
+        active['max_hosts'][host] = max(active['max_hosts'].get(host, 0), active['hosts'][host])
+        try:
+            await asyncio.sleep(0.01)
+            if product_id == "a-0":
+                raise RuntimeError("selector timeout")
+            await asyncio.sleep(0.01)
+            return [{'id': product_id}]
+        finally:
+            active['total'] -= 1
+            active['hosts'][host] -= 1
+
+    crawler._crawl_product = fake_crawl
+
+    async def run():
+        # start() 대신 가짜 브라우저와 동시성 슬롯을 직접 준비함 (fetch_many는 기동된 브라우저를 그대로 사용함)
+        crawler.browser = _FakeBrowser()
+        crawler._context_slots = asyncio.Semaphore(crawler.max_concurrency)
+        return await crawler.fetch_many(products)
+
+    results = asyncio.run(run())
+
+    assert active['max_total'] == 3
+    assert max(active['max_hosts'].values()) <= 2
+    assert isinstance(results["a-0"], RuntimeError)
+    assert {product_id: result for product_id, result in results.items() if product_id != "a-0"} == {
+        p['id']: [{'id': p['id']}] for p in products if p['id'] != "a-0"
+    }
+    assert crawler.browser.contexts == len(products)
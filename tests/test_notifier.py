@@ -0,0 +1,131 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+from src.notifier import SlackNotifier
+
+
+class RecordingSession:
+    """첫 전송을 release 신호까지 붙잡아 두어 그 사이 전송 큐에 메시지가 쌓이도록 하는 Slack 세션 스텁."""
+    def __init__(self):
+        self.posted = []
+        self.first_started = threading.Event()
+        self.release = threading.Event()
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        if not self.posted:
+            self.first_started.set()
+            self.release.wait(5)
+        self.posted.append(data)
+        return SimpleNamespace(status_code=200, headers={})
+
+
+def make_notifier(tmp_path, session, **slack_config):
+    config = {'slack': {
+        'webhook_url': "http://127.0.0.1:9/hook",
+        'messages_per_minute': 600000,
+        'digest': False,
+        'dead_letter_path': str(tmp_path / "dead_letter.jsonl"),
+        **slack_config,
+    }}
+    return SlackNotifier(config, session=session)
+
+
+def test_urgent_alert_jumps_routine_backlog(tmp_path):
+    session = RecordingSession()
+    notifier = make_notifier(tmp_path, session)
+
+    notifier.enqueue({'summary': "routine-0", 'urgency': 3})
+    assert session.first_started.wait(5)
+    for i in range(1, 20):
+        notifier.enqueue({'summary': f"routine-{i}", 'urgency': 3})
+    notifier.enqueue({'summary': "critical", 'urgency': 5})
+    session.release.set()
+    notifier.close(timeout=5)
+
+    assert len(session.posted) == 21
+    # 첫 메시지는 이미 전송 중이었으므로, 긴급 알림은 적체된 일반 알림보다 먼저 두 번째로 전송되어야 함
+    assert "critical" in session.posted[1]
+    assert all("routine" in payload for payload in session.posted[2:])
+
+
+def test_close_is_bounded_when_slack_is_stuck(tmp_path):
+    session = RecordingSession()
+    notifier = make_notifier(tmp_path, session, close_timeout_seconds=0.2)
+
+    notifier.enqueue({'summary': "stuck", 'urgency': 3})
+    assert session.first_started.wait(5)
+    notifier.enqueue({'summary': "pending", 'urgency': 3})
+    notifier.close()
+
+    # 전송이 멈춰 있어도 close()는 상한 시간 후 반환하고, 미전송 메시지는 Dead-Letter에 남음
+    assert "pending" in (tmp_path / "dead_letter.jsonl").read_text(encoding='utf-8')
+    session.release.set()
+
+
+def test_permanent_client_error_is_dead_lettered_without_retry(tmp_path):
+    class RejectingSession:
+        def __init__(self):
+            self.attempts = 0
+
+        def post(self, url, data=None, headers=None, timeout=None):
+            self.attempts += 1
+            return SimpleNamespace(status_code=404, headers={})
+
+    session = RejectingSession()
+    notifier = make_notifier(tmp_path, session, max_retries=4)
+    notifier.enqueue({'summary': "gone", 'urgency': 5})
+    notifier.close(timeout=5)
+
+    # 폐기된 Webhook(404)은 재시도해도 실패하므로 백오프 없이 1회 시도 후 Dead-Letter에 기록해야 함
+    assert session.attempts == 1
+    assert "gone" in (tmp_path / "dead_letter.jsonl").read_text(encoding='utf-8')
+
+
+def test_timed_out_close_neither_resends_nor_starts_a_second_worker(tmp_path):
+    existing_threads = set(threading.enumerate())
+    session = RecordingSession()
+    notifier = make_notifier(tmp_path, session, close_timeout_seconds=0.2)
+
+    notifier.enqueue({'summary': "stuck", 'urgency': 3})
+    assert session.first_started.wait(5)
+    old_worker = notifier._worker
+    notifier.enqueue({'summary': "pending", 'urgency': 3})
+    notifier.close()
+
+    # 전송 중인 워커가 살아 있는 동안에는 참조를 유지하고, 다음 적재는 새 워커 없이 같은 워커가 이어서 전송함
+    assert notifier._worker is old_worker and old_worker.is_alive()
+    notifier.enqueue({'summary': "after", 'urgency': 3})
+    assert notifier._worker is old_worker
+    assert set(threading.enumerate()) - existing_threads == {old_worker}
+    session.release.set()
+    notifier.close(timeout=5)
+
+    assert not old_worker.is_alive() and notifier._worker is None
+    # Dead-Letter로 옮긴 메시지는 다시 전송되지 않음
+    assert ["stuck" in p for p in session.posted] == [True, False]
+    assert "after" in session.posted[1]
+    assert "pending" in (tmp_path / "dead_letter.jsonl").read_text(encoding='utf-8')
+
+
+def test_stats_are_not_lost_across_threads(tmp_path):
+    session = RecordingSession()
+    session.release.set()
+    notifier = make_notifier(tmp_path, session, digest=True, digest_interval_seconds=3600)
+
+    def enqueue_many(offset):
+        for i in range(200):
+            # 긴급도 1은 다이제스트(호출 스레드), 3은 개별 전송(워커 스레드)으로 집계됨
+            notifier.enqueue({'summary': f"r{offset}-{i}", 'urgency': 1 if i % 2 else 3, 'product_name': "상품"})
+
+    threads = [threading.Thread(target=enqueue_many, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    notifier.close(timeout=10)
+
+    assert notifier.stats['digested'] == 400
+    assert notifier.stats['sent'] == 400 + 10  # 개별 400건 + 다이제스트 400건을 40건씩 묶은 10건
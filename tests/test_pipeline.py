@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from src.pipeline import ReviewPipeline
+from src.storage import ReviewStorage
+
+
+class PagedCrawler:
+    """같은 리뷰가 두 페이지에 걸쳐 다시 나오고, 한 건은 다른 워커가 이미 저장한 상황을 흉내 내는 크롤러 스텁."""
+    review_filter = None
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    async def fetch_many(self, products, max_pages=100, storage=None, on_page=None):
+        for reviews in self.pages:
+            await on_page(products[0]['id'], reviews)
+        return {products[0]['id']: [review for page in self.pages for review in page]}
+
+
+class CountingProcessor:
+    def __init__(self):
+        self.analyzed = []
+
+    async def analyze_reviews_async(self, batch):
+        self.analyzed.extend(item['id'] for item in batch)
+        return [{'id': item['id'], 'category': "배송", 'sentiment': "Positive", 'urgency': 1, 'summary': "만족"}
+                for item in batch]
+
+
+def test_only_inserted_reviews_are_counted_and_analyzed(tmp_path):
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    storage.save_raw_reviews('p1', [{'id': 'seed', 'content': "기존 상품 표시용"}])
+    storage.save_raw_reviews('p1', [{'id': 'other', 'content': "다른 워커가 저장"}])
+    review = lambda review_id: {'id': review_id, 'content': f"리뷰 {review_id}"}
+    crawler = PagedCrawler([[review('a'), review('b'), review('other')], [review('b'), review('c')]])
+    processor = CountingProcessor()
+    pipeline = ReviewPipeline(crawler, processor, notifier=None, storage=storage, first_run_mode=True)
+
+    stats = asyncio.run(pipeline.run([{'id': 'p1', 'name': "상품"}]))
+
+    assert sorted(processor.analyzed) == ['a', 'b', 'c']
+    assert stats['p1']['collected'] == 3 and stats['p1']['analyzed'] == 3
+
+
+class FailingUpdateStorage(ReviewStorage):
+    """분석 결과 반영이 항상 실패하는 저장소 (잠금 대기 초과, SQLite OperationalError 등)."""
+    def update_analysis_results(self, results):
+        raise RuntimeError("database is locked")
+
+
+def test_analyze_failure_does_not_stall_the_crawl(tmp_path):
+    storage = FailingUpdateStorage(str(tmp_path / "reviews_db.csv"))
+    storage.save_raw_reviews('p1', [{'id': 'seed', 'content': "기존 상품 표시용"}])
+    pages = [[{'id': f"r{page}", 'content': f"리뷰 {page}"}] for page in range(20)]
+    pipeline = ReviewPipeline(PagedCrawler(pages), CountingProcessor(), notifier=None, storage=storage,
+                              first_run_mode=True, analyze_queue_size=1, analysis_workers=1)
+
+    stats = asyncio.run(asyncio.wait_for(pipeline.run([{'id': 'p1', 'name': "상품"}]), timeout=5))
+
+    # 분석 큐가 계속 비워져 모든 페이지가 저장되고, 실패는 상품 오류로 기록됨 (행은 미분석 상태로 남아 백로그가 재처리)
+    assert stats['p1']['collected'] == 20 and stats['p1']['analyzed'] == 0
+    assert "database is locked" in stats['p1']['error']
+    assert sum(len(chunk) for chunk in storage.iter_unanalyzed()) == 21
+
+
+class BrokenNotifier:
+    def enqueue(self, result):
+        raise RuntimeError("notifier closed")
+
+
+def test_dead_stage_fails_the_cycle_instead_of_hanging(tmp_path):
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    storage.save_raw_reviews('p1', [{'id': 'seed', 'content': "기존 상품 표시용"}])
+    pages = [[{'id': f"r{page}", 'content': f"리뷰 {page}"}] for page in range(20)]
+    pipeline = ReviewPipeline(PagedCrawler(pages), CountingProcessor(), notifier=BrokenNotifier(), storage=storage,
+                              analyze_queue_size=1, notify_queue_size=1, analysis_workers=1)
+
+    with pytest.raises(RuntimeError, match="notifier closed"):
+        asyncio.run(asyncio.wait_for(pipeline.run([{'id': 'p1', 'name': "상품"}]), timeout=5))
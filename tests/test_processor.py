@@ -0,0 +1,86 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+from src.processor import ReviewProcessor, INPUT_TOKENS_PER_ITEM_OVERHEAD, OUTPUT_TOKENS_PER_REVIEW
+
+
+class DroppingClient:
+    """요청받은 리뷰 중 drop에 포함된 ID를 첫 응답에서만 빼고 반환하는 스텁 클라이언트."""
+    def __init__(self, drop=()):
+        self.drop = set(drop)
+        self.requests = []
+        self.aio = SimpleNamespace(models=self)
+
+    async def generate_content(self, model, contents, config=None):
+        start = contents.index("[입력 데이터]") + len("[입력 데이터]")
+        reviews = json.loads(contents[start : contents.index("[출력 형식 예시]")])
+        self.requests.append([review['id'] for review in reviews])
+        first = len(self.requests) == 1
+        results = [{'id': review['id'], 'category': "기타", 'sentiment': "중립", 'urgency': 1, 'summary': "요약"}
+                   for review in reviews if not (first and review['id'] in self.drop)]
+        return SimpleNamespace(text=json.dumps(results, ensure_ascii=False), usage_metadata=None)
+
+
+def make_processor(client=None, **gemini):
+    config = {'gemini': {'api_key': "test", 'model_name': "stub", 'requests_per_minute': None,
+                         'cache': {'enabled': False}, **gemini}}
+    return ReviewProcessor(config=config, client=client or DroppingClient())
+
+
+def review(review_id, length):
+    return {'id': review_id, 'text': "가" * length}
+
+
+def test_pack_batches_respects_input_output_and_count_budgets():
+    processor = make_processor(max_input_tokens_per_batch=2000, max_output_tokens_per_batch=300, max_reviews_per_batch=4)
+    input_budget = 2000 - processor.prompt_overhead_tokens
+
+    # 출력 예산(300 / 60 = 5건)보다 건수 한도(4건)가 먼저 걸림
+    short = [review(f"s{i}", 10) for i in range(10)]
+    assert [len(batch) for batch in processor.pack_batches(short)] == [4, 4, 2]
+
+    # 긴 리뷰는 입력 예산으로 나뉘며, 어떤 배치도 예산을 넘지 않음
+    long_reviews = [review(f"l{i}", 600) for i in range(6)]
+    batches = processor.pack_batches(long_reviews)
+    assert [r['id'] for batch in batches for r in batch] == [r['id'] for r in long_reviews]
+    for batch in batches:
+        used = sum(processor.estimate_tokens(r['text']) + INPUT_TOKENS_PER_ITEM_OVERHEAD for r in batch)
+        assert used <= input_budget
+        assert len(batch) * OUTPUT_TOKENS_PER_REVIEW <= 300
+
+    # 축소 비율을 적용하면 배치가 더 잘게 나뉨
+    assert [len(batch) for batch in processor.pack_batches(short, scale=0.5)] == [2] * 5
+
+
+def test_oversized_single_review_is_sent_alone():
+    processor = make_processor(max_input_tokens_per_batch=1000)
+    reviews = [review('a', 10), review('huge', 5000), review('b', 10)]
+    assert [[r['id'] for r in batch] for batch in processor.pack_batches(reviews)] == [['a'], ['huge'], ['b']]
+
+
+def test_partial_retry_requests_only_missing_ids():
+    client = DroppingClient(drop={'r2', 'r5'})
+    processor = make_processor(client)
+    reviews = [review(f"r{i}", 20) for i in range(8)]
+
+    results = asyncio.run(processor.analyze_reviews_async(reviews))
+
+    assert [r['id'] for r in results] == [r['id'] for r in reviews]
+    assert client.requests == [[r['id'] for r in reviews], ['r2', 'r5']]
+
+
+def test_tpm_reservation_includes_expected_output_tokens():
+    processor = make_processor()
+    reserved = []
+
+    async def acquire_async(tokens=0):
+        reserved.append(tokens)
+        return 0.0
+
+    processor.rate_limiter.acquire_async = acquire_async
+    reviews = [review(f"r{i}", 20) for i in range(3)]
+    asyncio.run(processor.analyze_reviews_batch_async(reviews))
+
+    input_tokens = processor.estimate_tokens(processor._build_prompt(reviews))
+    assert reserved == [input_tokens + 3 * OUTPUT_TOKENS_PER_REVIEW]
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.storage as storage_module
+import src.sqlite_storage as sqlite_storage_module
+from src.product_scheduler import ProductScheduler
+from src.storage import ReviewStorage
+from src.sqlite_storage import SQLiteReviewStorage
+
+NOW = datetime(2026, 10, 16, 12, 0, 0)
+
+
+def at(moment):
+    """storage의 datetime.now()를 고정하여 수집 시각(date_collected)을 지정하는 datetime 대체 클래스."""
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment
+    return FixedDatetime
+
+
+def save(monkeypatch, storage, moment, product_id, ids):
+    module = sqlite_storage_module if isinstance(storage, SQLiteReviewStorage) else storage_module
+    monkeypatch.setattr(module, "datetime", at(moment))
+    storage.save_raw_reviews(product_id, [{'id': review_id, 'content': f"리뷰 {review_id}"} for review_id in ids])
+    monkeypatch.setattr(module, "datetime", datetime)
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "csv":
+        return ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    return SQLiteReviewStorage(str(tmp_path / "reviews.db"))
+
+
+def test_bootstrap_ignores_first_collection_burst(storage, monkeypatch):
+    # 'fresh': 2시간 전 최초 수집에서 과거 리뷰 300건을 한꺼번에 저장한 뒤 신규 리뷰 2건
+    save(monkeypatch, storage, NOW - timedelta(hours=2), 'fresh', [f"f{i}" for i in range(200)])
+    save(monkeypatch, storage, NOW - timedelta(hours=2) + timedelta(minutes=5), 'fresh', [f"g{i}" for i in range(100)])
+    save(monkeypatch, storage, NOW - timedelta(minutes=30), 'fresh', ['f-new1', 'f-new2'])
+    # 'steady': 집계 기간 이전부터 수집되던 상품 — 기간 내 유입 건수를 그대로 사용함
+    save(monkeypatch, storage, NOW - timedelta(days=30), 'steady', ['old'])
+    save(monkeypatch, storage, NOW - timedelta(hours=10), 'steady', [f"s{i}" for i in range(84)])
+    # 'just': 방금 최초 수집만 끝난 상품 — 관측 기간이 없으므로 기본 주기로 시작함
+    save(monkeypatch, storage, NOW - timedelta(minutes=1), 'just', [f"j{i}" for i in range(500)])
+
+    activity = storage.get_product_activity(NOW - timedelta(hours=168), initial_window=timedelta(minutes=9))
+    assert activity['fresh']['initial_count'] == 300
+    assert activity['steady']['initial_count'] == 1
+
+    scheduler = ProductScheduler(min_interval_minutes=10, initial_interval_minutes=30, jitter=0.1)
+    scheduler.bootstrap(storage, [{'id': 'fresh'}, {'id': 'steady'}, {'id': 'just'}], now=NOW)
+
+    fresh = scheduler.states['fresh']
+    assert fresh['rate'] == pytest.approx(2 / (2 - 0.15))
+    assert fresh['interval'] > timedelta(hours=4)
+    assert scheduler.states['steady']['rate'] == pytest.approx(84 / 168)
+    assert scheduler.states['just']['rate'] is None
+    assert scheduler.states['just']['interval'] == timedelta(minutes=30)
+
+
+def test_interval_is_clamped_and_follows_rate():
+    scheduler = ProductScheduler(min_interval_minutes=10, max_interval_minutes=360, target_new_reviews_per_crawl=5)
+    state = {'rate': 60.0, 'error_rate': 0.0, 'last_change': NOW}
+    assert scheduler._compute_interval(state, NOW) == timedelta(minutes=10)  # 5 / 60h = 5분 → 최소 주기
+    state['rate'] = 5.0
+    assert scheduler._compute_interval(state, NOW) == timedelta(hours=1)
+    state['error_rate'] = 1.0  # 오류율 100%면 주기 4배
+    assert scheduler._compute_interval(state, NOW) == timedelta(hours=4)
+    state.update(rate=0.0, error_rate=0.0)
+    assert scheduler._compute_interval(state, NOW) == timedelta(minutes=360)
+    state.update(rate=5.0, last_change=NOW - timedelta(hours=144))  # 무변동 144h = stale 기준의 2배 → 주기 2배
+    assert scheduler._compute_interval(state, NOW) == timedelta(hours=2)
+
+
+def test_record_result_updates_ewma_and_skips_failed_crawls():
+    scheduler = ProductScheduler(smoothing=0.5, jitter=0)
+    scheduler.record_result('p', 0, now=NOW)
+    assert scheduler.states['p']['rate'] is None  # 직전 수집 시각이 없으면 속도를 관측할 수 없음
+
+    scheduler.record_result('p', 10, now=NOW + timedelta(hours=1))
+    assert scheduler.states['p']['rate'] == pytest.approx(10.0)
+    scheduler.record_result('p', 2, now=NOW + timedelta(hours=2))
+    assert scheduler.states['p']['rate'] == pytest.approx(0.5 * 10 + 0.5 * 2)
+
+    next_due = scheduler.record_result('p', 0, error=True, now=NOW + timedelta(hours=3))
+    state = scheduler.states['p']
+    assert state['rate'] == pytest.approx(6.0)
+    assert state['error_rate'] == pytest.approx(0.5)
+    assert state['last_crawled'] == NOW + timedelta(hours=2)
+    assert next_due == NOW + timedelta(hours=3) + state['interval']
+    assert state['interval'] == timedelta(hours=5 / 6) * 2.5
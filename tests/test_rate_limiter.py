@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import src.rate_limiter as rate_limiter_module
+from src.rate_limiter import TokenBucket, RateLimiter
+from src.processor import ReviewProcessor
+
+
+class FakeClock:
+    """time.monotonic/time.sleep/asyncio.sleep을 대체하여 실제로 기다리지 않고 시간을 진행시키는 가짜 시계."""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    monkeypatch.setattr(rate_limiter_module, "asyncio", SimpleNamespace(sleep=clock.async_sleep))
+    return clock
+
+
+def test_bucket_refills_at_rate_and_caps_at_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # 버킷이 비면 다음 요청은 초당 1개 보충 속도에 맞춰 순서대로 대기함
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+    clock.now += 60  # 오래 쉬어도 용량(2) 이상은 쌓이지 않음
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, pytest.approx(1.0)]
+
+
+def test_oversized_reservation_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=600, capacity=100)
+    assert bucket.reserve(500) == 0.0
+    assert bucket.reserve(50) == pytest.approx(5.0)
+
+
+def test_penalize_delays_following_requests(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=1)
+    bucket.penalize(3)
+    assert bucket.reserve() == pytest.approx(4.0)
+
+
+def test_rate_limiter_penalize_drains_both_buckets(clock):
+    # 토큰 버킷에 여유가 많아도 Retry-After 동안은 대기해야 함 (TPM 한도만 설정한 경우 포함)
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=6000)
+    limiter.penalize(3)
+    assert limiter.acquire(10) == pytest.approx(3.1)
+
+    token_only = RateLimiter(tokens_per_minute=600, token_burst=100)
+    token_only.penalize(2)
+    assert token_only.acquire(10) == pytest.approx(3.0)
+
+
+def test_rate_limiter_waits_for_the_slower_bucket(clock):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600, request_burst=1, token_burst=100)
+    assert limiter.acquire(100) == 0.0
+    # 요청 버킷은 1초, 토큰 버킷은 50토큰 / 10토큰/초 = 5초가 필요하므로 5초 대기함
+    assert limiter.acquire(50) == pytest.approx(5.0)
+    assert clock.sleeps == [pytest.approx(5.0)]
+    assert asyncio.run(limiter.acquire_async(10)) == pytest.approx(1.0)
+    assert clock.now == pytest.approx(1006.0)
+
+
+def test_gemini_limiter_uses_explicit_small_burst(clock):
+    processor = ReviewProcessor(config={'gemini': {'api_key': "test", 'model_name': "stub", 'requests_per_minute': 15,
+                                                   'cache': {'enabled': False}}}, client=object())
+    assert processor.rate_limiter.request_bucket.capacity == 1
+    assert processor.rate_limiter.token_bucket.capacity == 6000 + 4000
+    waits = [processor.rate_limiter._reserve(100) for _ in range(3)]
+    assert waits == [0.0, pytest.approx(4.0), pytest.approx(8.0)]
@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.request_filter import RequestFilter, DEFAULT_SIZE_ESTIMATES
+
+
+class FakeRoute:
+    """Playwright Route 대체: abort/continue_ 호출 여부만 기록함."""
+    def __init__(self, url, resource_type):
+        self.request = SimpleNamespace(url=url, resource_type=resource_type)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+
+class FakeContext:
+    """BrowserContext 대체: 등록된 라우팅 핸들러와 이벤트 콜백을 보관함."""
+    def __init__(self):
+        self.handler = None
+        self.listeners = {}
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+    def on(self, event, callback):
+        self.listeners[event] = callback
+
+    def request(self, url, resource_type):
+        route = FakeRoute(url, resource_type)
+        asyncio.run(self.handler(route))
+        return route.outcome
+
+    def respond(self, resource_type, length):
+        response = SimpleNamespace(
+            headers={"content-length": str(length)},
+            request=SimpleNamespace(resource_type=resource_type),
+        )
+        self.listeners["response"](response)
+
+
+def _attached(allow_url_patterns=None, **kwargs):
+    request_filter = RequestFilter(**kwargs)
+    context = FakeContext()
+    asyncio.run(request_filter.attach(context, allow_url_patterns))
+    return request_filter, context
+
+
+def test_blocks_heavy_types_and_tracker_urls_but_lets_documents_through():
+    request_filter, context = _attached()
+
+    assert context.request("https://shop.example.com/p/1", "document") == "continued"
+    assert context.request("https://shop.example.com/api/reviews?page=2", "xhr") == "continued"
+    assert context.request("https://img.example.com/a.jpg", "image") == "aborted"
+    assert context.request("https://fonts.example.com/a.woff2", "font") == "aborted"
+    assert context.request("https://www.google-analytics.com/analytics.js", "script") == "aborted"
+
+    stats = request_filter.stats()
+    assert stats['blocked_requests'] == 3
+    assert stats['allowed_requests'] == 2
+    assert stats['blocked_by_type'] == {"image": 1, "font": 1, "script": 1}
+
+
+def test_allow_url_patterns_override_blocking_for_that_product_only():
+    request_filter, context = _attached(allow_url_patterns=[r"review-img\.example\.com"])
+    _, other_context = _attached()
+
+    assert context.request("https://review-img.example.com/r/1.jpg", "image") == "continued"
+    assert context.request("https://img.example.com/banner.jpg", "image") == "aborted"
+    # 다른 상품의 컨텍스트에는 예외가 적용되지 않음
+    assert other_context.request("https://review-img.example.com/r/1.jpg", "image") == "aborted"
+
+
+def test_bytes_saved_uses_assumed_size_until_the_type_is_observed():
+    request_filter, context = _attached(allow_url_patterns=[r"review-img\.example\.com"])
+
+    context.request("https://img.example.com/a.jpg", "image")
+    assert request_filter.stats()['estimated_bytes_saved'] == DEFAULT_SIZE_ESTIMATES["image"]
+
+    # 허용된 같은 유형의 응답이 관측되면 이후 추정에는 그 평균 크기가 쓰임
+    context.request("https://review-img.example.com/r/1.jpg", "image")
+    context.respond("image", 10_000)
+    context.request("https://img.example.com/b.jpg", "image")
+    assert request_filter.stats()['estimated_bytes_saved'] == DEFAULT_SIZE_ESTIMATES["image"] + 10_000
+
+
+def test_disabled_filter_does_not_register_a_route():
+    _, context = _attached(enabled=False)
+
+    assert context.handler is None
+    assert context.listeners == {}
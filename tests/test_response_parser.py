@@ -0,0 +1,69 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.processor import ReviewProcessor
+from src.response_parser import parse_analysis_response
+
+
+def record(review_id, **overrides):
+    return {'id': review_id, 'category': "배송", 'sentiment': "부정", 'urgency': 4, 'summary': "배송 지연", **overrides}
+
+
+FULL = json.dumps([record('r1'), record('r2', summary="괄호 {포함} \"인용\"")], ensure_ascii=False)
+
+
+@pytest.mark.parametrize("text, expected_ids", [
+    (FULL, ['r1', 'r2']),
+    # 출력 토큰 한도로 배열이 중간에 잘림 — 완결된 첫 레코드만 구제
+    (FULL[:FULL.index('"r2"') + 10], ['r1']),
+    # 배열 뒤에 설명 문장이 붙음
+    (FULL + "\n이상으로 분석을 마칩니다.", ['r1', 'r2']),
+    # 지시와 달리 코드 펜스로 감쌈
+    ("```json\n" + FULL + "\n```", ['r1', 'r2']),
+    ("```\n" + FULL + "```", ['r1', 'r2']),
+    # 단일 객체만 반환
+    (json.dumps(record('r1')), ['r1']),
+    # 허용값을 벗어난 항목은 버려지고 정상 항목만 남음 (누락 항목은 호출자가 재요청)
+    (json.dumps([record('r1', category="기분"), record('r2', urgency=9), record('r3', urgency="4")]), ['r3']),
+    ("", []),
+    ("응답을 생성할 수 없습니다.", []),
+])
+def test_parse_analysis_response_salvages_valid_records(text, expected_ids):
+    assert [r['id'] for r in parse_analysis_response(text)] == expected_ids
+
+
+def test_urgency_is_normalized_to_int():
+    parsed = parse_analysis_response(json.dumps([record('r1', urgency="4.0", summary="  요약  ")]))
+    assert parsed == [record('r1', urgency=4, summary="요약")]
+
+
+class TruncatingClient:
+    """첫 응답에서 마지막 레코드를 잘라 보내고, 이후 요청은 정상 응답하는 스텁 클라이언트."""
+    def __init__(self):
+        self.requests = []
+        self.aio = SimpleNamespace(models=self)
+
+    async def generate_content(self, model, contents, config=None):
+        start = contents.index("[입력 데이터]") + len("[입력 데이터]")
+        reviews = json.loads(contents[start : contents.index("[출력 형식 예시]")])
+        self.requests.append([review['id'] for review in reviews])
+        text = json.dumps([record(review['id']) for review in reviews], ensure_ascii=False)
+        if len(self.requests) == 1:
+            text = text[: text.rindex('{"id"') + 12]
+        return SimpleNamespace(text=text, usage_metadata=None)
+
+
+def test_truncated_item_is_retried_not_dropped():
+    client = TruncatingClient()
+    processor = ReviewProcessor(config={'gemini': {'api_key': "test", 'model_name': "stub", 'requests_per_minute': None,
+                                                   'cache': {'enabled': False}}},
+                                client=client)
+    reviews = [{'id': f"r{i}", 'text': f"리뷰 {i}"} for i in range(3)]
+
+    results = asyncio.run(processor.analyze_reviews_async(reviews))
+
+    assert [r['id'] for r in results] == ['r0', 'r1', 'r2']
+    assert client.requests == [['r0', 'r1', 'r2'], ['r2']]
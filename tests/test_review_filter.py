@@ -0,0 +1,53 @@
+from src.review_filter import ReviewFilter
+
+LONG = "배송도 빠르고 포장도 꼼꼼해서 정말 만족스럽습니다 재구매 의사 있어요"
+RESULT = {'id': 'r1', 'category': "배송", 'sentiment': "긍정", 'urgency': 1, 'summary': "배송 만족"}
+
+
+def ids(reviews):
+    return [review['id'] for review in reviews]
+
+
+def test_near_duplicates_are_grouped_and_reuse_the_representative_result():
+    review_filter = ReviewFilter()
+    reviews = [{'id': 'r1', 'text': LONG}, {'id': 'r2', 'text': LONG + "!!"},
+               {'id': 'r3', 'text': "사이즈가 생각보다 작아서 한 치수 크게 주문하시는 걸 추천합니다"}]
+
+    to_analyze, followers, reused = review_filter.group_near_duplicates('p1', reviews)
+    assert ids(to_analyze) == ['r1', 'r3']
+    assert followers == {'r1': ['r2'], 'r3': []}
+    assert reused == {}
+
+    review_filter.remember_results('p1', ['r1'], {'r1': RESULT})
+    to_analyze, followers, reused = review_filter.group_near_duplicates('p1', [{'id': 'r4', 'text': " " + LONG}])
+    assert to_analyze == [] and followers == {}
+    assert reused == {'r4': {k: v for k, v in RESULT.items() if k != 'id'}}
+    # 다른 상품의 인덱스와는 섞이지 않음
+    assert ids(review_filter.group_near_duplicates('p2', [{'id': 'r5', 'text': LONG}])[0]) == ['r5']
+
+
+def test_failed_representative_is_replaced_by_next_duplicate():
+    review_filter = ReviewFilter()
+    review_filter.group_near_duplicates('p1', [{'id': 'r1', 'text': LONG}])
+    review_filter.remember_results('p1', ['r1'], {})
+    to_analyze, followers, reused = review_filter.group_near_duplicates('p1', [{'id': 'r2', 'text': LONG}])
+    assert ids(to_analyze) == ['r2'] and reused == {}
+
+
+def test_short_texts_only_group_on_exact_match():
+    # 해밍 거리 허용치를 크게 잡아 짧은 본문끼리 SimHash가 충돌하는 상황을 재현함 (두 본문의 거리는 12)
+    review_filter = ReviewFilter(max_distance=20)
+    reviews = [{'id': 'a', 'text': "배송이 빨라서 좋아요"}, {'id': 'b', 'text': "배송이 빨라서 안 좋아요"},
+               {'id': 'c', 'text': "배송이 빨라서 좋아요!!"}]
+
+    to_analyze, followers, reused = review_filter.group_near_duplicates('p1', reviews)
+    assert ids(to_analyze) == ['a', 'b']
+    assert followers == {'a': ['c'], 'b': []}
+
+    review_filter.remember_results('p1', ['a', 'b'], {'a': {**RESULT, 'id': 'a'}, 'b': {**RESULT, 'id': 'b', 'sentiment': "부정"}})
+    _, _, reused = review_filter.group_near_duplicates('p1', [{'id': 'd', 'text': "배송이  빨라서 안 좋아요"}])
+    assert reused['d']['sentiment'] == "부정"
+
+    # 최소 길이를 0으로 두면 기존처럼 근사 중복으로 묶여 반대 의미의 결과를 재사용하게 됨
+    loose = ReviewFilter(max_distance=20, near_duplicate_min_length=0)
+    assert ids(loose.group_near_duplicates('p1', reviews[:2])[0]) == ['a']
@@ -0,0 +1,145 @@
+import csv
+import os
+import multiprocessing
+
+import pytest
+
+from src.review_index import ReviewIdIndex
+
+
+def write_rows(path, rows, header=False):
+    with open(path, mode='a', newline='', encoding='utf-8-sig' if header else 'utf-8') as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(['product_id', 'id', 'content'])
+        writer.writerows(rows)
+
+
+def test_appended_rows_are_caught_up_without_rebuild(tmp_path, monkeypatch):
+    path = str(tmp_path / "reviews_db.csv")
+    write_rows(path, [['p1', 'a', "첫 리뷰"]], header=True)
+    index = ReviewIdIndex(path, bloom_path=str(tmp_path / "reviews_db.bloom"))
+    assert index.contains('a')
+
+    # 다른 워커가 파일 끝에 행을 추가한 상황 (여러 줄로 된 리뷰 포함)
+    write_rows(path, [['p1', 'b', "줄바꿈이\n있는 리뷰"], ['p2', 'c', "세 번째"]])
+    monkeypatch.setattr(index, '_rebuild', lambda: pytest.fail("추가 쓰기만으로 전체 재구축이 발생함"))
+    assert index.contains('b') and index.contains('c')
+    assert not index.contains('d')
+
+
+def test_replaced_or_shrunk_file_triggers_rebuild(tmp_path):
+    path = str(tmp_path / "reviews_db.csv")
+    write_rows(path, [['p1', 'a', "x"], ['p1', 'b', "y"]], header=True)
+    index = ReviewIdIndex(path)
+    assert index.contains('b')
+
+    # 행이 삭제된 새 파일로 교체됨 (inode 변경 + 크기 감소)
+    tmp = path + ".tmp"
+    write_rows(tmp, [['p1', 'a', "x"]], header=True)
+    os.replace(tmp, path)
+    assert index.contains('a')
+    assert not index.contains('b')
+
+
+def _rewrite_in_other_worker(path):
+    """다른 워커 프로세스: 신규 리뷰 추가 → 분석 결과 반영(전체 재작성) → 재작성 이후 추가."""
+    from src.storage import ReviewStorage
+    storage = ReviewStorage(path)
+    storage.save_raw_reviews('p1', [{'id': 'n1', 'content': "재작성 전 추가"}])
+    assert storage.update_analysis_results({
+        'r5': {'category': "배송", 'sentiment': "Negative", 'urgency': 4, 'summary': "지연"},
+        'n1': {'category': "품질", 'sentiment': "Positive", 'urgency': 1, 'summary': "만족"},
+    }) == 2
+    storage.save_raw_reviews('p1', [{'id': 'n2', 'content': "재작성 후 추가"}])
+    storage.flush_index()
+
+
+def _run_other_worker(path):
+    ctx = multiprocessing.get_context("spawn")
+    worker = ctx.Process(target=_rewrite_in_other_worker, args=(path,))
+    worker.start()
+    worker.join(60)
+    assert worker.exitcode == 0
+
+
+def test_peer_rewrite_is_caught_up_without_rebuild(tmp_path, monkeypatch):
+    from src.storage import ReviewStorage
+    path = str(tmp_path / "reviews_db.csv")
+    storage = ReviewStorage(path)
+    storage.save_raw_reviews('p1', [{'id': f"r{i}", 'content': f"리뷰 {i}\n두 번째 줄"} for i in range(2500)])
+    assert storage.is_review_exist('r0')
+
+    _run_other_worker(path)
+
+    # 다른 워커의 재작성(inode 변경)이 있었지만 ID를 보존하므로 전체 재구축 없이 이어 읽어야 함
+    monkeypatch.setattr(storage.id_index, '_rebuild', lambda: pytest.fail("ID 보존 재작성으로 전체 재구축이 발생함"))
+    assert storage.is_review_exist('n1') and storage.is_review_exist('n2') and storage.is_review_exist('r2499')
+    assert not storage.is_review_exist('zzz')
+    assert storage.id_index._rows == 2502
+
+
+def test_bloom_sidecar_survives_peer_rewrite(tmp_path, monkeypatch):
+    from src.storage import ReviewStorage
+    path = str(tmp_path / "reviews_db.csv")
+    storage = ReviewStorage(path)
+    storage.save_raw_reviews('p1', [{'id': f"r{i}", 'content': f"리뷰 {i}"} for i in range(10)])
+    storage.flush_index()
+
+    _run_other_worker(path)
+
+    # 재기동 후 이전 사이드카를 버리지 않고, 재작성 스탬프로 이어 읽어 Bloom Filter만으로 응답함
+    restarted = ReviewStorage(path)
+    monkeypatch.setattr(restarted.id_index, '_rebuild', lambda: pytest.fail("사이드카를 버리고 전체 재구축함"))
+    assert not restarted.is_review_exist('zzz')
+    assert 'n1' in restarted.id_index._bloom and 'n2' in restarted.id_index._bloom
+
+
+def test_lookup_during_a_write_does_not_double_count_rows(tmp_path):
+    """저장 스레드가 파일 추가와 인덱스 반영 사이에 있을 때 다른 스레드의 조회가 끼어들어 새 행을 이중 집계하지 않아야 함."""
+    import threading
+    from src.storage import ReviewStorage
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    storage.save_raw_reviews('p1', [{'id': 'r0', 'content': "기존 리뷰"}])
+    assert storage.is_review_exist('r0')
+
+    index_add = storage.id_index.add
+    lookup = threading.Thread(target=storage.is_review_exist, args=('zzz',))
+
+    def add_after_concurrent_lookup(review_id, sync=True):
+        if not lookup.is_alive() and lookup.ident is None:
+            lookup.start()
+            lookup.join(0.2)
+        index_add(review_id, sync)
+
+    storage.id_index.add = add_after_concurrent_lookup
+    storage.save_raw_reviews('p1', [{'id': 'r1', 'content': "새 리뷰"}])
+    lookup.join(5)
+    assert not lookup.is_alive()
+    assert storage.id_index._rows == 2
+
+
+def test_lookup_does_not_wait_for_the_storage_file_lock(tmp_path):
+    """저장 스레드나 다른 워커가 파일 잠금을 쥐고 재작성하는 동안에도 이벤트 루프의 조회는 바로 응답해야 함."""
+    import threading
+    from src.storage import ReviewStorage
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    storage.save_raw_reviews('p1', [{'id': 'r0', 'content': "기존 리뷰"}])
+
+    held, release = threading.Event(), threading.Event()
+
+    def hold_file_lock():
+        with storage.lock:
+            held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_file_lock)
+    holder.start()
+    assert held.wait(5)
+    answers = []
+    lookup = threading.Thread(target=lambda: answers.append(storage.is_review_exist('r0')))
+    lookup.start()
+    lookup.join(1)
+    release.set()
+    holder.join(5)
+    assert answers == [True]
@@ -0,0 +1,36 @@
+import csv
+
+import pytest
+
+from src.sqlite_storage import COLUMNS, SQLiteReviewStorage
+
+
+def write_source(path, count):
+    with open(path, mode='w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(count):
+            writer.writerow(['p1', f"r{i}", "2026-01-05 10:00:00", "배송", "Negative", "4", "요약", f"리뷰 {i}", 'Y'])
+
+
+def test_migration_spans_batches_and_is_rerunnable(tmp_path):
+    source = str(tmp_path / "reviews_db.csv")
+    write_source(source, 2500)
+    storage = SQLiteReviewStorage(str(tmp_path / "reviews.db"), migrate_from=source)
+
+    assert storage.conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 2500
+    assert storage.migrate_from_csv(source) == 2500
+    assert storage.conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 2500
+    assert storage.get_aggregates().query() == [{'product_id': 'p1', 'count': 2500}]
+
+
+def test_export_refuses_to_overwrite_migration_source(tmp_path):
+    source = str(tmp_path / "reviews_db.csv")
+    write_source(source, 3)
+    storage = SQLiteReviewStorage(str(tmp_path / "reviews.db"), migrate_from=source)
+    storage.save_raw_reviews('p1', [{'id': "new", 'content': "이관 후 수집"}])
+
+    with pytest.raises(ValueError):
+        storage.export_csv(source)
+    assert storage.export_csv(str(tmp_path / "reviews_export.csv")) == 4
+    assert storage.export_csv(source, overwrite_source=True) == 4
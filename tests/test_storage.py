@@ -0,0 +1,63 @@
+import csv
+import os
+
+import pytest
+
+from src.storage import ReviewStorage
+
+
+def read_rows(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_batch_append_returns_only_inserted_rows(tmp_path):
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    storage.save_raw_reviews('p1', [{'id': 'a', 'content': "기존 리뷰"}])
+
+    batch = [{'id': 'a', 'content': "이미 저장됨"}, {'id': 'b', 'content': "신규"},
+             {'id': 'b', 'content': "배치 내 중복"}, {'id': 'c', 'content': "여러 줄\n리뷰"}]
+    inserted = storage.save_raw_reviews('p1', batch)
+
+    assert inserted == [batch[1], batch[3]]
+    assert [row[1] for row in read_rows(storage.filepath)[1:]] == ['a', 'b', 'c']
+    assert storage.save_raw_reviews('p1', batch) == []
+
+
+def test_update_analysis_results_rewrites_in_one_pass(tmp_path):
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    storage.save_raw_reviews('p1', [{'id': r_id, 'content': f"리뷰 {r_id}"} for r_id in ('a', 'b', 'c')])
+
+    updated = storage.update_analysis_results({
+        'a': {'category': "배송", 'sentiment': "Negative", 'urgency': 4, 'summary': "지연"},
+        'c': {'category': "품질", 'sentiment': "Positive", 'urgency': 1, 'summary': "만족"},
+        'zzz': {'category': "기타"},
+    })
+
+    assert updated == 2
+    rows = {row[1]: row for row in read_rows(storage.filepath)[1:]}
+    assert rows['a'][3:7] == ["배송", "Negative", "4", "지연"] and rows['a'][8] == 'Y'
+    assert rows['b'][8] == 'N' and rows['c'][8] == 'Y'
+    assert not os.path.exists(f"{storage.filepath}.tmp")
+
+
+def test_failed_rewrite_keeps_the_original_file(tmp_path, monkeypatch):
+    storage = ReviewStorage(str(tmp_path / "reviews_db.csv"))
+    storage.save_raw_reviews('p1', [{'id': r_id, 'content': f"리뷰 {r_id}"} for r_id in ('a', 'b')])
+    with open(storage.filepath, 'rb') as f:
+        original = f.read()
+
+    def fail_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("src.storage.os.fsync", fail_fsync)
+    with pytest.raises(OSError, match="disk full"):
+        storage.update_analysis_results({'a': {'category': "배송", 'sentiment': "Positive", 'urgency': 1, 'summary': "빠름"}})
+
+    # 교체 전 실패이므로 원본은 그대로이고, 임시 파일도 남지 않으며, 이후 쓰기가 정상 동작함
+    with open(storage.filepath, 'rb') as f:
+        assert f.read() == original
+    assert not os.path.exists(f"{storage.filepath}.tmp")
+    monkeypatch.undo()
+    assert storage.is_review_exist('b')
+    assert storage.update_analysis_results({'a': {'category': "배송", 'sentiment': "Positive", 'urgency': 1, 'summary': "빠름"}}) == 1
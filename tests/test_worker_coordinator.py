@@ -0,0 +1,101 @@
+import threading
+from datetime import datetime, timedelta
+
+from src.worker_coordinator import ConsistentHashRing, WorkerCoordinator
+
+T0 = datetime(2026, 1, 5, 9, 0, 0)
+PRODUCTS = [{'id': f"p{i:03d}"} for i in range(300)]
+
+
+def coordinator(tmp_path, worker_id, **kwargs):
+    return WorkerCoordinator(state_dir=str(tmp_path / "workers"), worker_id=worker_id, lease_ttl_seconds=60, **kwargs)
+
+
+def owners(workers):
+    ring = ConsistentHashRing(workers)
+    return {p['id']: ring.owner(p['id']) for p in PRODUCTS}
+
+
+def test_ring_moves_only_the_joining_or_leaving_workers_share():
+    before = owners(["w1", "w2", "w3"])
+    joined = owners(["w1", "w2", "w3", "w4"])
+    moved = [pid for pid in before if before[pid] != joined[pid]]
+    # 신규 워커가 가져간 상품만 담당이 바뀌고, 기존 워커 사이의 재배치는 없어야 함
+    assert moved and all(joined[pid] == "w4" for pid in moved)
+    assert len(moved) < len(PRODUCTS) / 2
+
+    left = owners(["w1", "w3"])
+    assert all(left[pid] == before[pid] for pid in before if before[pid] != "w2")
+
+
+def test_assignment_follows_live_membership(tmp_path):
+    first, second = coordinator(tmp_path, "w1"), coordinator(tmp_path, "w2")
+    first.heartbeat(T0)
+    second.heartbeat(T0)
+
+    mine = {p['id'] for p in first.assigned(PRODUCTS, T0)}
+    theirs = {p['id'] for p in second.assigned(PRODUCTS, T0)}
+    assert mine and theirs and not mine & theirs and len(mine | theirs) == len(PRODUCTS)
+
+    # w2의 생존 신호가 lease_ttl_seconds 동안 없으면 w1이 전체 상품을 담당함
+    later = T0 + timedelta(seconds=61)
+    first.heartbeat(later)
+    assert len(first.assigned(PRODUCTS, later)) == len(PRODUCTS)
+
+
+def test_live_lease_is_exclusive_and_expired_lease_is_taken_over(tmp_path):
+    first, second = coordinator(tmp_path, "w1"), coordinator(tmp_path, "w2")
+    assert first.acquire(["p1", "p2"], T0) == ["p1", "p2"]
+    assert second.acquire(["p1", "p2", "p3"], T0 + timedelta(seconds=30)) == ["p3"]
+
+    # 갱신(heartbeat)된 리스는 원래 만료 시각이 지나도 유지됨
+    first.heartbeat(T0 + timedelta(seconds=50))
+    assert second.acquire(["p1"], T0 + timedelta(seconds=70)) == []
+
+    # 갱신이 끊겨 만료되면 다른 워커가 인수하고, 원래 워커는 다음 갱신 시 보유 목록에서 제외함
+    assert second.acquire(["p1"], T0 + timedelta(seconds=111)) == ["p1"]
+    first.heartbeat(T0 + timedelta(seconds=112))
+    assert "p1" not in first.held and "p1" in second.held
+
+
+def test_concurrent_acquire_grants_each_lease_once(tmp_path):
+    workers = [coordinator(tmp_path, f"w{i}") for i in range(6)]
+    keys = [f"p{i}" for i in range(20)]
+    results = {}
+    start = threading.Barrier(len(workers))
+
+    def run(worker):
+        start.wait()
+        results[worker.worker_id] = worker.acquire(keys, T0)
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    granted = [key for acquired in results.values() for key in acquired]
+    assert sorted(granted) == sorted(keys)
+
+
+def test_release_shares_next_due_and_backlog_singleton(tmp_path):
+    first, second = coordinator(tmp_path, "w1"), coordinator(tmp_path, "w2")
+    assert first.acquire(["p1"], T0) == ["p1"]
+    first.release({'p1': T0 + timedelta(minutes=10)})
+    # 방금 수집된 상품은 공유된 다음 수집 예정 시각 전까지 다른 워커도 가져가지 않음
+    assert second.acquire(["p1"], T0 + timedelta(minutes=5)) == []
+    assert second.acquire(["p1"], T0 + timedelta(minutes=10, seconds=1)) == ["p1"]
+
+    assert first.acquire_singleton("backlog", T0)
+    assert not second.acquire_singleton("backlog", T0)
+    first.release_singleton("backlog")
+    assert second.acquire_singleton("backlog", T0)
+
+
+def test_stop_hands_leases_over_immediately(tmp_path):
+    first, second = coordinator(tmp_path, "w1", heartbeat_seconds=60), coordinator(tmp_path, "w2")
+    first.start()
+    assert first.acquire(["p1"]) == ["p1"]
+    first.stop()
+    assert second.acquire(["p1"]) == ["p1"]
+    assert second.live_workers() == ["w2"]